@@ -0,0 +1,5 @@
+"""
+Benchmarks for the hot paths of Pong
+
+Run with `python -m cv_pong.bench` from the repository root
+"""
@@ -0,0 +1,74 @@
+"""
+Run the Pong benchmarks and write the results as JSON
+
+Example:
+    python -m cv_pong.bench --output new.json --compare old.json
+"""
+import argparse
+import json
+import sys
+from . import bench_controller, bench_env, bench_model, bench_network, \
+    bench_startup, bench_utils, bench_view
+from .harness import BENCHMARKS, find_regressions, run_benchmarks
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m cv_pong.bench',
+        description='Benchmark the hot paths of Pong'
+    )
+    parser.add_argument('names', nargs='*',
+                        help='benchmarks to run (a name ending in "." runs '
+                             'every benchmark starting with it); default all')
+    parser.add_argument('--list', action='store_true',
+                        help='list the benchmarks and exit')
+    parser.add_argument('-o', '--output',
+                        help='file to write the JSON results to (default '
+                             'stdout)')
+    parser.add_argument('--compare', metavar='BASELINE',
+                        help='JSON results of an earlier run to compare to; '
+                             'exits with status 1 on a regression')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='slowdown (as a fraction) that counts as a '
+                             'regression (default 0.1)')
+    parser.add_argument('--repeats', type=int, default=5,
+                        help='times to repeat each measurement (default 5)')
+    parser.add_argument('--min-time', type=float, default=0.2,
+                        help='least seconds per repeat (default 0.2)')
+    parser.add_argument('--batch-size', type=int, default=1024,
+                        help='games per batch for batch benchmarks '
+                             '(default 1024)')
+    parser.add_argument('--frames',
+                        help='.npy file of (N, H, W, 3) BGR frames to feed '
+                             'the controller (default synthetic frames)')
+    options = parser.parse_args()
+
+    if options.list:
+        print('\n'.join(BENCHMARKS))
+        return 0
+
+    unknown = [name for name in options.names
+               if not name.endswith('.') and name not in BENCHMARKS]
+    if unknown:
+        parser.error(f'unknown benchmarks: {", ".join(unknown)}')
+
+    results = run_benchmarks(options, options.names or None)
+    if options.output is None:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    else:
+        with open(options.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    if options.compare is not None:
+        with open(options.compare) as file:
+            baseline = json.load(file)
+        regressions = find_regressions(baseline, results, options.threshold)
+        for regression in regressions:
+            print(f'REGRESSION {regression}', file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
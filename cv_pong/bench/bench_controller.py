@@ -0,0 +1,307 @@
+"""
+Benchmarks for CVController, fed from recorded or synthetic frames instead of
+a camera
+"""
+from argparse import Namespace
+import time
+from typing import Any
+import numpy as np
+from ..src.constants import *
+from ..src.controller import CVController
+from ..src.model import PongModel
+from ..src.pool import HandDetectorPool
+from ..src.recording import LandmarkTrace
+from ..src.sources import ArraySource
+from ..src.synthetic import SyntheticHandSource
+from .harness import benchmark, measure
+
+
+def load_frames(options: Namespace) -> np.ndarray:
+    """
+    Load the frames to feed to the controller
+
+    :param options: the command line options. If options.frames is set, it is
+        the path to a .npy file holding an (N, H, W, 3) array of BGR frames.
+        Otherwise, smooth random frames of 1280x720 are made from a fixed
+        seed
+    :return: an (N, H, W, 3) array of uint8, the frames
+    """
+    if options.frames is not None:
+        return np.load(options.frames, mmap_mode='r')
+    rng = np.random.default_rng(0)
+    coarse = rng.integers(0, 256, (30, 45, 80, 3), dtype=np.uint8)
+    return coarse.repeat(16, axis=1).repeat(16, axis=2)
+
+
+@benchmark('controller.move')
+def bench_controller_move(options: Namespace) -> dict[str, Any]:
+    """
+    Time processing one frame in CVController.move, including hand tracking
+    """
+    return time_controller_move(options, HAND_PROCESSING_SIZE)
+
+
+@benchmark('controller.move_scheduled')
+def bench_controller_move_scheduled(options: Namespace) -> dict[str, Any]:
+    """
+    Time processing one frame in CVController.move when the scheduler may
+    skip hand tracking. Without recorded frames, the scene is kept still, so
+    only the adaptive skip triggers inference
+    """
+    frames = load_frames(options)
+    if options.frames is None:
+        frames = frames[:1]
+    return time_controller_move(options, HAND_PROCESSING_SIZE, frames,
+                                scheduling=True)
+
+
+@benchmark('controller.move_cached')
+def bench_controller_move_cached(options: Namespace) -> dict[str, Any]:
+    """
+    Time processing one frame in CVController.move, taking the hand from a
+    landmark trace instead of running hand tracking
+    """
+    frames = load_frames(options)
+    # The same hand in every frame; broadcasting keeps a long trace small
+    hand = np.full((21, 3), 0.5, dtype=np.float32)
+    trace_length = 1_000_000
+    trace = LandmarkTrace(np.broadcast_to(hand, (trace_length, 21, 3)),
+                          np.full(trace_length, 2, dtype=np.int8))
+    controller = CVController(PongModel(), threaded=False,
+                              landmark_trace=trace, replay_landmarks=True)
+    controller.initialize(source=ArraySource(frames, loop=True))
+    result = measure(controller.move, options.repeats, options.min_time)
+    controller.close()
+    result['frame_shape'] = list(frames.shape[1:])
+    return result
+
+
+def time_controller_move(options: Namespace,
+                         processing_size: tuple[int, int] | None,
+                         frames: np.ndarray | None = None,
+                         scheduling: bool = False) -> dict[str, Any]:
+    """
+    Time processing one frame in CVController.move
+
+    :param options: the command line options
+    :param processing_size: the size to shrink frames to for hand tracking,
+        or None to use the full size of the frames
+    :param frames: an (N, H, W, 3) array, the frames to feed the controller,
+        or None to load them from the options
+    :param scheduling: a bool, whether to let the controller skip hand
+        tracking on some frames
+    :return: a dict, the timing results
+    """
+    if frames is None:
+        frames = load_frames(options)
+    controller = CVController(PongModel(), threaded=False,
+                              processing_size=processing_size,
+                              scheduling=scheduling)
+    controller.initialize(source=ArraySource(frames, loop=True))
+    result = measure(controller.move, options.repeats, options.min_time)
+    if controller.scheduler is not None:
+        result['skip'] = controller.scheduler.skip
+    controller.close()
+    result['frame_shape'] = list(frames.shape[1:])
+    result['processing_size'] = processing_size
+    return result
+
+
+def _register_processing_size(size: tuple[int, int] | None):
+    """
+    Register a benchmark of CVController.move at one processing resolution
+
+    :param size: the processing size to benchmark, or None for full size
+    """
+    name = 'full' if size is None else f'{size[0]}x{size[1]}'
+
+    @benchmark(f'controller.processing_size.{name}')
+    def bench(options: Namespace) -> dict[str, Any]:
+        return time_controller_move(options, size)
+
+
+for _size in (None, (640, 480), (320, 240), (256, 256), (160, 120)):
+    _register_processing_size(_size)
+
+
+def time_pool(options: Namespace, processes: int) -> dict[str, Any]:
+    """
+    Time how long each frame takes to get through a busy HandDetectorPool
+
+    Each call waits for a free slot, then sends the next frame, so the time
+    per call is the inverse of the pool's throughput
+
+    :param options: the command line options
+    :param processes: an int, the number of worker processes
+    :return: a dict, the timing results
+    """
+    import cv2
+    frames = load_frames(options)
+    frames = np.stack([cv2.resize(frame, HAND_PROCESSING_SIZE)
+                       for frame in frames])
+    pool = HandDetectorPool(processes, frames.shape[1:])
+    count = 0
+
+    def send_frame():
+        nonlocal count
+        acquired = pool.acquire()
+        while acquired is None:
+            pool.results(timeout=1.0)
+            acquired = pool.acquire()
+        slot, slot_frame = acquired
+        np.copyto(slot_frame, frames[count % len(frames)])
+        pool.submit(slot, count, 0.0)
+        count += 1
+
+    # Let the workers load MediaPipe before timing
+    for _ in range(processes):
+        send_frame()
+    while pool.in_flight:
+        pool.results(timeout=1.0)
+    result = measure(send_frame, options.repeats, options.min_time)
+    pool.close()
+    result['processes'] = processes
+    return result
+
+
+def _register_pool(processes: int):
+    """
+    Register a benchmark of a HandDetectorPool with some number of workers
+
+    :param processes: the number of worker processes to benchmark
+    """
+    @benchmark(f'controller.pool.{processes}')
+    def bench(options: Namespace) -> dict[str, Any]:
+        return time_pool(options, processes)
+
+
+for _processes in (1, 2, 4):
+    _register_pool(_processes)
+
+
+def estimate_lag(paddle: np.ndarray, truth: np.ndarray, max_lag: int) -> int:
+    """
+    Find how many frames the paddle is behind where it should be
+
+    :param paddle: an (N,) array, where the paddle was after each frame
+    :param truth: an (N,) array, where the hand put the paddle in each frame
+    :param max_lag: an int, the most frames of lag to look for either way
+    :return: an int, the number of frames the paddle lines up with the truth
+        best when shifted back by, which is negative if the paddle is ahead
+        (as when the hand is predicted)
+    """
+    window = len(truth) - 2 * max_lag
+    errors = [np.abs(paddle[max_lag + lag:max_lag + lag + window]
+                     - truth[max_lag:max_lag + window]).mean()
+              for lag in range(-max_lag, max_lag + 1)]
+    return int(np.argmin(errors)) - max_lag
+
+
+def wait_for_hand(controller: CVController, timeout: float = 30.0):
+    """
+    Move until the controller first finds a hand, so that loading MediaPipe
+    (in worker processes, for a pool) is not counted
+
+    :param controller: the initialized, unthreaded CVController
+    :param timeout: a float, the most seconds to wait
+    :raises TimeoutError: if no hand is found in time
+    """
+    deadline = time.perf_counter() + timeout
+    while controller.input_timestamp is None:
+        if time.perf_counter() > deadline:
+            raise TimeoutError('The controller did not find the hand')
+        controller.move()
+
+
+def follow_synthetic_hand(controller_kwargs: dict[str, Any],
+                          seconds: float = 2.0) -> dict[str, Any]:
+    """
+    Play a synthetic hand to a controller in realtime, and compare where the
+    paddle went with where the hand put it
+
+    :param controller_kwargs: a dict, the keyword arguments to make the
+        unthreaded CVController with
+    :param seconds: a float, how long to play the hand for
+    :return: a dict giving the mean distance in pixels from the paddle to
+        where the hand put it, how far behind the hand the paddle is in
+        milliseconds (negative if ahead), and the fraction of frames a new
+        hand position came from
+    """
+    source = SyntheticHandSource()
+    model = PongModel()
+    # Keeps the truth inside the court, as the paddle is
+    truth_model = PongModel()
+    controller = CVController(model, threaded=False, **controller_kwargs)
+    controller.initialize(source=source)
+    wait_for_hand(controller)
+    frames = int(seconds * CAMERA_FPS)
+    paddle = np.empty(frames)
+    truth = np.empty(frames)
+    found = 0
+    input_timestamp = controller.input_timestamp
+    for index in range(frames):
+        controller.move()
+        paddle[index] = model.paddle_location
+        # Each move reads one frame
+        truth_model.move_paddle(source.paddle_location_at(source.position
+                                                          - 1))
+        truth[index] = truth_model.paddle_location
+        if controller.input_timestamp != input_timestamp:
+            input_timestamp = controller.input_timestamp
+            found += 1
+    controller.close()
+    lag = estimate_lag(paddle, truth, CAMERA_FPS // 4)
+    return {
+        'paddle_error_px': float(np.abs(paddle - truth).mean()),
+        'paddle_lag_ms': 1000 * lag / CAMERA_FPS,
+        'hand_found_fraction': found / frames,
+    }
+
+
+SYNTHETIC_MODES = {
+    'tracking': {},
+    'full_search': {'hand_tracking': False},
+    'scheduled': {'scheduling': True},
+    'smoothed': {'smoothing': True},
+    'pool': {'inference_processes': 2},
+}
+
+
+def time_synthetic(options: Namespace, mode: str) -> dict[str, Any]:
+    """
+    Time one controller mode following a synthetic hand, and measure how
+    closely and how far behind it follows
+
+    The frames are the same every run, but how far behind the paddle is also
+    depends on how fast this machine processes them
+
+    :param options: the command line options
+    :param mode: a str, the name of the mode in SYNTHETIC_MODES
+    :return: a dict, the timing and accuracy results
+    """
+    controller_kwargs = {'smoothing': False, 'scheduling': False,
+                         **SYNTHETIC_MODES[mode]}
+    controller = CVController(PongModel(), threaded=False,
+                              **controller_kwargs)
+    controller.initialize(source=SyntheticHandSource(realtime=False))
+    wait_for_hand(controller)
+    result = measure(controller.move, options.repeats, options.min_time)
+    controller.close()
+    result.update(follow_synthetic_hand(controller_kwargs))
+    result['frame_shape'] = [CAMERA_SIZE[1], CAMERA_SIZE[0], 3]
+    return result
+
+
+def _register_synthetic(mode: str):
+    """
+    Register a benchmark of one controller mode following a synthetic hand
+
+    :param mode: the name of the mode in SYNTHETIC_MODES
+    """
+    @benchmark(f'controller.synthetic.{mode}')
+    def bench(options: Namespace) -> dict[str, Any]:
+        return time_synthetic(options, mode)
+
+
+for _mode in SYNTHETIC_MODES:
+    _register_synthetic(_mode)
@@ -0,0 +1,48 @@
+"""
+Benchmarks for the environments agents are trained in
+"""
+from argparse import Namespace
+from typing import Any
+import numpy as np
+from ..src.constants import *
+from ..src.env import BatchPongEnv, PongEnv
+from .harness import benchmark, measure
+
+
+@benchmark('env.step')
+def bench_env_step(options: Namespace) -> dict[str, Any]:
+    """
+    Time one step of a PongEnv, with the paddle following the ball
+    """
+    env = PongEnv(seed=0)
+    observation, _ = env.reset()
+
+    def step():
+        nonlocal observation
+        observation, _, terminated, truncated, _ = env.step(observation[1])
+        if terminated or truncated:
+            observation, _ = env.reset()
+
+    return measure(step, options.repeats, options.min_time)
+
+
+@benchmark('batch_env.step')
+def bench_batch_env_step(options: Namespace) -> dict[str, Any]:
+    """
+    Time one step of a BatchPongEnv of options.batch_size games, with half of
+    the paddles following the ball and half missing it
+    """
+    env = BatchPongEnv(options.batch_size, seed=0)
+    observations, _ = env.reset()
+    follow = np.arange(options.batch_size) % 2 == 0
+
+    def step():
+        nonlocal observations
+        observations = env.step(np.where(follow, observations[:, 1],
+                                         WALL_THICKNESS))[0]
+
+    result = measure(step, options.repeats, options.min_time)
+    result['games'] = options.batch_size
+    result['env_steps_per_second'] = \
+        result['calls_per_second'] * options.batch_size
+    return result
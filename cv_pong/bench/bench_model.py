@@ -0,0 +1,63 @@
+"""
+Benchmarks for PongModel and BatchPongModel
+"""
+from argparse import Namespace
+from typing import Any
+from ..src.batch_model import BatchPongModel
+from ..src.constants import *
+from ..src.model import PongModel
+from ..src.rewind import RewindBuffer
+from .harness import benchmark, measure
+
+
+@benchmark('model.update')
+def bench_model_update(options: Namespace) -> dict[str, Any]:
+    """
+    Time one physics step of PongModel, with the ball bouncing around
+    """
+    model = PongModel(ball_vel=(float(BALL_MAX_SPEED) / 3,
+                                -float(BALL_MAX_SPEED) / 5))
+    return measure(model.update, options.repeats, options.min_time)
+
+
+@benchmark('model.update_rewind')
+def bench_model_update_rewind(options: Namespace) -> dict[str, Any]:
+    """
+    Time one physics step of PongModel while a RewindBuffer records each tick
+    """
+    model = PongModel(ball_vel=(float(BALL_MAX_SPEED) / 3,
+                                -float(BALL_MAX_SPEED) / 5))
+    RewindBuffer(model)
+    return measure(model.update, options.repeats, options.min_time)
+
+
+@benchmark('model.restore')
+def bench_model_restore(options: Namespace) -> dict[str, Any]:
+    """
+    Time putting a PongModel back to a tick kept by a RewindBuffer
+    """
+    model = PongModel(ball_vel=(float(BALL_MAX_SPEED) / 3,
+                                -float(BALL_MAX_SPEED) / 5))
+    buffer = RewindBuffer(model)
+    for _ in range(REWIND_TICKS // 2):
+        model.update()
+    # After the first call, the tick gone back to is the newest one kept, so
+    # every call does the same work
+    tick = model.tick - 1
+    return measure(lambda: buffer.restore(tick), options.repeats,
+                   options.min_time)
+
+
+@benchmark('batch_model.update')
+def bench_batch_model_update(options: Namespace) -> dict[str, Any]:
+    """
+    Time one physics step of a BatchPongModel of options.batch_size games
+    """
+    batch = BatchPongModel(options.batch_size,
+                           ball_vel=(float(BALL_MAX_SPEED) / 3,
+                                     -float(BALL_MAX_SPEED) / 5))
+    result = measure(batch.update, options.repeats, options.min_time)
+    result['games'] = options.batch_size
+    result['game_steps_per_second'] = \
+        result['calls_per_second'] * options.batch_size
+    return result
@@ -0,0 +1,81 @@
+"""
+Benchmarks for playing Pong across machines
+"""
+from argparse import Namespace
+from typing import Any
+import numpy as np
+from ..src.constants import *
+from ..src.model import PongModel
+from ..src.network import PongClient, PongServer, encode_snapshot, \
+    take_snapshot
+from .harness import benchmark, measure
+
+
+@benchmark('network.encode_snapshot')
+def bench_encode_snapshot(options: Namespace) -> dict[str, Any]:
+    """
+    Time packing a four player snapshot as a delta from the one a step before
+    """
+    model = PongModel(num_players=MAX_PLAYERS)
+    base = take_snapshot(model)
+    model.update()
+    snapshot = take_snapshot(model)
+    result = measure(lambda: encode_snapshot(2, snapshot, 1, base),
+                     options.repeats, options.min_time)
+    result['full_bytes'] = len(encode_snapshot(2, snapshot))
+    result['delta_bytes'] = len(encode_snapshot(2, snapshot, 1, base))
+    return result
+
+
+@benchmark('network.loopback')
+def bench_loopback(options: Namespace) -> dict[str, Any]:
+    """
+    Time one frame of a four player game over loopback, with every client
+    sending its paddle each frame and the server sending a snapshot every
+    other frame, and report the bandwidth and round trip time
+    """
+    server = PongServer(PongModel(num_players=MAX_PLAYERS), ('127.0.0.1', 0))
+    clients = [PongClient(server.address) for _ in range(MAX_PLAYERS - 1)]
+    mirrors = [PongModel(num_players=MAX_PLAYERS) for _ in clients]
+    try:
+        for client in clients:
+            client.join()
+        while any(client.player is None for client in clients):
+            server.poll()
+            for client in clients:
+                client.poll()
+        frames_per_snapshot = round(FRAME_RATE / NETWORK_SNAPSHOT_RATE)
+        frame = 0
+        round_trips = []
+
+        def play_frame():
+            nonlocal frame
+            frame += 1
+            for client, mirror in zip(clients, mirrors):
+                client.update(mirror, 200 + frame % 200)
+            server.poll()
+            server.model.update()
+            if frame % frames_per_snapshot == 0:
+                server.broadcast()
+            if clients[0].round_trip_time is not None:
+                round_trips.append(clients[0].round_trip_time)
+
+        result = measure(play_frame, options.repeats, options.min_time)
+        snapshots = frame // frames_per_snapshot
+        game_seconds = frame / FRAME_RATE
+        result['snapshot_bytes'] = \
+            server.bytes_sent / (snapshots * len(clients))
+        result['down_bytes_per_second'] = \
+            server.bytes_sent / game_seconds / len(clients)
+        result['up_bytes_per_second'] = \
+            server.bytes_received / game_seconds / len(clients)
+        result['round_trip_p50_ms'] = \
+            float(np.percentile(round_trips, 50)) * 1000 \
+            if round_trips else None
+        result['snapshots_dropped'] = sum(client.snapshots_dropped
+                                          for client in clients)
+        return result
+    finally:
+        for client in clients:
+            client.close()
+        server.close()
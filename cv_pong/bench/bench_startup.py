@@ -0,0 +1,71 @@
+"""
+Benchmark for how long the game takes to show its first frame
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from argparse import Namespace
+from typing import Any
+import numpy as np
+from .harness import benchmark
+
+MAIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def write_video(path: str, frames: int = 30):
+    """
+    Write a short video to stand in for the camera
+
+    :param path: a str, the path of the .avi file to write
+    :param frames: an int, the number of frames in the video
+    """
+    import cv2
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 30,
+                             (640, 480))
+    rng = np.random.default_rng(0)
+    for _ in range(frames):
+        writer.write(rng.integers(0, 256, (480, 640, 3), dtype=np.uint8))
+    writer.release()
+
+
+@benchmark('startup.first_frame')
+def bench_first_frame(options: Namespace) -> dict[str, Any]:
+    """
+    Time starting main.py until it has drawn its first frame
+
+    main.py is run options.repeats times in a new process with SDL's dummy
+    video driver and a video file in place of the camera
+    """
+    startup = []
+    imports = []
+    process = []
+    with tempfile.TemporaryDirectory() as directory:
+        video = os.path.join(directory, 'camera.avi')
+        log = os.path.join(directory, 'timings.json')
+        write_video(video)
+        env = dict(os.environ, SDL_VIDEODRIVER='dummy',
+                   PYGAME_HIDE_SUPPORT_PROMPT='1')
+        for _ in range(options.repeats):
+            start = time.perf_counter()
+            subprocess.run(
+                [sys.executable, 'main.py', '--exit-after', '1', '--camera',
+                 video, '--timing-log', log],
+                cwd=MAIN_DIR, env=env, check=True, stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
+            )
+            process.append(time.perf_counter() - start)
+            with open(log) as file:
+                summary = json.load(file)['summary']
+            startup.append(summary['startup']['p50_ms'] / 1000)
+            imports.append(summary['imports']['p50_ms'] / 1000)
+    return {
+        'seconds_per_call': float(np.median(startup)),
+        'min_seconds_per_call': min(startup),
+        'max_seconds_per_call': max(startup),
+        'import_seconds': float(np.median(imports)),
+        'process_seconds': float(np.median(process)),
+        'calls': options.repeats,
+    }
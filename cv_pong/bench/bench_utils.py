@@ -0,0 +1,63 @@
+"""
+Benchmarks for the utility functions
+"""
+from argparse import Namespace
+from typing import Any
+from ..src.utils import Rect, Vec2, add_tuples, do_rects_intersect, \
+    scale_tuple
+from .harness import benchmark, measure
+
+
+@benchmark('utils.add_tuples')
+def bench_add_tuples(options: Namespace) -> dict[str, Any]:
+    """
+    Time adding two 2D positions, as the model and view do
+    """
+    pos, vel = (400, 300), (2.5, -2.5)
+    return measure(lambda: add_tuples(pos, vel), options.repeats,
+                   options.min_time)
+
+
+@benchmark('utils.scale_tuple')
+def bench_scale_tuple(options: Namespace) -> dict[str, Any]:
+    """
+    Time scaling a 2D velocity, as the model does
+    """
+    vel = (150.0, -150.0)
+    return measure(lambda: scale_tuple(vel, 1 / 60), options.repeats,
+                   options.min_time)
+
+
+@benchmark('utils.do_rects_intersect')
+def bench_do_rects_intersect(options: Namespace) -> dict[str, Any]:
+    """
+    Time checking the ball against the paddle, as the model does
+    """
+    ball, paddle = (700, 275, 50, 50), (740, 250, 20, 100)
+    return measure(lambda: do_rects_intersect(ball, paddle), options.repeats,
+                   options.min_time)
+
+
+@benchmark('utils.rect_intersects')
+def bench_rect_intersects(options: Namespace) -> dict[str, Any]:
+    """
+    Time checking the ball against the paddle with Rects, as the model does
+    """
+    ball, paddle = Rect(700, 275, 50, 50), Rect(740, 250, 20, 100)
+    return measure(lambda: ball.intersects(paddle), options.repeats,
+                   options.min_time)
+
+
+@benchmark('utils.vec2_add')
+def bench_vec2_add(options: Namespace) -> dict[str, Any]:
+    """
+    Time adding a velocity to a position in place, the Vec2 counterpart of
+    utils.add_tuples
+    """
+    pos, vel = Vec2(400, 300), Vec2(2, -2)
+
+    def add():
+        nonlocal pos
+        pos += vel
+
+    return measure(add, options.repeats, options.min_time)
@@ -0,0 +1,96 @@
+"""
+Benchmarks for PygameView, drawn with SDL's dummy video driver
+"""
+import os
+from argparse import Namespace
+from typing import Any
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+import pygame
+from ..src.constants import *
+from ..src.controller import CVController
+from ..src.export import HeadlessRenderer
+from ..src.model import PongModel
+from ..src.view import PygameView
+from .harness import benchmark, measure
+
+
+def _make_screen() -> pygame.Surface:
+    """
+    Set up pygame and open a window to draw in
+
+    :return: a pygame Surface, the window
+    """
+    pygame.init()
+    return pygame.display.set_mode(WINDOW_SIZE)
+
+
+@benchmark('view.draw')
+def bench_view_draw(options: Namespace) -> dict[str, Any]:
+    """
+    Time drawing one frame without the camera feed
+    """
+    model = PongModel()
+    view = PygameView(model, _make_screen())
+
+    def draw():
+        model.update()
+        view.draw()
+    return measure(draw, options.repeats, options.min_time)
+
+
+@benchmark('view.draw_dirty')
+def bench_view_draw_dirty(options: Namespace) -> dict[str, Any]:
+    """
+    Time drawing one frame without the camera feed, using dirty rectangles
+    """
+    model = PongModel()
+    view = PygameView(model, _make_screen(), dirty_rects=True)
+
+    def draw():
+        model.update()
+        view.draw()
+    return measure(draw, options.repeats, options.min_time)
+
+
+@benchmark('view.draw_camera')
+def bench_view_draw_camera(options: Namespace) -> dict[str, Any]:
+    """
+    Time drawing one frame over the camera feed
+    """
+    model = PongModel()
+    view = PygameView(model, _make_screen(), CVController(model))
+
+    def draw():
+        model.update()
+        view.draw()
+    return measure(draw, options.repeats, options.min_time)
+
+
+class _DiscardSink:
+    """
+    A FrameSink that throws frames away, to time drawing on its own
+    """
+    def write(self, frame, timestamp: float):
+        pass
+
+    def close(self):
+        pass
+
+
+@benchmark('view.render_headless')
+def bench_view_render_headless(options: Namespace) -> dict[str, Any]:
+    """
+    Time drawing one frame off screen and handing it to the writer thread
+    """
+    model = PongModel()
+    renderer = HeadlessRenderer(model, _DiscardSink())
+
+    def render():
+        model.update()
+        renderer.render()
+    try:
+        result = measure(render, options.repeats, options.min_time)
+    finally:
+        renderer.close()
+    result['realtime_factor'] = result['calls_per_second'] / FRAME_RATE
+    return result
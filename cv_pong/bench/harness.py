@@ -0,0 +1,152 @@
+"""
+Module containing the benchmark registry and timing helpers
+"""
+import json
+import platform
+import sys
+import time
+import timeit
+from argparse import Namespace
+from typing import Any, Callable
+
+BenchmarkFunction = Callable[[Namespace], dict[str, Any]]
+
+# Maps benchmark name to the function that runs it, in registration order
+BENCHMARKS: dict[str, BenchmarkFunction] = {}
+
+
+def benchmark(name: str) -> Callable[[BenchmarkFunction], BenchmarkFunction]:
+    """
+    Register a function as a benchmark
+
+    The function is given the parsed command line options and returns a dict
+    of results, usually from measure
+
+    :param name: a str, the name to report the benchmark under
+    :return: a decorator which registers the function it is given
+    """
+    def register(func: BenchmarkFunction) -> BenchmarkFunction:
+        if name in BENCHMARKS:
+            raise ValueError(f'Benchmark {name} is already registered')
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+
+def measure(func: Callable[[], Any], repeats: int = 5,
+            min_time: float = 0.2) -> dict[str, Any]:
+    """
+    Time how long one call to a function takes
+
+    The number of calls per repeat is picked so that each repeat takes at
+    least min_time seconds. The median is the figure to compare between runs
+
+    :param func: a function taking no arguments, the code to time
+    :param repeats: an int, the number of times to repeat the measurement
+    :param min_time: a float, the least time in seconds each repeat takes
+    :return: a dict giving the median, min and max seconds per call, the
+        median CPU seconds per call (across all threads of the process), the
+        median calls per second, and how many calls were timed
+    """
+    timer = timeit.Timer(func)
+    number = 1
+    while timer.timeit(number) < min_time:
+        number *= 2
+    per_call = []
+    cpu_per_call = []
+    for _ in range(repeats):
+        cpu_start = time.process_time()
+        per_call.append(timer.timeit(number) / number)
+        cpu_per_call.append((time.process_time() - cpu_start) / number)
+    per_call.sort()
+    cpu_per_call.sort()
+    median = per_call[len(per_call) // 2]
+    return {
+        'seconds_per_call': median,
+        'min_seconds_per_call': per_call[0],
+        'max_seconds_per_call': per_call[-1],
+        'cpu_seconds_per_call': cpu_per_call[len(cpu_per_call) // 2],
+        'calls_per_second': 1.0 / median if median > 0 else float('inf'),
+        'calls': number * repeats,
+    }
+
+
+def run_benchmarks(options: Namespace, names: list[str] | None = None) \
+        -> dict[str, Any]:
+    """
+    Run registered benchmarks and collect their results
+
+    :param options: the parsed command line options, passed to each benchmark
+    :param names: a list of strs, the names of the benchmarks to run, or None
+        to run all of them. A name ending in '.' selects every benchmark
+        starting with it
+    :return: a dict with information about the machine and a dict of results
+        for each benchmark that was run
+    """
+    selected = [
+        name for name in BENCHMARKS
+        if names is None or any(
+            name == want or (want.endswith('.') and name.startswith(want))
+            for want in names
+        )
+    ]
+    results = {}
+    for name in selected:
+        start = time.perf_counter()
+        results[name] = BENCHMARKS[name](options)
+        print(f'{name}: {format_result(results[name])} '
+              f'({time.perf_counter() - start:.1f}s)', file=sys.stderr)
+    return {
+        'machine': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+        },
+        'timestamp': time.time(),
+        'results': results,
+    }
+
+
+def format_result(result: dict[str, Any]) -> str:
+    """
+    Give a short human-readable summary of one benchmark result
+
+    :param result: a dict, the result of one benchmark
+    :return: a str summarizing the time per call, if there is one
+    """
+    if 'seconds_per_call' not in result:
+        return json.dumps(result)
+    seconds = result['seconds_per_call']
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f'{seconds / scale:.3f} {unit}/call'
+    return f'{seconds / 1e-9:.1f} ns/call'
+
+
+def find_regressions(baseline: dict[str, Any], current: dict[str, Any],
+                     threshold: float) -> list[str]:
+    """
+    Compare two benchmark runs and find benchmarks that got slower
+
+    Only benchmarks that report seconds_per_call and appear in both runs are
+    compared
+
+    :param baseline: a dict, the output of run_benchmarks for the old run
+    :param current: a dict, the output of run_benchmarks for the new run
+    :param threshold: a float, the fraction a benchmark can slow down by
+        before it counts as a regression (e.g. 0.1 for 10%)
+    :return: a list of strs describing each regression
+    """
+    regressions = []
+    for name, result in current['results'].items():
+        old = baseline['results'].get(name, {}).get('seconds_per_call')
+        new = result.get('seconds_per_call')
+        if old is None or new is None or old <= 0:
+            continue
+        change = new / old - 1
+        if change > threshold:
+            regressions.append(f'{name}: {change:+.1%} '
+                               f'({format_result({"seconds_per_call": old})}'
+                               f' -> {format_result(result)})')
+    return regressions
@@ -1,35 +1,296 @@
 """
 Main run script for Pong
 """
+import time
+START_TIME = time.perf_counter()
+
+import argparse
+import os
 import pygame
 from pygame import locals
 from src.constants import *
+from src.export import HeadlessRenderer, VideoSink
 from src.model import PongModel
+from src.network import PongClient, PongServer
+from src.profiling import FrameTimer
+from src.recording import FrameRecorder, LandmarkCache, RecordingSource, \
+    ReplaySource
+from src.sources import CameraSource, CaptureSettings, LatestFrameSource, \
+    make_source
 from src.view import PygameView
-from src.controller import CVController
+from src.controller import CameraClosedException, CVController
+IMPORT_TIME = time.perf_counter()
+
+
+def frame_size(text: str) -> tuple[int, int]:
+    """
+    :param text: a str, a width and height such as 640x480
+    :return: a tuple of two ints, the width and height
+    """
+    width, _, height = text.lower().partition('x')
+    try:
+        return int(width), int(height)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'{text!r} is not WIDTHxHEIGHT')
 
 
 def main():
-    pygame.init()
-    screen = pygame.display.set_mode(WINDOW_SIZE)
-    screen.set_alpha(255, pygame.SRCALPHA)
+    parser = argparse.ArgumentParser(description='Play Pong with your hand')
+    parser.add_argument('--players', type=int, default=1,
+                        choices=range(1, MAX_PLAYERS + 1),
+                        help='number of players, each moving a paddle with '
+                             'their own hand (default 1)')
+    parser.add_argument('--timings', action='store_true',
+                        help='show how long each stage of a frame takes')
+    parser.add_argument('--timing-log', metavar='PATH',
+                        help='on exit, save frame timings to PATH (.csv for '
+                             'the most recent samples, otherwise a JSON '
+                             'summary)')
+    parser.add_argument('--hide-camera', action='store_true',
+                        help="don't show the camera feed behind the game, "
+                             'and only redraw the parts of the screen that '
+                             'change')
+    parser.add_argument('--camera', default='0',
+                        help='index of the camera, path of a video file, '
+                             'directory or glob pattern of images, '
+                             'synthetic for made up frames, or '
+                             'synthetic-hand for a drawn hand moving up and '
+                             'down, to read from (default 0)')
+    parser.add_argument('--camera-size', type=frame_size,
+                        default=CAMERA_SIZE, metavar='WIDTHxHEIGHT',
+                        help='resolution to ask the camera for (default '
+                             f'{CAMERA_SIZE[0]}x{CAMERA_SIZE[1]})')
+    parser.add_argument('--camera-fps', type=float, default=CAMERA_FPS,
+                        metavar='FPS',
+                        help='frame rate to ask the camera for (default '
+                             f'{CAMERA_FPS})')
+    parser.add_argument('--camera-format', default=CAMERA_FOURCC,
+                        metavar='FOURCC',
+                        help='pixel format to ask the camera for, such as '
+                             f'MJPG or YUYV (default {CAMERA_FOURCC})')
+    parser.add_argument('--camera-buffer-size', type=int,
+                        default=CAMERA_BUFFER_SIZE, metavar='FRAMES',
+                        help='frames the camera driver may queue up '
+                             f'(default {CAMERA_BUFFER_SIZE})')
+    parser.add_argument('--camera-defaults', action='store_true',
+                        help='leave every camera setting at the driver '
+                             'default instead of asking for the ones above')
+    parser.add_argument('--every-frame', action='store_true',
+                        help='read every camera frame in order, instead of '
+                             'only the newest, dropping any that went stale')
+    parser.add_argument('--record', metavar='DIR',
+                        help='record the camera to DIR while playing')
+    parser.add_argument('--replay', metavar='DIR',
+                        help='play a recording from DIR instead of reading '
+                             'the camera')
+    parser.add_argument('--replay-fast', action='store_true',
+                        help='play the recording as fast as it can be '
+                             'processed, instead of at the recorded pace')
+    parser.add_argument('--landmark-cache', metavar='DIR',
+                        help='save the hands found in each frame to DIR, '
+                             'under the name of the recording being made or '
+                             'replayed, so needs --record or --replay')
+    parser.add_argument('--cached-landmarks', action='store_true',
+                        help='move the paddle with the hands saved in '
+                             '--landmark-cache instead of looking for hands')
+    parser.add_argument('--no-smoothing', action='store_true',
+                        help='move the paddle to where the hand was in the '
+                             'latest camera frame, without smoothing or '
+                             'prediction')
+    parser.add_argument('--min-cutoff', type=float,
+                        default=PADDLE_FILTER_MIN_CUTOFF, metavar='HZ',
+                        help='smoothing cutoff frequency when the hand is '
+                             'still; lower is smoother but lags more '
+                             f'(default {PADDLE_FILTER_MIN_CUTOFF})')
+    parser.add_argument('--beta', type=float, default=PADDLE_FILTER_BETA,
+                        help='how fast smoothing falls off as the hand moves '
+                             'faster; higher lags less '
+                             f'(default {PADDLE_FILTER_BETA})')
+    parser.add_argument('--prediction-lead', type=float,
+                        default=PADDLE_PREDICTION_LEAD, metavar='SECONDS',
+                        help='how far past the time the paddle is moved to '
+                             'predict the hand, to cover drawing the frame '
+                             f'(default {PADDLE_PREDICTION_LEAD})')
+    parser.add_argument('--no-frame-skip', action='store_true',
+                        help='look for hands in every camera frame, instead '
+                             'of only when the image changes or every few '
+                             'frames')
+    parser.add_argument('--inference-processes', type=int,
+                        default=INFERENCE_PROCESSES, metavar='N',
+                        help='look for hands in N worker processes, to use '
+                             'more cores (default 0: no workers)')
+    parser.add_argument('--serve', type=int, nargs='?', const=NETWORK_PORT,
+                        metavar='PORT',
+                        help='run the game for players on other machines, '
+                             'listening on PORT (default '
+                             f'{NETWORK_PORT}); needs --players 2 or more')
+    parser.add_argument('--connect', metavar='HOST[:PORT]',
+                        help='play in a game run with --serve on HOST')
+    parser.add_argument('--export', metavar='PATH',
+                        help='draw the game off screen, without a window or '
+                             'waiting for the frame rate, and save every '
+                             'frame to PATH: a video if it has an extension '
+                             '(e.g. .mp4), otherwise a recording directory')
+    parser.add_argument('--exit-after', type=int, metavar='FRAMES',
+                        help='quit after this many frames')
+    args = parser.parse_args()
+    if len(args.camera_format) != 4:
+        parser.error('--camera-format needs a four letter code')
+    if args.cached_landmarks and args.landmark_cache is None:
+        parser.error('--cached-landmarks needs --landmark-cache')
+    if args.landmark_cache is not None and args.record is None \
+            and args.replay is None:
+        parser.error('--landmark-cache needs --record or --replay to name '
+                     'the trace after')
+    if args.landmark_cache is not None and args.players > 1:
+        parser.error('--landmark-cache only works with one player')
+    if args.serve is not None and args.players < 2:
+        parser.error('--serve needs --players 2 or more')
+    if args.export is not None and args.exit_after is None \
+            and args.replay is None and not args.cached_landmarks:
+        parser.error('--export needs --exit-after, --replay or '
+                     '--cached-landmarks, so that the game ends')
+    if args.serve is not None and args.connect is not None:
+        parser.error('--serve and --connect cannot be used together')
+
+    headless = args.export is not None
+    if not headless:
+        # Only start what is used; pygame.init would also start audio,
+        # joysticks and so on, which slows down startup
+        pygame.display.init()
+        screen = pygame.display.set_mode(WINDOW_SIZE)
+        screen.set_alpha(255, pygame.SRCALPHA)
 
-    model = PongModel()
-    controller = CVController(model)
-    view = PygameView(model, screen, controller)
-    controller.initialize()
+    timer = FrameTimer(keep_log=args.timing_log is not None)
+    server = None
+    client = None
+    if args.connect is not None:
+        host, _, port = args.connect.partition(':')
+        client = PongClient((host, int(port) if port else NETWORK_PORT))
+        client.connect()
+        model = PongModel(num_players=client.num_players)
+    else:
+        model = PongModel(num_players=args.players)
+    if args.serve is not None:
+        server = PongServer(model, ('0.0.0.0', args.serve))
+    # Over the network, only this machine's player is moved by the camera
+    input_model = model if server is None and client is None else PongModel()
+    landmark_cache = None
+    landmark_trace = None
+    if args.landmark_cache is not None:
+        session = os.path.basename(
+            os.path.normpath(args.replay or args.record)
+        )
+        landmark_cache = LandmarkCache(args.landmark_cache)
+        if args.cached_landmarks and session not in landmark_cache:
+            parser.error(f'no landmarks cached for {session}')
+        landmark_trace = landmark_cache.trace(session)
+    # When exporting, each game frame waits for its camera frame, so the
+    # video matches however fast or slow drawing is
+    controller = CVController(input_model, threaded=not headless,
+                              timer=timer,
+                              landmark_trace=landmark_trace,
+                              replay_landmarks=args.cached_landmarks,
+                              smoothing=not args.no_smoothing,
+                              prediction_lead=args.prediction_lead,
+                              scheduling=not args.no_frame_skip,
+                              inference_processes=args.inference_processes)
+    for paddle_filter in controller.paddle_filters or []:
+        paddle_filter.min_cutoff = args.min_cutoff
+        paddle_filter.beta = args.beta
+    if headless:
+        sink = VideoSink(args.export) if os.path.splitext(args.export)[1] \
+            else FrameRecorder(args.export)
+        view = HeadlessRenderer(model, sink,
+                                None if args.hide_camera else controller,
+                                timer=timer, show_timings=args.timings)
+    elif args.hide_camera:
+        view = PygameView(model, screen, None, timer, args.timings,
+                          dirty_rects=True)
+    else:
+        view = PygameView(model, screen, controller, timer, args.timings)
+    if args.replay is not None:
+        source = ReplaySource(args.replay,
+                              realtime=not (args.replay_fast or headless))
+    elif args.cached_landmarks:
+        source = None  # nothing to show, and no camera is needed
+    else:
+        settings = None if args.camera_defaults else CaptureSettings(
+            *args.camera_size, args.camera_fps, args.camera_format,
+            args.camera_buffer_size
+        )
+        # When exporting, every frame is used, as the game waits for them
+        source = make_source(args.camera, settings,
+                             latest_only=not (args.every_frame or headless),
+                             realtime=not headless)
+    # Recordings, landmark traces and files run out; cameras should not
+    source_ends = source is None \
+        or not isinstance(source, (CameraSource, LatestFrameSource))
+    if args.record is not None and source is not None:
+        source = RecordingSource(source, FrameRecorder(args.record))
+    controller.initialize(source=source)
 
     clock = pygame.time.Clock()
+    dt = PHYSICS_TIMESTEP
+    frames = 0
     exited = False
     while not exited:
-        for _ in pygame.event.get(locals.QUIT):
-            exited = True
+        if not headless:
+            for _ in pygame.event.get(locals.QUIT):
+                exited = True
+
+        with timer.stage('frame'):
+            try:
+                controller.move()
+            except CameraClosedException:
+                if not source_ends:
+                    raise
+                exited = True  # the recording, file or landmark trace is over
+            with timer.stage('update'):
+                if server is not None:
+                    model.move_paddle(input_model.paddle_location)
+                    server.update(dt)
+                elif client is not None:
+                    client.update(model, input_model.paddle_location)
+                    if client.round_trip_time is not None:
+                        timer.record('round_trip', client.round_trip_time)
+                else:
+                    model.update(dt)
+            if headless:
+                view.render()
+            else:
+                view.draw()
 
-        controller.move()
-        model.update()
-        view.draw()
+        # The frame has just been flipped to the screen, so this is how old
+        # the hand shown by the paddle is, before and after prediction
+        shown = time.perf_counter()
+        if controller.input_timestamp is not None:
+            timer.record('input_latency', shown - controller.input_timestamp)
+            timer.record('effective_latency',
+                         shown - controller.shown_timestamp)
+
+        frames += 1
+        if frames == 1:
+            timer.record('imports', IMPORT_TIME - START_TIME, START_TIME)
+            timer.record('startup', time.perf_counter() - START_TIME,
+                         START_TIME)
+        if frames == args.exit_after:
+            exited = True
+        if not headless:
+            dt = clock.tick(FRAME_RATE) / 1000
 
-        clock.tick(FRAME_RATE)
+    controller.close()
+    if headless:
+        view.close()
+    if server is not None:
+        server.close()
+    if client is not None:
+        client.close()
+    if landmark_cache is not None and not args.cached_landmarks:
+        landmark_cache.save()
+    if args.timing_log is not None:
+        timer.write_log(args.timing_log)
+    pygame.quit()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,232 @@
+"""
+A vectorized model that simulates many games of Pong at once
+"""
+import numpy as np
+from .constants import *
+from .model import SPEED_UP_FRACTION
+
+
+def _divide_toward_zero(numerator: np.ndarray, denominator: int) \
+        -> np.ndarray:
+    """
+    :param numerator: an array of ints, the numbers to divide
+    :param denominator: a positive int, the number to divide by
+    :return: an array of ints, the quotients rounded toward zero, like
+        divide_toward_zero in model
+    """
+    return np.sign(numerator) * (np.abs(numerator) // denominator)
+
+
+class BatchPongModel:
+    """
+    A model holding the state of many independent games of Pong
+
+    The state of every game is held in NumPy arrays (one row per game) and all
+    games are stepped together, following the same rules as PongModel.update
+    in a one-player game, in the same fixed point, so that each game steps
+    exactly like a PongModel. This model does not depend on pygame, so it can
+    be used headless
+    """
+    def __init__(self,
+                 num_games: int,
+                 ball_pos: tuple[int, int] | np.ndarray =
+                 (WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2),
+                 ball_vel: tuple[float, float] | np.ndarray =
+                 (float(BALL_INITIAL_SPEED), -float(BALL_INITIAL_SPEED)),
+                 paddle_location: int | np.ndarray = WINDOW_HEIGHT // 2,
+                 ):
+        """
+        Initialize a batch of new games of Pong
+
+        Each of the initial values can be given either once for all games, or
+        as an array with one row per game
+
+        :param num_games: an int, the number of games to simulate
+        :param ball_pos: the x/y position of the ball in each game
+        :param ball_vel: the x/y velocity of the ball in each game, in pixels
+            per second
+        :param paddle_location: the y-pixel coordinate of the center of the
+            paddle in each game
+        """
+        self._num_games = num_games
+        self._ball_pos = np.empty((num_games, 2), dtype=np.int64)
+        self._ball_pos[:] = np.rint(np.multiply(ball_pos, FIXED_POINT_ONE))
+        self._ball_vel = np.empty((num_games, 2), dtype=np.int64)
+        self._ball_vel[:] = np.rint(np.multiply(ball_vel, FIXED_POINT_ONE))
+        self._paddle_location = np.empty(num_games, dtype=np.int64)
+        self.move_paddles(paddle_location)
+        self._points = np.zeros(num_games, dtype=np.int64)
+        self._time_accumulator = 0.0
+
+    @property
+    def num_games(self) -> int:
+        """
+        :return: an int, the number of games in this batch
+        """
+        return self._num_games
+
+    @property
+    def ball_pos(self) -> np.ndarray:
+        """
+        :return: an (N, 2) array of ints, the x/y position of the ball in each
+            game, where x is pixels from the left and y is pixels from the top
+        """
+        return self._ball_pos >> FIXED_POINT_BITS
+
+    @property
+    def ball_vel(self) -> np.ndarray:
+        """
+        :return: an (N, 2) array of floats, the x/y velocity of the ball in
+            each game, in pixels per second
+        """
+        return self._ball_vel / FIXED_POINT_ONE
+
+    @property
+    def paddle_location(self) -> np.ndarray:
+        """
+        :return: an (N,) array of ints, the y-pixel coordinate of the center
+            of the paddle in each game
+        """
+        return self._paddle_location
+
+    @property
+    def points(self) -> np.ndarray:
+        """
+        :return: an (N,) array of ints, the number of points scored in each
+            game
+        """
+        return self._points
+
+    def move_paddles(self, coordinates: int | np.ndarray):
+        """
+        Move the paddle in each game to the specified coordinate
+
+        Positions out of range are moved to the edge of the board, the same
+        as PongModel.move_paddle
+
+        :param coordinates: an int or an (N,) array of ints, the y pixel
+            coordinate to set the middle of each paddle to
+        """
+        min_pos = WALL_THICKNESS + PADDLE_HEIGHT // 2
+        max_pos = WINDOW_HEIGHT - min_pos
+        np.clip(coordinates, min_pos, max_pos, out=self._paddle_location,
+                casting='unsafe')
+
+    def serve(self, games: np.ndarray, ball_vel: np.ndarray):
+        """
+        Move the ball back to the middle in some games, with a new velocity
+
+        :param games: an (N,) array of bools, the games to serve in
+        :param ball_vel: an (M, 2) array of floats, the x/y velocity in pixels
+            per second to serve at in each of the M games served in
+        """
+        self._ball_pos[games] = ((WINDOW_WIDTH // 2) * FIXED_POINT_ONE,
+                                 (WINDOW_HEIGHT // 2) * FIXED_POINT_ONE)
+        self._ball_vel[games] = np.rint(np.multiply(ball_vel,
+                                                    FIXED_POINT_ONE))
+
+    def restart(self, games: np.ndarray, ball_vel: np.ndarray):
+        """
+        Start some games over, as a new PongModel would: serve, move the
+        paddle back to the middle and clear the points
+
+        :param games: an (N,) array of bools, the games to restart
+        :param ball_vel: an (M, 2) array of floats, the x/y velocity in pixels
+            per second to serve at in each of the M games restarted
+        """
+        self.serve(games, ball_vel)
+        self._paddle_location[games] = WINDOW_HEIGHT // 2
+        self._points[games] = 0
+
+    def update(self, dt: float = PHYSICS_TIMESTEP):
+        """
+        Advance the state of every game by the given amount of time
+
+        Uses the same fixed timestep as PongModel.update
+
+        :param dt: a float, the time in seconds since the last update
+        """
+        self._time_accumulator += dt
+        steps = 0
+        while self._time_accumulator + 1e-9 >= PHYSICS_TIMESTEP:
+            if steps == MAX_PHYSICS_STEPS:
+                self._time_accumulator = 0.0
+                break
+            self._step()
+            self._time_accumulator -= PHYSICS_TIMESTEP
+            steps += 1
+
+    def _step(self):
+        """
+        Advance the state of every game by one physics step
+        """
+        pos = self._ball_pos
+        vel = self._ball_vel
+        half_ball = BALL_SIZE // 2
+
+        # Find next position, and the top left corner of the ball in whole
+        # pixels before and after
+        prev_corner = (pos >> FIXED_POINT_BITS) - half_ball
+        prev_left, prev_top = prev_corner[:, 0], prev_corner[:, 1]
+        pos += _divide_toward_zero(vel, PHYSICS_RATE)
+        corner = (pos >> FIXED_POINT_BITS) - half_ball
+        left_of_ball, top_of_ball = corner[:, 0], corner[:, 1]
+
+        # Bounce the ball off top/bottom wall
+        bottom_of_ball = top_of_ball + BALL_SIZE
+        hit_top = top_of_ball < WALL_THICKNESS
+        hit_bottom = ~hit_top \
+            & (bottom_of_ball > WINDOW_HEIGHT - WALL_THICKNESS)
+        vel[hit_top, 1] = np.abs(vel[hit_top, 1])
+        vel[hit_bottom, 1] = -np.abs(vel[hit_bottom, 1])
+
+        # Bounce the ball off the back wall
+        # One point and increase speed
+        hit_back = left_of_ball < WALL_THICKNESS
+        if hit_back.any():
+            vel[hit_back, 0] = np.abs(vel[hit_back, 0])
+            max_speed = BALL_MAX_SPEED * FIXED_POINT_ONE
+            vel[hit_back] = np.clip(
+                _divide_toward_zero(
+                    vel[hit_back] * SPEED_UP_FRACTION.numerator,
+                    SPEED_UP_FRACTION.denominator
+                ),
+                -max_speed, max_speed
+            )
+            self._points += hit_back
+
+        # Bounce the ball off the paddle, first checking if the ball went
+        # through the face of the paddle during this step
+        paddle_face = WINDOW_WIDTH - PADDLE_DIST_FROM_EDGE - PADDLE_WIDTH
+        paddle_top = self._paddle_location - PADDLE_HEIGHT // 2
+        prev_right = prev_left + BALL_SIZE
+        right_of_ball = left_of_ball + BALL_SIZE
+        crossed = (vel[:, 0] > 0) & (prev_right < paddle_face) \
+            & (paddle_face <= right_of_ball)
+        if crossed.any():
+            # Compared exactly by multiplying through by the distance moved
+            travel = right_of_ball - prev_right
+            hit_y = prev_top * travel \
+                + (paddle_face - prev_right) * (top_of_ball - prev_top)
+            swept_hit = crossed \
+                & ((paddle_top - BALL_SIZE) * travel <= hit_y) \
+                & (hit_y <= (paddle_top + PADDLE_HEIGHT) * travel)
+            fixed_right = pos[swept_hit, 0] \
+                + (BALL_SIZE - half_ball) * FIXED_POINT_ONE
+            pos[swept_hit, 0] -= \
+                2 * (fixed_right - paddle_face * FIXED_POINT_ONE)
+            left_of_ball[swept_hit] = \
+                (pos[swept_hit, 0] >> FIXED_POINT_BITS) - half_ball
+            vel[swept_hit, 0] = -np.abs(vel[swept_hit, 0])
+        # Borders are inclusive, like do_rects_intersect
+        hit_paddle = (left_of_ball <= paddle_face + PADDLE_WIDTH) \
+            & (paddle_face <= left_of_ball + BALL_SIZE) \
+            & (top_of_ball <= paddle_top + PADDLE_HEIGHT) \
+            & (paddle_top <= top_of_ball + BALL_SIZE)
+        vel[hit_paddle, 0] = -np.abs(vel[hit_paddle, 0])
+
+        # Missed - minus one point
+        missed = left_of_ball + half_ball > WINDOW_WIDTH
+        self._points -= missed
+        pos[missed] = ((WINDOW_WIDTH // 2) * FIXED_POINT_ONE,
+                       (WINDOW_HEIGHT // 2) * FIXED_POINT_ONE)
@@ -8,6 +8,15 @@ WINDOW_WIDTH, WINDOW_HEIGHT = WINDOW_SIZE
 FRAME_RATE = 60  # frames per second
 
 
+# Physics constants
+PHYSICS_RATE = FRAME_RATE  # physics steps per second
+PHYSICS_TIMESTEP = 1.0 / PHYSICS_RATE  # seconds per physics step
+FIXED_POINT_BITS = 8  # bits of each position and velocity below one pixel
+FIXED_POINT_ONE = 1 << FIXED_POINT_BITS  # fixed point steps per pixel
+REWIND_TICKS = 10 * PHYSICS_RATE  # physics steps kept for rewinding
+MAX_PHYSICS_STEPS = 8  # most steps to catch up on in one call to update
+
+
 # Court constants
 WALL_THICKNESS = 20  # pixels
 PADDLE_DIST_FROM_EDGE = 40  # pixels. distance to right edge of paddle
@@ -25,10 +34,94 @@ PADDLE_HEIGHT = 100
 PADDLE_WIDTH = 20
 KEYBOARD_PADDLE_SPEED = 200
 KEYBOARD_PADDLE_SPEED_PER_FRAME = KEYBOARD_PADDLE_SPEED // FRAME_RATE
+MAX_PLAYERS = 4  # paddles in one game; players on a side split it into lanes
+
+
+# Paddle smoothing constants
+PADDLE_SMOOTHING = True  # filter and predict the paddle position by default
+PADDLE_FILTER_MIN_CUTOFF = 1.0  # hertz, when the hand is still
+PADDLE_FILTER_BETA = 0.01  # hertz added per pixel per second of hand speed
+PADDLE_FILTER_DERIVATIVE_CUTOFF = 1.0  # hertz
+PADDLE_FILTER_RESET_AFTER = 0.5  # seconds without a hand before starting over
+PADDLE_MAX_PREDICTION = 0.1  # most seconds to extrapolate the hand forward
+PADDLE_PREDICTION_LEAD = 0.008  # seconds from move until the frame is shown
+
+
+# Profiling constants
+TIMING_WINDOW = 600  # samples of each stage kept for rolling percentiles
+TIMING_LOG_SIZE = 200_000  # most recent samples kept to export
+TIMING_OVERLAY_REFRESH = 30  # frames between refreshes of the timing overlay
+TIMING_OVERLAY_TOP_LEFT = (WALL_THICKNESS + 10, WALL_THICKNESS + 10)
+
+
+# Hand tracking constants
+HAND_TRACKING = True  # track one hand in a region of interest by default
+HAND_MODEL_COMPLEXITY = 0  # lite landmark model when tracking one hand
+HAND_MAX_HANDS = 2  # most hands found in each frame when not tracking
+HAND_MIN_DETECTION_CONFIDENCE = 0.5
+HAND_MIN_TRACKING_CONFIDENCE = 0.5
+HAND_PROCESSING_SIZE = (320, 240)  # pixels by pixels fed to hand inference
+HAND_ROI_MARGIN = 0.5  # fraction of the hand's size to pad each side with
+HAND_ROI_MIN_SIZE = 0.25  # fraction of the frame's smaller side
+HAND_LANDMARK_COLOR = (0, 0, 255)  # BGR, as landmarks are drawn on BGR frames
+HAND_CONNECTION_COLOR = (255, 255, 255)
+
+
+# Inference scheduling constants
+INFERENCE_SCHEDULING = True  # only look for hands in some frames by default
+INFERENCE_MIN_SKIP = 2  # fewest frames per hand inference
+INFERENCE_MAX_SKIP = 8  # most frames per hand inference
+INFERENCE_BUDGET_FRACTION = 0.5  # of each frame's time inference may take
+INFERENCE_TIME_SMOOTHING = 0.1  # weight of the newest inference time
+INFERENCE_MOTION_SIZE = (32, 24)  # pixels by pixels compared to find motion
+INFERENCE_MOTION_THRESHOLD = 4.0  # mean gray level change counted as motion
+INFERENCE_PROCESSES = 0  # worker processes finding hands, or 0 for none
+POOL_SHUTDOWN_TIMEOUT = 5.0  # seconds to wait for each worker process to stop
+
+
+# Camera constants
+CAMERA_SIZE = (640, 480)  # pixels by pixels asked of the camera
+CAMERA_FPS = 60  # frames per second asked of the camera
+# Pixel format asked of the camera. Over USB, compressed MJPG reaches higher
+# frame rates at a given size than raw YUYV
+CAMERA_FOURCC = 'MJPG'
+CAMERA_BUFFER_SIZE = 1  # frames the camera driver may queue up
+CAMERA_LATEST_ONLY = True  # read only the newest camera frame, dropping stale
+SYNTHETIC_SQUARE_SIZE = 1 / 6  # of the smaller side of synthetic frames
+SYNTHETIC_HAND_SIZE = 0.3  # wrist to middle fingertip, of the frame height
+SYNTHETIC_HAND_COLOR = (120, 160, 210)  # BGR
+SYNTHETIC_BACKGROUND_COLOR = (60, 90, 60)  # BGR
+SYNTHETIC_NOISE = 12  # most sensor noise added to each pixel value
+SYNTHETIC_NOISE_LAYERS = 4  # noise images made up front and taken in turn
+
+
+# Recording constants
+RECORDING_INITIAL_CAPACITY = 300  # frames to make room for when recording
+
+
+# Export constants
+EXPORT_QUEUE_SIZE = 8  # most drawn frames waiting to be saved
+EXPORT_FOURCC = 'mp4v'  # codec of exported videos
+
+
+# Training environment constants
+ENV_MAX_STEPS = 60 * PHYSICS_RATE  # steps before an episode is cut off
+
+
+# Network constants
+NETWORK_PORT = 47474  # UDP port the server listens on by default
+NETWORK_SNAPSHOT_RATE = 30  # snapshots sent to each client per second
+NETWORK_INTERPOLATION_DELAY = 0.1  # seconds clients show the game behind
+NETWORK_MAX_EXTRAPOLATION = 0.25  # most seconds to predict past a snapshot
+NETWORK_HISTORY = 64  # snapshots kept to send and decode deltas against
+NETWORK_CONNECT_TIMEOUT = 5.0  # seconds to wait for the server to answer
+NETWORK_JOIN_INTERVAL = 0.25  # seconds between asking the server to join
+NETWORK_CLIENT_TIMEOUT = 5.0  # seconds of silence before a client is dropped
 
 
 # Score constants
 SCORE_TOP_CENTER = (WINDOW_WIDTH // 2, WALL_THICKNESS + 10)
+SCORE_CACHE_SIZE = 64  # rendered scores kept around for reuse
 
 
 # Colors
@@ -38,10 +131,12 @@ WALL_COLOR = (255, 255, 255)
 SCORE_COLOR = WALL_COLOR
 BALL_COLOR = WALL_COLOR
 PADDLE_COLOR = BALL_COLOR
+TIMING_COLOR = (0, 255, 0)
 
 
 # Fonts
-import pygame.font
-pygame.font.init()
-
-SCORE_FONT = pygame.font.SysFont('monospace', 48, True)
+# The font objects themselves are made by the view, so that the model can be
+# used without pygame
+SCORE_FONT_NAME = 'monospace'
+SCORE_FONT_SIZE = 48
+TIMING_FONT_SIZE = 14
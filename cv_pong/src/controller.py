@@ -1,14 +1,21 @@
 """
-A module defining various controllers for one player in Pong
+A module defining various controllers for the players in Pong
 """
 from abc import ABC, abstractmethod
-import cv2
-import mediapipe as mp
+from contextlib import contextmanager
+from typing import Iterator
+import threading
+import time
 import numpy as np
 import pygame
 from pygame import locals
 from .constants import *
+from .filters import OneEuroFilter
 from .model import PongModel
+from .pool import HandDetectorPool, PoolResult
+from .profiling import FrameTimer
+from .recording import LandmarkTrace
+from .sources import CameraSource, FrameSource, LatestFrameSource
 
 
 class PongController(ABC):
@@ -84,59 +91,640 @@ class CameraClosedException(Exception):
 
 class CVController(PongController):
     """
-    A controller that moves by detecting
+    A controller that moves by detecting the player's hand through a webcam
+
+    By default, the camera is read and processed on a background thread, which
+    publishes the latest paddle position and camera frame. Calling move then
+    only applies the newest result, so the game loop never waits on the camera
+    or on hand tracking.
+
+    OpenCV and MediaPipe take a long time to load, so they are only imported
+    once the controller is initialized, on the background thread if there is
+    one. Until the camera and hand tracker are ready, move does nothing and
+    the camera feed is black.
+
+    With more than one player, every hand is found in one pass over the
+    frame, and each moves the paddle of the player whose part of the court it
+    is over (see assign_hands).
     """
-    def __init__(self, model: PongModel):
+    def __init__(self, model: PongModel, threaded: bool = True,
+                 timer: FrameTimer | None = None,
+                 hand_tracking: bool = HAND_TRACKING,
+                 processing_size: tuple[int, int] | None =
+                 HAND_PROCESSING_SIZE,
+                 landmark_trace: LandmarkTrace | None = None,
+                 replay_landmarks: bool = False,
+                 smoothing: bool = PADDLE_SMOOTHING,
+                 prediction_lead: float = PADDLE_PREDICTION_LEAD,
+                 scheduling: bool = INFERENCE_SCHEDULING,
+                 inference_processes: int = INFERENCE_PROCESSES):
         """
         Set up a new CVController
 
         :param model: the PongModel representing the game this controller
             operates in
+        :param threaded: a bool, whether to capture and process camera frames
+            on a background thread (True) or inside move (False)
+        :param timer: the FrameTimer to record how long each stage of
+            processing a frame takes in, or None to use a new one
+        :param hand_tracking: a bool, whether to track a single hand in a
+            region of interest around where it was last seen (see
+            HandDetector) instead of searching every whole frame. Only used
+            with one player, and with at most one inference process
+        :param processing_size: a tuple of two ints, the width and height to
+            shrink camera frames to before looking for hands, or None to use
+            the full camera resolution. This does not change the resolution of
+            the camera feed shown in the background
+        :param landmark_trace: the LandmarkTrace to save the hand found in
+            each frame to, or None to not save them. Only one player's hand
+            fits in a trace
+        :param replay_landmarks: a bool, whether to move the paddle using the
+            hands saved in landmark_trace instead of looking for hands. No
+            camera is opened, but frames from a source given to initialize
+            (such as the ReplaySource the trace was made from) are still shown.
+            With no source and a background thread, the trace plays at
+            FRAME_RATE
+        :param smoothing: a bool, whether to smooth the hand position with a
+            OneEuroFilter and move the paddle to where the hand is predicted
+            to be when the frame is shown, instead of where it was in the
+            latest camera frame
+        :param prediction_lead: a float, the seconds from calling move until
+            the frame it moves the paddle for is shown, which the hand is
+            predicted ahead by when smoothing
+        :param scheduling: a bool, whether to let an InferenceScheduler skip
+            looking for hands in frames where little has changed. Skipped
+            frames are still shown, and the paddle is moved between
+            inferences by the prediction of the paddle filter when smoothing,
+            or along the line through the last two hands found when not
+        :param inference_processes: an int, the number of worker processes
+            to look for hands in (see HandDetectorPool), or 0 to look for
+            them in this process. With workers, frames are not waited on:
+            each result is used once it comes back, and frames that come in
+            while every worker is busy are not looked at
         """
         super().__init__(model)
-        self._video_capture = None
-        self._hand_processor = None
-        self._camera_frame = np.zeros((*WINDOW_SIZE, 3), dtype=np.uint8)
+        if replay_landmarks and landmark_trace is None:
+            raise ValueError('Replaying landmarks needs a landmark trace')
+        num_players = model.num_players
+        if landmark_trace is not None and num_players > 1:
+            raise ValueError('Landmark traces hold the hand of one player')
+        self._landmark_trace = landmark_trace
+        self._replay_landmarks = replay_landmarks
+        self._frame_index = 0
+        self._trace_start = None
+        self._frame_source = None
+        # Tracking follows a single hand
+        self._hand_tracking = hand_tracking and num_players == 1
+        self._max_hands = max(HAND_MAX_HANDS, num_players)
+        self._hand_detector = None
+        self._processing_size = processing_size
+        self._processing_frame = None
+        self._scheduling = scheduling
+        self._scheduler = None
+        self._last_hands = []
+        self._inference_processes = inference_processes
+        self._detector_pool = None
+        self._newest_result = -1
+        # The camera feed is drawn into the back buffer and then swapped to
+        # the front, where it is only read while holding the result lock
+        self._preview_buffers = [
+            np.zeros((WINDOW_HEIGHT, WINDOW_WIDTH, 3), dtype=np.uint8)
+            for _ in range(2)
+        ]
+        self._front_preview = 0
+        self._threaded = threaded
+        self._worker = None
+        self._stop_event = threading.Event()
+        self._result_lock = threading.Lock()
+        self._paddle_positions = [None] * num_players
+        self._capture_timestamps = [0.0] * num_players
+        self._worker_error = None
+        self._paddle_filters = [OneEuroFilter() for _ in range(num_players)] \
+            if smoothing else None
+        # The position and capture time of the last two hands of each player,
+        # to move the paddle between them without smoothing
+        self._recent_hands = [[] for _ in range(num_players)]
+        self._prediction_lead = prediction_lead
+        self._input_timestamp = None
+        self._shown_timestamp = None
+        self._timer = timer if timer is not None else FrameTimer()
 
     @property
     def camera_frame(self) -> np.ndarray:
         """
+        This makes a copy of the camera feed, so use preview to draw it every
+        frame
+
         :return: the last image taken from the camera, with visualization of
-            the hand that is being tracked, if in frame
+            the hand that is being tracked, if in frame, as an RGB array
+            indexed by x then y
+        """
+        with self.preview() as frame:
+            return np.ascontiguousarray(frame[:, :, ::-1]).swapaxes(0, 1)
+
+    @contextmanager
+    def preview(self) -> Iterator[np.ndarray]:
+        """
+        Give access to the latest camera feed frame without copying it
+
+        The frame is a C-contiguous (WINDOW_HEIGHT, WINDOW_WIDTH, 3) array in
+        BGR order, mirrored so that it reads like a mirror to the player. The
+        same few arrays are reused for every frame, so the frame must only be
+        used inside the with block, during which new frames are not published
+
+        :return: a context manager giving the frame
+        """
+        with self._result_lock:
+            yield self._preview_buffers[self._front_preview]
+
+    @property
+    def timer(self) -> FrameTimer:
+        """
+        :return: the FrameTimer holding how long each stage of processing a
+            frame takes
+        """
+        return self._timer
+
+    @property
+    def paddle_filters(self) -> list[OneEuroFilter] | None:
+        """
+        The parameters of the filters can be changed while the game runs
+
+        :return: a list of the OneEuroFilters smoothing the hand position of
+            each player, or None if the paddles follow the hands without
+            smoothing
+        """
+        return self._paddle_filters
+
+    @property
+    def paddle_filter(self) -> OneEuroFilter | None:
+        """
+        :return: the OneEuroFilter smoothing the first player's hand position,
+            or None if the paddles follow the hands without smoothing
+        """
+        return None if self._paddle_filters is None \
+            else self._paddle_filters[0]
+
+    @property
+    def input_timestamp(self) -> float | None:
+        """
+        :return: a float, the time.perf_counter value when the camera frame
+            holding the newest hand a paddle has moved to was captured, or
+            None if no paddle has moved yet
         """
-        return self._camera_frame
+        return self._input_timestamp
 
-    def initialize(self, *cam_args, **cam_kwargs):
+    @property
+    def shown_timestamp(self) -> float | None:
+        """
+        With smoothing, or between inferences without it, this is later than
+        input_timestamp by however far the hand was predicted ahead, so the
+        time from it until a frame is shown is the latency the player notices
+
+        :return: a float, the time.perf_counter value the position of the
+            paddle moved to that hand is for, or None if no paddle has moved
+            yet
+        """
+        return self._shown_timestamp
+
+    @property
+    def scheduler(self):
+        """
+        :return: the InferenceScheduler deciding which frames to look for
+            hands in, or None if every frame is looked at (or the controller
+            is not initialized yet)
+        """
+        return self._scheduler
+
+    @property
+    def threaded(self) -> bool:
+        """
+        :return: a bool, whether frames are processed on a background thread
+        """
+        return self._threaded
+
+    def initialize(self, *cam_args, source=None, **cam_kwargs):
         """
         Initialize this CVController
 
-        Starts the video capture process and sets up mediapipe's hand tracker
+        Starts the video capture process and sets up mediapipe's hand tracker.
+        If this controller is threaded, this is done on the background thread
+        that then reads and processes camera frames, so this returns right
+        away. When replaying landmarks, neither is needed, so only the given
+        source (if any) is used
+
+        :param cam_args: the arguments to open the cv2.VideoCapture with, or
+            none to open the default camera
+        :param source: the FrameSource to read frames from instead of a
+            camera (such as a ReplaySource), or None to open a camera with
+            the default CaptureSettings, reading only its newest frames if
+            CAMERA_LATEST_ONLY (see LatestFrameSource)
+        :param cam_kwargs: the keyword arguments to open the cv2.VideoCapture
+            with
+        """
+        if self._threaded:
+            self._stop_event.clear()
+            self._worker = threading.Thread(
+                target=self._capture_loop, args=(cam_args, source, cam_kwargs),
+                name='cv-capture', daemon=True
+            )
+            self._worker.start()
+        else:
+            self._open(cam_args, source, cam_kwargs)
+
+    def _open(self, cam_args: tuple, source: FrameSource | None,
+              cam_kwargs: dict):
+        """
+        Open the camera and set up the hand tracker
+
+        :param cam_args: the arguments to open the cv2.VideoCapture with
+        :param source: the FrameSource to read frames from instead of a
+            camera, or None
+        :param cam_kwargs: the keyword arguments to open the cv2.VideoCapture
+            with
+        """
+        with self._timer.stage('open'):
+            if self._replay_landmarks:
+                self._frame_source = source
+                return
+            if source is None:
+                source = CameraSource(*cam_args, **cam_kwargs)
+                if CAMERA_LATEST_ONLY:
+                    source = LatestFrameSource(source)
+            self._frame_source = source
+            # The pool is started once the size of the frames is known
+            if not self._inference_processes:
+                from .hands import HandDetector
+                self._hand_detector = HandDetector(
+                    self._hand_tracking, self._timer, self._max_hands
+                )
+            if self._scheduling:
+                from .scheduling import InferenceScheduler
+                self._scheduler = InferenceScheduler()
+
+    def close(self):
+        """
+        Stop the background thread, if any, and release the camera
+        """
+        self._stop_event.set()
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
+        if self._frame_source is not None:
+            self._frame_source.release()
+        if self._hand_detector is not None:
+            self._hand_detector.close()
+            self._hand_detector = None
+        if self._detector_pool is not None:
+            self._detector_pool.close()
+            self._detector_pool = None
+
+    def _process_frame(self) -> tuple[list[int | None], float, bool]:
+        """
+        Read one frame from the camera and find the players' hands in it
+
+        The frame is drawn into the back preview buffer
+
+        :return: a tuple containing a list holding the y-pixel coordinate to
+            move each player's paddle to (or None where no hand was found), a
+            float, the time.perf_counter value when the frame the hands were
+            found in was captured, and a bool, whether a new frame was drawn
+            into the back preview buffer
         """
-        if len(cam_args) == 0 and len(cam_kwargs) == 0:
-            self._video_capture = cv2.VideoCapture(0)
+        timer = self._timer
+        frame = None
+        if self._frame_source is not None:
+            if not self._frame_source.is_opened():
+                raise CameraClosedException('Camera has been closed')
+            with timer.stage('capture'):
+                ret, frame = self._frame_source.read()
+            if not ret:
+                raise CameraClosedException('Could not read from camera')
+            timestamp = self._frame_source.timestamp
+        elif self._threaded:
+            timestamp = self._pace_trace()
+        else:
+            timestamp = time.perf_counter()
+        frame_index = self._frame_index
+        self._frame_index += 1
+
+        # None means no hands were looked for, as opposed to none found
+        hands = None
+        if self._replay_landmarks:
+            if frame_index >= len(self._landmark_trace):
+                raise CameraClosedException('Landmark trace is over')
+            hand = self._landmark_trace.get(frame_index)
+            hands = [] if hand is None else [hand]
+        elif self._inference_processes:
+            result = self._pool_hands(frame, frame_index, timestamp)
+            if result is not None:
+                hands, timestamp = result.hands, result.timestamp
+        elif self._scheduler is None or self._schedule(frame):
+            start = time.perf_counter()
+            hands = self._find_hands(frame)
+            if self._scheduler is not None:
+                self._scheduler.inferred(time.perf_counter() - start)
+            if self._landmark_trace is not None:
+                self._landmark_trace.put(frame_index,
+                                         hands[-1] if hands else None)
+
+        if hands is None:
+            # The last hands found are still shown
+            paddle_positions = [None] * self._model.num_players
         else:
-            self._video_capture = cv2.VideoCapture(*cam_args, **cam_kwargs)
-        self._hand_processor = mp.solutions.hands.Hands()
+            paddle_positions = assign_hands(self._model, hands)
+            self._last_hands = hands
+        if frame is None:
+            return paddle_positions, timestamp, False
+        self._draw_preview(frame, self._last_hands)
+        return paddle_positions, timestamp, True
+
+    def _pace_trace(self) -> float:
+        """
+        Wait for the next frame of a landmark trace replayed with no frames
+        to read, so that it plays at FRAME_RATE instead of all at once
+
+        Without a background thread, move is called once per game frame,
+        which already paces the trace
+
+        :return: a float, the time.perf_counter value the frame is due at
+        """
+        offset = self._frame_index / FRAME_RATE
+        if self._trace_start is None:
+            self._trace_start = time.perf_counter() - offset
+        due = self._trace_start + offset
+        delay = due - time.perf_counter()
+        if delay > 0:
+            # Woken early by close
+            self._stop_event.wait(delay)
+        return due
+
+    def _pool_hands(self, frame: np.ndarray, frame_index: int,
+                    timestamp: float) -> PoolResult | None:
+        """
+        Send a frame to the worker processes, and collect what they found
+
+        :param frame: an (H, W, 3) array, the BGR frame from the camera
+        :param frame_index: an int, the number of the frame
+        :param timestamp: a float, the time.perf_counter value when the frame
+            was captured
+        :return: the PoolResult of the newest frame hands were looked for in
+            since the last call, or None if there is no new result
+        """
+        import cv2
+        if self._detector_pool is None:
+            if self._processing_size is None:
+                shape = frame.shape
+            else:
+                shape = (*self._processing_size[::-1], 3)
+            self._detector_pool = HandDetectorPool(
+                self._inference_processes, shape, self._hand_tracking,
+                max_hands=self._max_hands
+            )
+        pool = self._detector_pool
+        if self._scheduler is None or self._schedule(frame):
+            acquired = pool.acquire()
+            if acquired is not None:
+                slot, slot_frame = acquired
+                # Frames go straight into shared memory, with no copy made
+                # along the way
+                with self._timer.stage('downscale'):
+                    if self._processing_size is None:
+                        np.copyto(slot_frame, frame)
+                    else:
+                        cv2.resize(frame, self._processing_size,
+                                   dst=slot_frame,
+                                   interpolation=cv2.INTER_AREA)
+                pool.submit(slot, frame_index, timestamp)
+
+        newest = None
+        for result in pool.results():
+            self._timer.record('inference', result.seconds)
+            if self._scheduler is not None:
+                # The workers share the cost of inference
+                self._scheduler.inferred(result.seconds / pool.processes)
+            if self._landmark_trace is not None:
+                self._landmark_trace.put(
+                    result.frame_index,
+                    result.hands[-1] if result.hands else None
+                )
+            # Results can come back out of order
+            if result.frame_index > self._newest_result:
+                self._newest_result = result.frame_index
+                newest = result
+        return newest
+
+    def _schedule(self, frame: np.ndarray) -> bool:
+        """
+        Ask the scheduler whether to look for a hand in a frame
+
+        :param frame: an (H, W, 3) array, the BGR frame from the camera
+        :return: a bool, whether to run hand inference on the frame
+        """
+        with self._timer.stage('motion'):
+            return self._scheduler.should_infer(frame)
+
+    def _find_hands(self, frame: np.ndarray) -> list[np.ndarray]:
+        """
+        Find the hands to move the paddles with in a camera frame
+
+        :param frame: an (H, W, 3) array, the BGR frame from the camera
+        :return: a list of the landmarks of each hand, normalized to the
+            frame, with the most confident hand last
+        """
+        import cv2
+        if self._processing_size is None:
+            hands = self._hand_detector.detect(frame)
+        else:
+            # Landmarks are normalized to the frame, so finding them in a
+            # smaller copy of the frame gives the same paddle position
+            with self._timer.stage('downscale'):
+                self._processing_frame = cv2.resize(
+                    frame, self._processing_size, dst=self._processing_frame,
+                    interpolation=cv2.INTER_AREA
+                )
+            hands = self._hand_detector.detect(self._processing_frame)
+        return hands
+
+    def _draw_preview(self, frame: np.ndarray, hands: list[np.ndarray]):
+        """
+        Draw a camera frame into the back preview buffer
+
+        :param frame: an (H, W, 3) array, the BGR frame from the camera
+        :param hands: a list of the landmarks of the hands to draw over the
+            frame
+        """
+        import cv2
+        from .hands import draw_hand
+        # The front buffer is only swapped on this thread, so the back buffer
+        # is free to draw into
+        preview = self._preview_buffers[1 - self._front_preview]
+        with self._timer.stage('resize'):
+            cv2.resize(frame, WINDOW_SIZE, dst=preview)
+        if hands:
+            with self._timer.stage('landmarks'):
+                for hand in hands:
+                    draw_hand(preview, hand)
+        with self._timer.stage('mirror'):
+            cv2.flip(preview, 1, dst=preview)
+
+    def _publish(self, paddle_positions: list[int | None], timestamp: float,
+                 new_preview: bool):
+        """
+        Make the result of processing a frame available to move and the view
+
+        :param paddle_positions: a list holding the y-pixel coordinate to move
+            each player's paddle to, or None where no hand was found
+        :param timestamp: a float, the time.perf_counter value when the frame
+            was captured
+        :param new_preview: a bool, whether a new frame was drawn into the
+            back preview buffer
+        """
+        with self._result_lock:
+            for player, paddle_position in enumerate(paddle_positions):
+                if paddle_position is not None:
+                    self._paddle_positions[player] = paddle_position
+                    self._capture_timestamps[player] = timestamp
+            if new_preview:
+                self._front_preview = 1 - self._front_preview
+
+    def _capture_loop(self, cam_args: tuple,
+                      source: FrameSource | None, cam_kwargs: dict):
+        """
+        Open the camera, then continuously process camera frames until close
+        is called
+
+        Runs on the background thread. If anything goes wrong, such as the
+        camera closing, the error is stored so that the next call to move
+        raises it on the game thread
+
+        :param cam_args: the arguments to open the cv2.VideoCapture with
+        :param source: the FrameSource to read frames from instead of a
+            camera, or None
+        :param cam_kwargs: the keyword arguments to open the cv2.VideoCapture
+            with
+        """
+        try:
+            self._open(cam_args, source, cam_kwargs)
+            while not self._stop_event.is_set():
+                self._publish(*self._process_frame())
+        except Exception as error:
+            with self._result_lock:
+                self._worker_error = error
 
     def move(self):
-        if not self._video_capture.isOpened():
-            raise CameraClosedException('Camera has been closed')
-        ret, frame = self._video_capture.read()
-        if not ret:
-            raise CameraClosedException('Could not read from camera')
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        hands = self._hand_processor.process(rgb_frame)
-        if hands.multi_hand_landmarks:
-            hand = hands.multi_hand_landmarks[-1]
-            landmarks = hand.landmark
-            # estimated middle of hand is between base of palm and base of
-            # middle finger
-            mid_hand = (landmarks[0].y + landmarks[9].y) / 2
-            paddle_position = int(mid_hand * WINDOW_HEIGHT)
-            self._model.move_paddle(paddle_position)
-            mp.solutions.drawing_utils.draw_landmarks(
-                rgb_frame, hand, mp.solutions.hands.HAND_CONNECTIONS
+        if not self._threaded:
+            self._publish(*self._process_frame())
+        with self._result_lock:
+            error = self._worker_error
+            paddle_positions = self._paddle_positions.copy()
+            timestamps = self._capture_timestamps.copy()
+            self._paddle_positions = [None] * len(paddle_positions)
+        if error is not None:
+            raise error
+        shown_timestamp = time.perf_counter() + self._prediction_lead
+        for player, paddle_position in enumerate(paddle_positions):
+            self._move_paddle(player, paddle_position, timestamps[player],
+                              shown_timestamp)
+
+    def _move_paddle(self, player: int, paddle_position: int | None,
+                     timestamp: float, shown_timestamp: float):
+        """
+        Move one player's paddle toward their hand
+
+        :param player: an int, the index of the player
+        :param paddle_position: the y-pixel coordinate of the player's hand in
+            the newest frame, or None if there is no new hand
+        :param timestamp: a float, the time.perf_counter value when the frame
+            holding the hand was captured
+        :param shown_timestamp: a float, the time.perf_counter value the frame
+            being drawn will be shown at
+        """
+        if paddle_position is not None:
+            self._input_timestamp = timestamp
+        if self._paddle_filters is None:
+            if paddle_position is not None:
+                self._shown_timestamp = timestamp
+                self._model.move_paddle(paddle_position, player)
+                recent = self._recent_hands[player]
+                recent.append((paddle_position, timestamp))
+                del recent[:-2]
+            else:
+                self._extrapolate_paddle(
+                    player, shown_timestamp - self._prediction_lead
+                )
+            return
+
+        # Even without a new hand, the prediction moves on with time
+        paddle_filter = self._paddle_filters[player]
+        if paddle_position is not None:
+            paddle_filter.update(paddle_position, timestamp)
+        predicted = paddle_filter.predict(shown_timestamp)
+        if predicted is not None:
+            self._shown_timestamp = min(
+                shown_timestamp,
+                paddle_filter.timestamp + paddle_filter.max_prediction
             )
-        # How numpy defines up/down is different from Pygame :/
-        self._camera_frame = np.flipud(cv2.resize(rgb_frame, WINDOW_SIZE)
-                                       .swapaxes(0, 1))
+            self._model.move_paddle(int(predicted), player)
+
+    def _extrapolate_paddle(self, player: int, timestamp: float):
+        """
+        Move a player's paddle, without smoothing, to where the hand is
+        heading from the last two hands found, so that it keeps moving
+        between inferences as it does with smoothing
+
+        The paddle goes no further than the time between those two hands,
+        nor PADDLE_MAX_PREDICTION, past the last one, and stays put if they
+        are more than PADDLE_FILTER_RESET_AFTER apart
+
+        :param player: an int, the index of the player
+        :param timestamp: a float, the time.perf_counter value to move the
+            paddle for
+        """
+        recent = self._recent_hands[player]
+        if len(recent) < 2:
+            return
+        (first, first_time), (last, last_time) = recent
+        interval = last_time - first_time
+        if not 0 < interval <= PADDLE_FILTER_RESET_AFTER:
+            return
+        ahead = min(timestamp - last_time, interval, PADDLE_MAX_PREDICTION)
+        if ahead <= 0:
+            return
+        self._shown_timestamp = last_time + ahead
+        self._model.move_paddle(
+            int(last + (last - first) * ahead / interval), player
+        )
+
+
+def assign_hands(model: PongModel, hands: list[np.ndarray]) \
+        -> list[int | None]:
+    """
+    Find where each player's hand puts their paddle
+
+    With one player, the most confident hand moves the paddle. With more,
+    each hand belongs to the player whose part of the court (see
+    PongModel.player_at) it is over in the mirrored camera feed, and if a
+    player has more than one hand, the most confident is used
+
+    :param model: the PongModel of the game
+    :param hands: a list of the landmarks of each hand found in a frame,
+        normalized to the frame, with the most confident hand last
+    :return: a list holding the y-pixel coordinate to move each player's
+        paddle to, or None for players with no hand
+    """
+    paddle_positions = [None] * model.num_players
+    for hand in hands:
+        # estimated middle of hand is between base of palm and base of
+        # middle finger
+        mid_hand = (hand[0] + hand[9]) / 2
+        paddle_position = int(mid_hand[1] * WINDOW_HEIGHT)
+        if model.num_players == 1:
+            player = 0
+        else:
+            # The camera feed is shown mirrored
+            player = model.player_at((1 - mid_hand[0]) * WINDOW_WIDTH,
+                                     mid_hand[1] * WINDOW_HEIGHT)
+        if player is not None:
+            paddle_positions[player] = paddle_position
+    return paddle_positions
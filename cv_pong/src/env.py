@@ -0,0 +1,269 @@
+"""
+A module for training agents to play Pong, with environments that step like
+Gymnasium environments (reset, then step with an action) without needing
+Gymnasium itself
+
+The agent plays the paddle of a one-player game. Each action is the y-pixel
+coordinate to move the paddle to, like the hand does. Each observation is an
+array of five float32s: the ball's x and y position, its x and y velocity in
+pixels per second, and the paddle's location. The reward is the change in
+points, so +1 for bouncing the ball off the back wall and -1 for missing it,
+and an episode ends when the ball is missed
+"""
+from typing import Any
+import numpy as np
+from .batch_model import BatchPongModel
+from .constants import *
+from .model import PongModel
+
+OBSERVATION_SIZE = 5
+
+
+def serve_velocities(rng: np.random.Generator, count: int) -> np.ndarray:
+    """
+    Pick the velocity of the ball at the start of each episode
+
+    :param rng: the numpy Generator to pick with
+    :param count: an int, the number of velocities to pick
+    :return: a (count, 2) array of floats, x/y velocities in pixels per
+        second, BALL_INITIAL_SPEED in a random diagonal direction
+    """
+    return rng.choice((-1.0, 1.0), (count, 2)) * BALL_INITIAL_SPEED
+
+
+class PongEnv:
+    """
+    A single game of Pong for an agent to play
+
+    With pixels, each observation is instead the game as drawn by PygameView,
+    off screen, as an (H, W, 3) array of RGB uint8. Drawing needs pygame and
+    is much slower than stepping, so only use it for agents that need it
+    """
+    def __init__(self, pixels: bool = False,
+                 pixel_size: tuple[int, int] = WINDOW_SIZE,
+                 max_steps: int = ENV_MAX_STEPS, frame_skip: int = 1,
+                 seed: int | None = None):
+        """
+        Set up a new PongEnv. Call reset before stepping it
+
+        :param pixels: a bool, whether observations are drawn frames rather
+            than the state of the game
+        :param pixel_size: a tuple of two ints, the width and height to scale
+            drawn frames to
+        :param max_steps: an int, the most steps in an episode before it is
+            cut off
+        :param frame_skip: an int, the physics steps to repeat each action for
+        :param seed: an int, the seed for the serve directions, or None for
+            an unpredictable seed
+        """
+        self._pixels = pixels
+        self._pixel_size = tuple(pixel_size)
+        self._max_steps = max_steps
+        self._frame_skip = frame_skip
+        self._rng = np.random.default_rng(seed)
+        self._model = None
+        self._steps = 0
+        self._surface = None
+        self._scaled_surface = None
+        self._view = None
+
+    @property
+    def model(self) -> PongModel | None:
+        """
+        :return: the PongModel of the current episode, or None before reset
+        """
+        return self._model
+
+    def reset(self, seed: int | None = None) -> tuple[np.ndarray,
+                                                      dict[str, Any]]:
+        """
+        Start a new episode, serving the ball from the middle
+
+        :param seed: an int, a new seed for the serve directions, or None to
+            carry on with the current one
+        :return: a tuple containing the first observation, and a dict of
+            extra information (the points and tick of the game)
+        """
+        if seed is not None:
+            self._rng = np.random.default_rng(seed)
+        velocity = serve_velocities(self._rng, 1)[0]
+        self._model = PongModel(ball_vel=(velocity[0], velocity[1]))
+        self._view = None  # drawn the new model
+        self._steps = 0
+        return self._observe(), self._info()
+
+    def step(self, action: float) -> tuple[np.ndarray, float, bool, bool,
+                                           dict[str, Any]]:
+        """
+        Move the paddle and play on
+
+        :param action: a number, the y-pixel coordinate to move the paddle to
+        :return: a tuple containing the observation, the reward, whether the
+            episode ended by the ball being missed, whether it was cut off at
+            max_steps, and a dict of extra information
+        """
+        model = self._model
+        points = model.points
+        model.move_paddle(int(action))
+        for _ in range(self._frame_skip):
+            model.update()
+        self._steps += 1
+        reward = model.points - points
+        return (self._observe(), float(reward), reward < 0,
+                self._steps >= self._max_steps, self._info())
+
+    def render(self) -> np.ndarray:
+        """
+        Draw the game off screen
+
+        :return: an (H, W, 3) array of uint8, the RGB frame at pixel_size
+        """
+        import pygame
+        from .view import PygameView
+        if self._surface is None:
+            self._surface = pygame.Surface(WINDOW_SIZE)
+            if self._pixel_size != WINDOW_SIZE:
+                self._scaled_surface = pygame.Surface(self._pixel_size)
+        if self._view is None:
+            self._view = PygameView(self._model, self._surface,
+                                    offscreen=True)
+        self._view.draw()
+        surface = self._surface
+        if self._scaled_surface is not None:
+            pygame.transform.smoothscale(surface, self._pixel_size,
+                                         self._scaled_surface)
+            surface = self._scaled_surface
+        width, height = self._pixel_size
+        return np.frombuffer(pygame.image.tobytes(surface, 'RGB'),
+                             dtype=np.uint8).reshape(height, width, 3)
+
+    def close(self):
+        """
+        Let go of the off-screen drawing surfaces
+        """
+        self._surface = None
+        self._scaled_surface = None
+        self._view = None
+
+    def _observe(self) -> np.ndarray:
+        """
+        :return: the observation of the current state
+        """
+        if self._pixels:
+            return self.render()
+        model = self._model
+        return np.array((*model.ball_pos, *model.ball_vel,
+                         model.paddle_location), dtype=np.float32)
+
+    def _info(self) -> dict[str, Any]:
+        """
+        :return: a dict of extra information about the game
+        """
+        return {'points': self._model.points, 'tick': self._model.tick}
+
+
+class BatchPongEnv:
+    """
+    Many games of Pong for agents to play, stepped together in one call
+
+    Every game is held in one BatchPongModel, so stepping costs no Python
+    loop over the games. A game whose episode ends is started again right
+    away, so the observation and points returned for it are the first of its
+    next episode
+    """
+    def __init__(self, num_envs: int, max_steps: int = ENV_MAX_STEPS,
+                 frame_skip: int = 1, seed: int | None = None):
+        """
+        Set up a new BatchPongEnv. Call reset before stepping it
+
+        :param num_envs: an int, the number of games
+        :param max_steps: an int, the most steps in an episode before it is
+            cut off
+        :param frame_skip: an int, the physics steps to repeat each action for
+        :param seed: an int, the seed for the serve directions, or None for
+            an unpredictable seed
+        """
+        self._num_envs = num_envs
+        self._max_steps = max_steps
+        self._frame_skip = frame_skip
+        self._rng = np.random.default_rng(seed)
+        self._model = BatchPongModel(num_envs)
+        self._steps = np.zeros(num_envs, dtype=np.int64)
+        self._observations = np.empty((num_envs, OBSERVATION_SIZE),
+                                      dtype=np.float32)
+
+    @property
+    def num_envs(self) -> int:
+        """
+        :return: an int, the number of games
+        """
+        return self._num_envs
+
+    @property
+    def model(self) -> BatchPongModel:
+        """
+        :return: the BatchPongModel holding every game
+        """
+        return self._model
+
+    def reset(self, seed: int | None = None) -> tuple[np.ndarray,
+                                                      dict[str, Any]]:
+        """
+        Start a new episode in every game
+
+        :param seed: an int, a new seed for the serve directions, or None to
+            carry on with the current one
+        :return: a tuple containing the (N, 5) array of first observations,
+            and a dict of extra information (the points in each game)
+        """
+        if seed is not None:
+            self._rng = np.random.default_rng(seed)
+        everything = np.ones(self._num_envs, dtype=bool)
+        self._model.restart(everything,
+                            serve_velocities(self._rng, self._num_envs))
+        self._steps[:] = 0
+        return self._observe(), {'points': self._model.points}
+
+    def step(self, actions: np.ndarray) \
+            -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray,
+                     dict[str, Any]]:
+        """
+        Move every paddle and play on
+
+        :param actions: an (N,) array of numbers, the y-pixel coordinate to
+            move each paddle to
+        :return: a tuple containing the (N, 5) array of observations, and
+            (N,) arrays of the float32 rewards, whether each episode ended by
+            the ball being missed, and whether each was cut off at
+            max_steps, and a dict of extra information: the points of each
+            game's current episode, and the points each episode that just
+            finished ended with (0 for games that did not finish)
+        """
+        model = self._model
+        points = model.points.copy()
+        model.move_paddles(actions)
+        for _ in range(self._frame_skip):
+            model.update()
+        self._steps += 1
+        rewards = (model.points - points).astype(np.float32)
+        terminated = rewards < 0
+        truncated = self._steps >= self._max_steps
+        finished = terminated | truncated
+        final_points = np.where(finished, model.points, 0)
+        if finished.any():
+            model.restart(finished,
+                          serve_velocities(self._rng, int(finished.sum())))
+            self._steps[finished] = 0
+        return (self._observe(), rewards, terminated, truncated,
+                {'points': model.points, 'final_points': final_points})
+
+    def _observe(self) -> np.ndarray:
+        """
+        :return: the (N, 5) array of observations of the current states,
+            which is reused by the next step
+        """
+        observations = self._observations
+        observations[:, 0:2] = self._model.ball_pos
+        observations[:, 2:4] = self._model.ball_vel
+        observations[:, 4] = self._model.paddle_location
+        return observations
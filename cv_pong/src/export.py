@@ -0,0 +1,260 @@
+"""
+A module for drawing games off screen and saving the frames, as a video or
+as a recording (see recording), much faster than the game plays
+"""
+import queue
+import sys
+import threading
+from typing import Protocol
+import numpy as np
+import pygame
+from .constants import *
+from .controller import CVController
+from .model import PongModel
+from .profiling import FrameTimer
+from .view import PygameView
+
+# Pixels laid out as 24-bit ints with red in the high byte are stored, little
+# endian, as the bytes B, G, R, so each row of the surface is already a row of
+# a BGR frame and copies out without reordering
+_BGR_MASKS = (0xFF0000, 0x00FF00, 0x0000FF, 0)
+if sys.byteorder == 'big':
+    _BGR_MASKS = (0x0000FF, 0x00FF00, 0xFF0000, 0)
+
+
+def _bgr_surface(size: tuple[int, int]) -> pygame.Surface:
+    """
+    :param size: a tuple of two ints, the width and height of the surface
+    :return: a new 24-bit Surface whose bytes are in B, G, R order
+    """
+    return pygame.Surface(size, 0, 24, _BGR_MASKS)
+
+
+def _copy_bgr(surface: pygame.Surface, frame: np.ndarray):
+    """
+    Copy a surface from _bgr_surface into a frame
+
+    :param surface: the Surface to copy, from _bgr_surface
+    :param frame: an (H, W, 3) array of uint8 to write the BGR pixels into
+    """
+    width, height = surface.get_size()
+    # Rows may be padded past the last pixel
+    pixels = np.frombuffer(surface.get_buffer(), dtype=np.uint8)
+    pixels = pixels.reshape(height, surface.get_pitch())[:, :width * 3]
+    np.copyto(frame.reshape(height, width * 3), pixels)
+
+
+class FrameSink(Protocol):
+    """
+    Somewhere to save frames, such as a FrameRecorder or a VideoSink
+    """
+    def write(self, frame: np.ndarray, timestamp: float):
+        """
+        :param frame: an (H, W, 3) array of uint8, the BGR frame to save
+        :param timestamp: a float, the time of the frame in seconds
+        """
+
+    def close(self):
+        """
+        Finish saving
+        """
+
+
+class VideoSink:
+    """
+    Encodes frames into a video file with OpenCV
+    """
+    def __init__(self, path: str, frame_size: tuple[int, int] = WINDOW_SIZE,
+                 fps: float = FRAME_RATE, fourcc: str = EXPORT_FOURCC):
+        """
+        Start a new video
+
+        :param path: a str, the file to write the video to
+        :param frame_size: a tuple of two ints, the width and height of each
+            frame
+        :param fps: a float, the frame rate the video plays at
+        :param fourcc: a str, the four letter code of the codec to use
+        """
+        import cv2
+        self._writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*fourcc),
+                                       fps, frame_size)
+        if not self._writer.isOpened():
+            raise IOError(f'Could not open {path} to write {fourcc} video')
+
+    def write(self, frame: np.ndarray, timestamp: float):
+        self._writer.write(frame)
+
+    def close(self):
+        self._writer.release()
+
+
+class FrameWriter:
+    """
+    Passes frames to a FrameSink on a thread of its own
+
+    Frames are copied into buffers made up front, which go round between the
+    thread drawing frames and the writer thread. At most queue_size frames
+    wait to be written; once that many are waiting, acquire blocks until the
+    writer catches up, so a slow encoder slows drawing down instead of using
+    up memory
+    """
+    def __init__(self, sink: FrameSink, frame_shape: tuple[int, ...],
+                 queue_size: int = EXPORT_QUEUE_SIZE):
+        """
+        Start a new FrameWriter
+
+        :param sink: the FrameSink to write frames to. It is closed when this
+            writer is closed
+        :param frame_shape: a tuple of ints, the (H, W, 3) shape of each frame
+        :param queue_size: an int, the most frames waiting to be written
+        """
+        self._sink = sink
+        self._free = queue.Queue()
+        # One more buffer than can wait, for the frame being drawn
+        for _ in range(queue_size + 1):
+            self._free.put(np.empty(frame_shape, dtype=np.uint8))
+        self._pending = queue.Queue(maxsize=queue_size)
+        self._error = None
+        self._written = 0
+        self._thread = threading.Thread(target=self._run,
+                                        name='cv-frame-writer', daemon=True)
+        self._thread.start()
+
+    @property
+    def written(self) -> int:
+        """
+        :return: an int, the number of frames written to the sink so far
+        """
+        return self._written
+
+    def _run(self):
+        """
+        Write frames until told to stop
+
+        If the sink fails, the error is kept to be raised in the drawing
+        thread, and later frames are dropped so that it is never left waiting
+        """
+        for item in iter(self._pending.get, None):
+            frame, timestamp = item
+            if self._error is None:
+                try:
+                    self._sink.write(frame, timestamp)
+                    self._written += 1
+                except Exception as error:
+                    self._error = error
+            self._free.put(frame)
+
+    def _raise_error(self):
+        """
+        Raise the error the writer thread hit, if any
+        """
+        if self._error is not None:
+            raise self._error
+
+    def acquire(self) -> np.ndarray:
+        """
+        Take a buffer to draw the next frame into, then pass it to submit
+
+        :return: an (H, W, 3) array of uint8 to write the frame into
+        """
+        self._raise_error()
+        return self._free.get()
+
+    def submit(self, frame: np.ndarray, timestamp: float):
+        """
+        Queue a frame drawn into a buffer from acquire to be written
+
+        :param frame: the buffer from acquire
+        :param timestamp: a float, the time of the frame in seconds
+        """
+        self._pending.put((frame, timestamp))
+
+    def close(self):
+        """
+        Write every queued frame, then close the sink
+
+        :raises Exception: the error the sink raised, if it failed
+        """
+        self._pending.put(None)
+        self._thread.join()
+        self._sink.close()
+        self._raise_error()
+
+
+class HeadlessRenderer:
+    """
+    Draws a game into an off-screen Surface and saves every frame
+
+    No window is opened, so this works without a display, and nothing waits
+    for the frame rate, so a game can be saved as fast as it can be drawn
+    """
+    def __init__(self, model: PongModel, sink: FrameSink,
+                 controller: CVController | None = None,
+                 frame_size: tuple[int, int] = WINDOW_SIZE,
+                 queue_size: int = EXPORT_QUEUE_SIZE,
+                 timer: FrameTimer | None = None,
+                 show_timings: bool = False):
+        """
+        Set up a new HeadlessRenderer
+
+        :param model: the PongModel of the game to draw
+        :param sink: the FrameSink to save frames to, which is given BGR
+            frames of frame_size. It is closed when this renderer is closed
+        :param controller: the CVController whose camera feed to draw behind
+            the game, or None to draw the plain court
+        :param frame_size: a tuple of two ints, the width and height to scale
+            frames to
+        :param queue_size: an int, the most frames waiting to be saved
+        :param timer: the FrameTimer to record drawing in, or None
+        :param show_timings: a bool, whether to draw the timing overlay
+        """
+        self._surface = _bgr_surface(WINDOW_SIZE)
+        self._view = PygameView(model, self._surface, controller, timer,
+                                show_timings, offscreen=True)
+        self._frame_size = tuple(frame_size)
+        self._scaled_surface = None
+        if self._frame_size != WINDOW_SIZE:
+            self._scaled_surface = _bgr_surface(self._frame_size)
+        width, height = self._frame_size
+        self._writer = FrameWriter(sink, (height, width, 3), queue_size)
+        self._frames = 0
+
+    @property
+    def frames(self) -> int:
+        """
+        :return: an int, the number of frames drawn so far
+        """
+        return self._frames
+
+    @property
+    def written(self) -> int:
+        """
+        :return: an int, the number of frames saved so far
+        """
+        return self._writer.written
+
+    def render(self, timestamp: float | None = None):
+        """
+        Draw the game as it is now, and queue the frame to be saved
+
+        :param timestamp: a float, the time of the frame in seconds, or None
+            to count frames at FRAME_RATE
+        """
+        if timestamp is None:
+            timestamp = self._frames / FRAME_RATE
+        self._view.draw()
+        surface = self._surface
+        if self._scaled_surface is not None:
+            pygame.transform.smoothscale(surface, self._frame_size,
+                                         self._scaled_surface)
+            surface = self._scaled_surface
+        frame = self._writer.acquire()
+        _copy_bgr(surface, frame)
+        self._writer.submit(frame, timestamp)
+        self._frames += 1
+
+    def close(self):
+        """
+        Save every queued frame, then close the sink
+        """
+        self._writer.close()
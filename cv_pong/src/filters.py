@@ -0,0 +1,132 @@
+"""
+A module for smoothing and predicting the paddle position found from a hand
+"""
+import math
+from .constants import *
+
+
+class OneEuroFilter:
+    """
+    Smooths a noisy signal, and predicts where it will be a little later
+
+    This is the 1€ filter (Casiez et al., 2012): a low-pass filter whose
+    cutoff frequency rises with the speed of the signal. A still hand is
+    smoothed heavily, removing jitter, while a fast hand is barely smoothed,
+    keeping lag low. The filtered speed is also used to extrapolate the
+    signal forward to when it is shown, hiding the latency of the camera and
+    hand tracking.
+
+    Values can be in any unit; the parameters below assume pixels and seconds
+    """
+    def __init__(self, min_cutoff: float = PADDLE_FILTER_MIN_CUTOFF,
+                 beta: float = PADDLE_FILTER_BETA,
+                 derivative_cutoff: float = PADDLE_FILTER_DERIVATIVE_CUTOFF,
+                 max_prediction: float = PADDLE_MAX_PREDICTION,
+                 reset_after: float = PADDLE_FILTER_RESET_AFTER):
+        """
+        Set up a new OneEuroFilter
+
+        :param min_cutoff: a float, the cutoff frequency in hertz when the
+            signal is still. Lower removes more jitter but adds more lag
+        :param beta: a float, how much the cutoff frequency rises for each
+            unit per second of speed. Higher removes more lag when moving
+        :param derivative_cutoff: a float, the cutoff frequency in hertz of
+            the filter smoothing the speed
+        :param max_prediction: a float, the most seconds past the latest
+            value to extrapolate to
+        :param reset_after: a float, the seconds without a value after which
+            the next value starts the filter over instead of being smoothed
+            toward the old ones
+        """
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.derivative_cutoff = derivative_cutoff
+        self.max_prediction = max_prediction
+        self.reset_after = reset_after
+        self.reset()
+
+    @property
+    def value(self) -> float | None:
+        """
+        :return: a float, the filtered value at the time of the latest value,
+            or None if no value has been given since the last reset
+        """
+        return self._value
+
+    @property
+    def speed(self) -> float:
+        """
+        :return: a float, the filtered speed of the signal in units per second
+        """
+        return self._speed
+
+    @property
+    def timestamp(self) -> float | None:
+        """
+        :return: a float, the time in seconds of the latest value, or None if
+            no value has been given since the last reset
+        """
+        return self._timestamp
+
+    def reset(self):
+        """
+        Forget every value given so far
+        """
+        self._value = None
+        self._speed = 0.0
+        self._timestamp = None
+
+    @staticmethod
+    def _smoothing_factor(cutoff: float, elapsed: float) -> float:
+        """
+        Find how much of a new value an exponential low-pass filter keeps
+
+        :param cutoff: a float, the cutoff frequency of the filter in hertz
+        :param elapsed: a float, the seconds since the previous value
+        :return: a float between 0 and 1, the weight of the new value
+        """
+        time_constant = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + time_constant / elapsed)
+
+    def update(self, value: float, timestamp: float) -> float:
+        """
+        Filter a new value of the signal
+
+        :param value: a float, the new (noisy) value
+        :param timestamp: a float, the time in seconds the value was measured
+            at, such as when its camera frame was captured
+        :return: a float, the filtered value
+        """
+        if self._timestamp is None \
+                or timestamp - self._timestamp > self.reset_after:
+            self.reset()
+            self._value = float(value)
+            self._timestamp = timestamp
+            return self._value
+        elapsed = timestamp - self._timestamp
+        if elapsed <= 0:
+            # Values with the same timestamp carry no speed information
+            return self._value
+
+        speed = (value - self._value) / elapsed
+        alpha = self._smoothing_factor(self.derivative_cutoff, elapsed)
+        self._speed += alpha * (speed - self._speed)
+        cutoff = self.min_cutoff + self.beta * abs(self._speed)
+        alpha = self._smoothing_factor(cutoff, elapsed)
+        self._value += alpha * (value - self._value)
+        self._timestamp = timestamp
+        return self._value
+
+    def predict(self, timestamp: float) -> float | None:
+        """
+        Extrapolate the filtered signal to a later time
+
+        :param timestamp: a float, the time in seconds to predict the value
+            at, such as when the next frame will be shown
+        :return: a float, the predicted value, or None if no value has been
+            given since the last reset
+        """
+        if self._value is None:
+            return None
+        ahead = min(max(timestamp - self._timestamp, 0.0), self.max_prediction)
+        return self._value + self._speed * ahead
@@ -0,0 +1,232 @@
+"""
+A module for finding hands in camera frames with MediaPipe
+"""
+import cv2
+import mediapipe as mp
+import numpy as np
+from .constants import *
+from .profiling import FrameTimer
+
+# Landmarks of one hand are an array of shape (21, 3) holding the x, y and z
+# coordinate of each landmark. x and y are normalized to [0, 1] across the
+# whole frame, even if the hand was found in a region of interest
+Landmarks = np.ndarray
+
+# A region of interest is the (left, top, width, height) in pixels
+Region = tuple[int, int, int, int]
+
+HAND_CONNECTIONS = tuple(mp.solutions.hands.HAND_CONNECTIONS)
+
+
+def hand_bounds(landmarks: Landmarks, frame_size: tuple[int, int]) \
+        -> tuple[int, int, int, int]:
+    """
+    Find the bounding box of a hand in pixels
+
+    :param landmarks: the landmarks of the hand
+    :param frame_size: a tuple of two ints, the width and height of the frame
+    :return: a tuple of four ints, the left, top, right and bottom of the
+        smallest box containing every landmark
+    """
+    width, height = frame_size
+    xs = landmarks[:, 0] * width
+    ys = landmarks[:, 1] * height
+    return (int(xs.min()), int(ys.min()),
+            int(np.ceil(xs.max())), int(np.ceil(ys.max())))
+
+
+def region_around(bounds: tuple[int, int, int, int],
+                  frame_size: tuple[int, int]) -> Region:
+    """
+    Find the square region of interest to look for a hand in next frame
+
+    The region is centered on the hand, padded by HAND_ROI_MARGIN of the
+    hand's size on each side, at least HAND_ROI_MIN_SIZE of the frame, and
+    moved to lie within the frame
+
+    :param bounds: a tuple of four ints, the left, top, right and bottom of
+        the hand in pixels
+    :param frame_size: a tuple of two ints, the width and height of the frame
+    :return: the region of interest
+    """
+    width, height = frame_size
+    left, top, right, bottom = bounds
+    hand_size = max(right - left, bottom - top)
+    size = int(hand_size * (1 + 2 * HAND_ROI_MARGIN))
+    size = max(size, int(HAND_ROI_MIN_SIZE * min(width, height)))
+    size = min(size, width, height)
+    region_left = (left + right) // 2 - size // 2
+    region_top = (top + bottom) // 2 - size // 2
+    region_left = min(max(region_left, 0), width - size)
+    region_top = min(max(region_top, 0), height - size)
+    return region_left, region_top, size, size
+
+
+def region_fits(region: Region, bounds: tuple[int, int, int, int],
+                frame_size: tuple[int, int]) -> bool:
+    """
+    Determine whether a region of interest still suits a hand
+
+    A region suits a hand if the hand is at least half of HAND_ROI_MARGIN of
+    its size away from the edges of the region (or the region reaches the
+    edge of the frame), and the region is not more than twice the size it
+    would be if it were made around the hand
+
+    :param region: the current region of interest
+    :param bounds: a tuple of four ints, the left, top, right and bottom of
+        the hand in pixels
+    :param frame_size: a tuple of two ints, the width and height of the frame
+    :return: True if the region can be kept, False if it should be moved
+    """
+    width, height = frame_size
+    left, top, right, bottom = bounds
+    region_left, region_top, region_width, region_height = region
+    slack = int(max(right - left, bottom - top) * HAND_ROI_MARGIN / 2)
+    fits_x = (region_left == 0 or left - region_left >= slack) \
+        and (region_left + region_width == width
+             or region_left + region_width - right >= slack)
+    fits_y = (region_top == 0 or top - region_top >= slack) \
+        and (region_top + region_height == height
+             or region_top + region_height - bottom >= slack)
+    ideal = region_around(bounds, frame_size)
+    return fits_x and fits_y and region_width <= 2 * ideal[2]
+
+
+def draw_hand(image: np.ndarray, landmarks: Landmarks):
+    """
+    Draw the landmarks of a hand and the connections between them
+
+    :param image: an (H, W, 3) array, the image to draw on, in place
+    :param landmarks: the landmarks of the hand, normalized to the image
+    """
+    height, width = image.shape[:2]
+    points = np.empty((len(landmarks), 2), dtype=np.int32)
+    points[:, 0] = landmarks[:, 0] * width
+    points[:, 1] = landmarks[:, 1] * height
+    for start, end in HAND_CONNECTIONS:
+        cv2.line(image, tuple(points[start]), tuple(points[end]),
+                 HAND_CONNECTION_COLOR, 2)
+    for point in points:
+        cv2.circle(image, tuple(point), 3, HAND_LANDMARK_COLOR, -1)
+
+
+class HandDetector:
+    """
+    Finds hands in camera frames
+
+    In tracking mode, MediaPipe is set up to follow a single hand with the
+    lite landmark model, and only a region of interest around where the hand
+    was last seen is converted and searched. If the hand is lost, the whole
+    frame is searched again. Otherwise, every frame is searched in full with
+    MediaPipe's default settings
+    """
+    def __init__(self, tracking: bool = HAND_TRACKING,
+                 timer: FrameTimer | None = None,
+                 max_hands: int = HAND_MAX_HANDS):
+        """
+        Set up a new HandDetector
+
+        :param tracking: a bool, whether to track a single hand in a region of
+            interest (True) or search every whole frame for any hand (False)
+        :param timer: the FrameTimer to record how long converting frames and
+            inference take in, or None to use a new one
+        :param max_hands: an int, the most hands to find in each frame when
+            not tracking
+        """
+        self._tracking = tracking
+        self._timer = timer if timer is not None else FrameTimer()
+        if tracking:
+            self._hands = mp.solutions.hands.Hands(
+                max_num_hands=1,
+                model_complexity=HAND_MODEL_COMPLEXITY,
+                min_detection_confidence=HAND_MIN_DETECTION_CONFIDENCE,
+                min_tracking_confidence=HAND_MIN_TRACKING_CONFIDENCE
+            )
+        else:
+            self._hands = mp.solutions.hands.Hands(max_num_hands=max_hands)
+        self._region: Region | None = None
+
+    @property
+    def tracking(self) -> bool:
+        """
+        :return: a bool, whether this detector tracks a single hand in a
+            region of interest
+        """
+        return self._tracking
+
+    @property
+    def region(self) -> Region | None:
+        """
+        :return: the region of interest the next frame will be searched in,
+            or None if the whole frame will be searched
+        """
+        return self._region
+
+    def close(self):
+        """
+        Release the resources used by MediaPipe
+        """
+        self._hands.close()
+
+    def _search(self, bgr_frame: np.ndarray, region: Region | None) \
+            -> list[Landmarks]:
+        """
+        Search part of a frame for hands
+
+        :param bgr_frame: an (H, W, 3) array, the frame from the camera
+        :param region: the region of the frame to search, or None to search
+            the whole frame
+        :return: a list of the landmarks of each hand found
+        """
+        height, width = bgr_frame.shape[:2]
+        if region is None:
+            region = 0, 0, width, height
+        left, top, region_width, region_height = region
+        with self._timer.stage('convert'):
+            rgb = cv2.cvtColor(bgr_frame[top:top + region_height,
+                                         left:left + region_width],
+                               cv2.COLOR_BGR2RGB)
+        with self._timer.stage('inference'):
+            results = self._hands.process(rgb)
+        if not results.multi_hand_landmarks:
+            return []
+        hands = []
+        for hand in results.multi_hand_landmarks:
+            landmarks = np.array([(point.x, point.y, point.z)
+                                  for point in hand.landmark],
+                                 dtype=np.float32)
+            landmarks[:, 0] = (left + landmarks[:, 0] * region_width) / width
+            landmarks[:, 1] = (top + landmarks[:, 1] * region_height) / height
+            hands.append(landmarks)
+        return hands
+
+    def detect(self, bgr_frame: np.ndarray) -> list[Landmarks]:
+        """
+        Find the hands in a frame
+
+        :param bgr_frame: an (H, W, 3) array, the frame from the camera in
+            OpenCV's BGR order
+        :return: a list of the landmarks of each hand found, with the most
+            confident hand last
+        """
+        if not self._tracking:
+            return self._search(bgr_frame, None)
+
+        frame_size = bgr_frame.shape[1], bgr_frame.shape[0]
+        hands = self._search(bgr_frame, self._region)
+        if len(hands) == 0 and self._region is not None:
+            # Lost the hand, so look through the whole frame again
+            self._region = None
+            self._hands.reset()
+            hands = self._search(bgr_frame, None)
+        if len(hands) == 0:
+            return hands
+
+        bounds = hand_bounds(hands[-1], frame_size)
+        if self._region is None \
+                or not region_fits(self._region, bounds, frame_size):
+            # MediaPipe tracks the hand in the coordinates of the image it
+            # is given, so it needs to start over when the region moves
+            self._region = region_around(bounds, frame_size)
+            self._hands.reset()
+        return hands
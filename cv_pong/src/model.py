@@ -1,30 +1,140 @@
 """
 A model the current game state of a game of Pong
+
+Positions and velocities are held in fixed point, as ints counting
+1 / FIXED_POINT_ONE of a pixel, so that the game steps exactly the same on
+every machine and keeps the part of its motion smaller than a pixel
 """
+import hashlib
+import struct
+from collections import deque
+from fractions import Fraction
+from typing import Any, Callable
 from .constants import *
-from .utils import add_tuples, scale_tuple, do_rects_intersect
+from .utils import Rect, Vec2
+
+
+# Paddles are on the right (1) or left (-1) side of the court
+RIGHT, LEFT = 1, -1
+
+# A saved state starts with the tick and the ball's fixed point position and
+# velocity, then has each paddle's location and each player's score
+_STATE_HEADER_FORMAT = '<q4i'
+_STATE_HEADER_SIZE = struct.calcsize(_STATE_HEADER_FORMAT)
+
+# The speed-up factor as an exact fraction, so speeding up needs no floats
+SPEED_UP_FRACTION = Fraction(BALL_SPEED_FACTOR).limit_denominator(1000)
+
+
+def to_fixed(value: float) -> int:
+    """
+    :param value: a float, a number of pixels (or pixels per second)
+    :return: an int, the value in fixed point, rounded to the nearest step
+    """
+    return round(value * FIXED_POINT_ONE)
+
+
+def to_pixels(value: int) -> int:
+    """
+    :param value: an int, a position in fixed point
+    :return: an int, the whole pixel the position is in
+    """
+    return value >> FIXED_POINT_BITS
+
+
+def divide_toward_zero(numerator: int, denominator: int) -> int:
+    """
+    Divide two ints, rounding toward zero so that the result is the same
+    size whichever way the numerator points
+
+    :param numerator: an int, the number to divide
+    :param denominator: a positive int, the number to divide by
+    :return: an int, the quotient rounded toward zero
+    """
+    if numerator < 0:
+        return -(-numerator // denominator)
+    return numerator // denominator
+
+
+def paddle_layout(num_players: int) -> list[tuple[int, int, int]]:
+    """
+    Find where each player's paddle goes
+
+    Players take turns between the right and left sides, starting on the
+    right, and the players on each side split its height into equal lanes,
+    top to bottom. With one player, the left side is a wall
+
+    :param num_players: an int, the number of players, from 1 to MAX_PLAYERS
+    :return: a list holding, for each player, a tuple of three ints: the side
+        of the court (RIGHT or LEFT), and the top and bottom y-pixel
+        coordinates of the lane the paddle moves in
+    """
+    if not 1 <= num_players <= MAX_PLAYERS:
+        raise ValueError(f'Need between 1 and {MAX_PLAYERS} players, given '
+                         f'{num_players}')
+    court_height = WINDOW_HEIGHT - 2 * WALL_THICKNESS
+    layout = []
+    for player in range(num_players):
+        side = RIGHT if player % 2 == 0 else LEFT
+        lanes = (num_players + (side == RIGHT)) // 2
+        lane = player // 2
+        layout.append((side,
+                       WALL_THICKNESS + court_height * lane // lanes,
+                       WALL_THICKNESS + court_height * (lane + 1) // lanes))
+    return layout
 
 
 class PongModel:
     """
     A model holding the current state of the game of Pong
+
+    With one player, the ball bounces off the left wall for a point and is
+    lost past the paddle on the right. With more, there is a paddle on each
+    side (see paddle_layout), and when the ball gets past one side, every
+    player on the other side scores a point
     """
     def __init__(self,
-                 ball_pos: tuple[int, int] = scale_tuple(WINDOW_SIZE, 0.5),
+                 ball_pos: tuple[int, int] = (WINDOW_WIDTH // 2,
+                                              WINDOW_HEIGHT // 2),
                  ball_vel: tuple[float, float] = (float(BALL_INITIAL_SPEED),
                                                   -float(BALL_INITIAL_SPEED)),
                  paddle_location: int = WINDOW_HEIGHT // 2,
+                 num_players: int = 1,
+                 hash_history: int = 0,
                  ):
         """
         Initialize a new game of Pong
+
+        :param ball_pos: a tuple of two ints, the x/y position of the ball
+        :param ball_vel: a tuple of two floats, the x/y velocity of the ball
+        :param paddle_location: an int, the y-pixel coordinate of the center
+            of the first player's paddle. The other paddles start in the
+            middle of their lanes
+        :param num_players: an int, the number of players, from 1 to
+            MAX_PLAYERS
+        :param hash_history: an int, the number of most recent ticks to keep
+            the state_hash of (see hashes), or 0 to keep none
         """
         # All X/Y positions are defined from the top left of the screen
         # So Y increases down (to match OpenCV)
-        self._ball_pos = tuple(float(p) for p in ball_pos)
-        self._ball_vel = ball_vel
-        self._paddle_location = 0
+        self._ball = Vec2(*(to_fixed(p) for p in ball_pos))
+        self._velocity = Vec2(*(to_fixed(v) for v in ball_vel))
+        self._layout = paddle_layout(num_players)
+        self._paddle_locations = [0] * num_players
+        for player, (_, lane_top, lane_bottom) in enumerate(self._layout):
+            self.move_paddle((lane_top + lane_bottom) // 2, player)
         self.move_paddle(paddle_location)
-        self._points = 0
+        self._points = [0] * num_players
+        self._time_accumulator = 0.0
+        self._tick = 0
+        self._state_struct = \
+            struct.Struct(f'{_STATE_HEADER_FORMAT}{2 * num_players}i')
+        self._hashes = deque(maxlen=hash_history) if hash_history else None
+        self._step_listeners = []
+        # Reused by each step to check for collisions
+        self._ball_rect = Rect(0, 0, BALL_SIZE, BALL_SIZE)
+        self._paddle_rects = [Rect(*self.paddle_rect(player))
+                              for player in range(num_players)]
 
     @property
     def ball_pos(self) -> tuple[int, int]:
@@ -32,86 +142,395 @@ class PongModel:
         :return: the x/y position of the ball, where x is pixels from the left
             and y is pixels from the top
         """
-        return int(self._ball_pos[0]), int(self._ball_pos[1])
+        return to_pixels(self._ball.x), to_pixels(self._ball.y)
 
     @property
     def ball_vel(self) -> tuple[float, float]:
         """
-        :return: the x/y velocity of the ball
+        :return: the x/y velocity of the ball, in pixels per second
+        """
+        return (self._velocity.x / FIXED_POINT_ONE,
+                self._velocity.y / FIXED_POINT_ONE)
+
+    @property
+    def tick(self) -> int:
+        """
+        :return: an int, the number of physics steps taken so far
+        """
+        return self._tick
+
+    @property
+    def hashes(self) -> list[tuple[int, int]]:
+        """
+        :return: a list of (tick, state_hash) tuples for the most recent
+            ticks, oldest first, up to the hash_history given when the model
+            was made. Two games that were given the same inputs have the same
+            hashes, so comparing them finds the first tick they differ at
+        """
+        return [] if self._hashes is None else list(self._hashes)
+
+    @property
+    def num_players(self) -> int:
         """
-        return self._ball_vel
+        :return: an int, the number of players, each with their own paddle
+        """
+        return len(self._layout)
 
     @property
     def paddle_location(self) -> int:
         """
-        :return: an int, the y-pixel coordinate of the center of the paddle
+        :return: an int, the y-pixel coordinate of the center of the first
+            player's paddle
+        """
+        return self._paddle_locations[0]
+
+    @property
+    def paddle_locations(self) -> tuple[int, ...]:
+        """
+        :return: a tuple of ints, the y-pixel coordinate of the center of each
+            player's paddle
         """
-        return self._paddle_location
+        return tuple(self._paddle_locations)
 
     @property
     def points(self) -> int:
         """
-        :return: an int, the number of points the player has scored
+        :return: an int, the number of points the first player has scored
         """
-        return self._points
+        return self._points[0]
 
-    def move_paddle(self, coordinate_to_move_paddle: int):
+    @property
+    def scores(self) -> tuple[int, ...]:
+        """
+        :return: a tuple of ints, the number of points each player has scored
+        """
+        return tuple(self._points)
+
+    def paddle_side(self, player: int = 0) -> int:
+        """
+        :param player: an int, the index of the player
+        :return: an int, the side of the court the player's paddle is on,
+            RIGHT or LEFT
+        """
+        return self._layout[player][0]
+
+    def paddle_rect(self, player: int = 0) -> tuple[int, int, int, int]:
         """
-        Move the paddle to the specified coordinate
+        :param player: an int, the index of the player
+        :return: a tuple of four ints, the left, top, width and height of the
+            player's paddle in pixels
+        """
+        if self._layout[player][0] == RIGHT:
+            left = WINDOW_WIDTH - PADDLE_DIST_FROM_EDGE - PADDLE_WIDTH
+        else:
+            left = PADDLE_DIST_FROM_EDGE
+        return (left, self._paddle_locations[player] - PADDLE_HEIGHT // 2,
+                PADDLE_WIDTH, PADDLE_HEIGHT)
+
+    def player_at(self, x: float, y: float) -> int | None:
+        """
+        Find whose part of the court a point on the screen is in
+
+        Each player has the half of the screen on their side, between the top
+        and bottom of their lane
+
+        :param x: a float, the x-pixel coordinate of the point
+        :param y: a float, the y-pixel coordinate of the point
+        :return: an int, the index of the player, or None if the point is in
+            no player's part (such as on a wall)
+        """
+        side = RIGHT if x >= WINDOW_WIDTH / 2 or len(self._layout) == 1 \
+            else LEFT
+        for player, (paddle_side, lane_top, lane_bottom) in \
+                enumerate(self._layout):
+            if paddle_side == side and lane_top <= y < lane_bottom:
+                return player
+        return None
+
+    def move_paddle(self, coordinate_to_move_paddle: int, player: int = 0):
+        """
+        Move a player's paddle to the specified coordinate
 
         If the given position is out of range, will move the paddle to the edge
-        of the board in the direction of that range
+        of its lane in the direction of that range
 
         :param coordinate_to_move_paddle: an int, the y pixel coordinate to set
             the middle of the paddle to
+        :param player: an int, the index of the player whose paddle to move
+        """
+        _, lane_top, lane_bottom = self._layout[player]
+        min_pos = lane_top + PADDLE_HEIGHT // 2
+        max_pos = lane_bottom - PADDLE_HEIGHT // 2
+        self._paddle_locations[player] = min(
+            max(coordinate_to_move_paddle, min_pos), max_pos
+        )
+
+    def set_state(self, ball_pos: tuple[float, float],
+                  ball_vel: tuple[float, float],
+                  paddle_locations: list[int], scores: list[int]):
+        """
+        Set the whole state of the game, e.g. to show a game run elsewhere
+
+        :param ball_pos: a tuple of two floats, the x/y position of the ball
+        :param ball_vel: a tuple of two floats, the x/y velocity of the ball
+        :param paddle_locations: a list of ints, the y-pixel coordinate of the
+            center of each player's paddle
+        :param scores: a list of ints, the number of points each player has
+            scored
+        """
+        if len(paddle_locations) != self.num_players \
+                or len(scores) != self.num_players:
+            raise ValueError(f'Expected a paddle and score for each of '
+                             f'{self.num_players} players')
+        self._ball.x, self._ball.y = (to_fixed(p) for p in ball_pos)
+        self._velocity.x, self._velocity.y = (to_fixed(v) for v in ball_vel)
+        for player, location in enumerate(paddle_locations):
+            self.move_paddle(location, player)
+        self._points = list(scores)
+        self._time_accumulator = 0.0
+
+    def state_bytes(self) -> bytes:
+        """
+        :return: a bytes, the tick, the ball's fixed point position and
+            velocity, the paddle locations and the scores, packed little
+            endian so they are the same on every machine
+        """
+        return self._state_struct.pack(
+            self._tick, self._ball.x, self._ball.y, self._velocity.x,
+            self._velocity.y, *self._paddle_locations, *self._points
+        )
+
+    def state_hash(self) -> int:
+        """
+        :return: an int, a 64-bit hash of state_bytes, which changes with
+            any change to the state of the game
+        """
+        return int.from_bytes(
+            hashlib.blake2b(self.state_bytes(), digest_size=8).digest(),
+            'little'
+        )
+
+    @property
+    def state_size(self) -> int:
+        """
+        :return: an int, the number of bytes in state_bytes
+        """
+        return self._state_struct.size
+
+    def pack_state_into(self, buffer: bytearray | memoryview,
+                        offset: int = 0):
+        """
+        Write state_bytes into an existing buffer, without making a new bytes
+
+        :param buffer: a writable buffer with at least state_size bytes after
+            offset
+        :param offset: an int, the index in buffer to write the state at
         """
-        min_pos = WALL_THICKNESS + PADDLE_HEIGHT // 2
-        max_pos = WINDOW_HEIGHT - min_pos
-        self._paddle_location = min(max(coordinate_to_move_paddle, min_pos),
-                                    max_pos)
+        self._state_struct.pack_into(
+            buffer, offset, self._tick, self._ball.x, self._ball.y,
+            self._velocity.x, self._velocity.y, *self._paddle_locations,
+            *self._points
+        )
 
-    def update(self):
+    def load_state(self, data: bytes | bytearray | memoryview,
+                   offset: int = 0):
         """
-        Update the state of the game
+        Go back (or forward) to a state saved with state_bytes or
+        pack_state_into by a game with the same number of players
+
+        Hashes kept for ticks after the loaded tick are forgotten, as those
+        ticks will be played again, and any time left over toward the next
+        tick is dropped, as states are saved between ticks
+
+        :param data: a buffer holding the state
+        :param offset: an int, the index in data the state starts at
         """
+        num_players = self.num_players
+        values = self._state_struct.unpack_from(data, offset)
+        self._tick, self._ball.x, self._ball.y, self._velocity.x, \
+            self._velocity.y = values[:5]
+        self._paddle_locations[:] = values[5:5 + num_players]
+        self._points[:] = values[5 + num_players:]
+        self._time_accumulator = 0.0
+        if self._hashes is not None:
+            while self._hashes and self._hashes[-1][0] > self._tick:
+                self._hashes.pop()
+
+    @classmethod
+    def from_state_bytes(cls, data: bytes) -> 'PongModel':
+        """
+        Make a game from a state saved with state_bytes
+
+        :param data: a bytes, the whole of a saved state
+        :return: a PongModel in that state
+        """
+        num_players, extra = divmod(len(data) - _STATE_HEADER_SIZE, 8)
+        if extra or not 1 <= num_players <= MAX_PLAYERS:
+            raise ValueError(f'A saved state is {_STATE_HEADER_SIZE} bytes '
+                             f'plus 8 per player, given {len(data)} bytes')
+        model = cls(num_players=num_players)
+        model.load_state(data)
+        return model
+
+    def add_step_listener(self, listener: Callable[[], Any]):
+        """
+        Call a function after every physics step, e.g. to record each tick
+
+        :param listener: a function taking nothing
+        """
+        self._step_listeners.append(listener)
+
+    def remove_step_listener(self, listener: Callable[[], Any]):
+        """
+        Stop calling a function given to add_step_listener
+
+        :param listener: the function to stop calling
+        """
+        self._step_listeners.remove(listener)
+
+    def update(self, dt: float = PHYSICS_TIMESTEP):
+        """
+        Advance the state of the game by the given amount of time
+
+        The game is always simulated in fixed steps of PHYSICS_TIMESTEP, so it
+        plays the same no matter how often this is called. Leftover time is
+        carried over to the next call. If more than MAX_PHYSICS_STEPS steps
+        are owed (e.g. after a long stall), the extra time is dropped rather
+        than trying to catch up all at once
+
+        :param dt: a float, the time in seconds since the last update
+        """
+        self._time_accumulator += dt
+        steps = 0
+        # Small tolerance so that e.g. four quarter-steps add up to one step
+        while self._time_accumulator + 1e-9 >= PHYSICS_TIMESTEP:
+            if steps == MAX_PHYSICS_STEPS:
+                self._time_accumulator = 0.0
+                break
+            self._step()
+            self._tick += 1
+            if self._hashes is not None:
+                self._hashes.append((self._tick, self.state_hash()))
+            for listener in self._step_listeners:
+                listener()
+            self._time_accumulator -= PHYSICS_TIMESTEP
+            steps += 1
+
+    def _speed_up(self):
+        """
+        Speed the ball up by BALL_SPEED_FACTOR, up to BALL_MAX_SPEED
+        """
+        max_speed = BALL_MAX_SPEED * FIXED_POINT_ONE
+        self._velocity.set(*(
+            min(max(divide_toward_zero(vel * SPEED_UP_FRACTION.numerator,
+                                       SPEED_UP_FRACTION.denominator),
+                    -max_speed), max_speed)
+            for vel in self._velocity
+        ))
+
+    def _step(self):
+        """
+        Advance the state of the game by one physics step
+        """
+        ball = self._ball
+        velocity = self._velocity
+        half_ball = BALL_SIZE // 2
         # Find next position
-        effective_vel = scale_tuple(self.ball_vel, 1.0 / FRAME_RATE)
-        self._ball_pos = add_tuples(self.ball_pos, effective_vel)
+        prev_left = to_pixels(ball.x) - half_ball
+        prev_top = to_pixels(ball.y) - half_ball
+        ball.x += divide_toward_zero(velocity.x, PHYSICS_RATE)
+        ball.y += divide_toward_zero(velocity.y, PHYSICS_RATE)
 
         # Bounce the ball off top/bottom wall
-        top_of_ball = int(self.ball_pos[1]) - BALL_SIZE // 2
+        # The walls extend past the edge of the screen, so checking the end
+        # position catches the ball even if it would have moved through them
+        top_of_ball = to_pixels(ball.y) - half_ball
         bottom_of_ball = top_of_ball + BALL_SIZE
         if top_of_ball < WALL_THICKNESS:
-            self._ball_vel = self.ball_vel[0], abs(self.ball_vel[1])
+            velocity.y = abs(velocity.y)
         elif bottom_of_ball > WINDOW_HEIGHT - WALL_THICKNESS:
-            self._ball_vel = self.ball_vel[0], -abs(self.ball_vel[1])
+            velocity.y = -abs(velocity.y)
 
-        # Bounce the ball off the back wall
+        # Bounce the ball off the back wall, if there is no one on the left
         # One point and increase speed
-        left_of_ball = int(self.ball_pos[0]) - BALL_SIZE // 2
-        if left_of_ball < WALL_THICKNESS:
-            self._ball_vel = abs(self.ball_vel[0]), self.ball_vel[1]
-            self._ball_vel = tuple(
-                float(int(val * BALL_SPEED_FACTOR)) for val in self.ball_vel
-            )  # Round off but keep type as float
-            self._ball_vel = (
-                min(max(self.ball_vel[0], -BALL_MAX_SPEED), BALL_MAX_SPEED),
-                min(max(self.ball_vel[1], -BALL_MAX_SPEED), BALL_MAX_SPEED)
-            )  # constrain speed
-            self._points += 1
-
-        # Bounce the ball off the paddle
-        ball_rect = left_of_ball, top_of_ball, BALL_SIZE, BALL_SIZE
-        paddle_rect = (
-            WINDOW_WIDTH - PADDLE_DIST_FROM_EDGE - PADDLE_WIDTH,
-            self.paddle_location - PADDLE_HEIGHT // 2,
-            PADDLE_WIDTH, PADDLE_HEIGHT
-        )
-        if do_rects_intersect(ball_rect, paddle_rect):
-            self._ball_vel = -abs(self.ball_vel[0]), self.ball_vel[1]
-
-        # Missed - minus one point
-        if self.ball_pos[0] > WINDOW_WIDTH:
-            self._points -= 1
-            self._ball_pos = scale_tuple(WINDOW_SIZE, 0.5)
-            # Don't need to change velocity - its already moving right
+        left_of_ball = to_pixels(ball.x) - half_ball
+        single_player = len(self._layout) == 1
+        if single_player and left_of_ball < WALL_THICKNESS:
+            velocity.x = abs(velocity.x)
+            self._speed_up()
+            self._points[0] += 1
+
+        # Bounce the ball off the paddles
+        ball_rect = self._ball_rect
+        ball_rect.top = top_of_ball
+        for player, (side, _, _) in enumerate(self._layout):
+            paddle_rect = self._paddle_rects[player]
+            paddle_rect.top = \
+                self._paddle_locations[player] - PADDLE_HEIGHT // 2
+            moving_toward = velocity.x * side > 0
+            # First check if the ball went through the face of the paddle
+            # during this step, which a fast ball can do without ever
+            # overlapping it
+            if side == RIGHT:
+                paddle_face = paddle_rect.left
+                prev_front = prev_left + BALL_SIZE
+                front_of_ball = left_of_ball + BALL_SIZE
+            else:
+                # Mirror the left side so the same test applies
+                paddle_face = -paddle_rect.right
+                prev_front = -prev_left
+                front_of_ball = -left_of_ball
+            if moving_toward and prev_front < paddle_face <= front_of_ball:
+                # Where the top of the ball was when it crossed the face,
+                # compared exactly by multiplying through by the distance
+                travel = front_of_ball - prev_front
+                hit_top = prev_top * travel \
+                    + (paddle_face - prev_front) * (top_of_ball - prev_top)
+                if (paddle_rect.top - BALL_SIZE) * travel <= hit_top \
+                        <= paddle_rect.bottom * travel:
+                    # Reflect the rest of the motion back off the paddle face
+                    fixed_left = ball.x - half_ball * FIXED_POINT_ONE
+                    fixed_front = fixed_left + BALL_SIZE * FIXED_POINT_ONE \
+                        if side == RIGHT else -fixed_left
+                    overshoot = fixed_front - paddle_face * FIXED_POINT_ONE
+                    ball.x -= 2 * side * overshoot
+                    left_of_ball = to_pixels(ball.x) - half_ball
+                    velocity.x = -side * abs(velocity.x)
+            ball_rect.left = left_of_ball
+            if ball_rect.intersects(paddle_rect):
+                velocity.x = -side * abs(velocity.x)
+            if not single_player and moving_toward \
+                    and velocity.x * side < 0:
+                # With no back wall, the rallies are what speed the ball up
+                self._speed_up()
+
+        if single_player:
+            # Missed - minus one point
+            if to_pixels(ball.x) > WINDOW_WIDTH:
+                self._points[0] -= 1
+                self._serve()
+                # Don't need to change velocity - its already moving right
+            return
+
+        # Missed - a point to everyone on the other side, and serve the ball
+        # from the middle at the starting speed, toward the side that missed
+        if to_pixels(ball.x) > WINDOW_WIDTH:
+            scoring_side = LEFT
+        elif to_pixels(ball.x) < 0:
+            scoring_side = RIGHT
+        else:
+            return
+        for player, (side, _, _) in enumerate(self._layout):
+            if side == scoring_side:
+                self._points[player] += 1
+        self._serve()
+        initial_speed = BALL_INITIAL_SPEED * FIXED_POINT_ONE
+        velocity.x = -scoring_side * initial_speed
+        velocity.y = initial_speed if velocity.y >= 0 else -initial_speed
+
+    def _serve(self):
+        """
+        Move the ball back to the middle of the screen
+        """
+        self._ball.x = (WINDOW_WIDTH // 2) * FIXED_POINT_ONE
+        self._ball.y = (WINDOW_HEIGHT // 2) * FIXED_POINT_ONE
@@ -0,0 +1,554 @@
+"""
+A module for playing Pong across machines, with a server running the game
+and clients sending paddle positions
+
+Everything is sent over UDP as small binary packets. Each packet starts with
+a HEADER, giving its type, followed by the struct for that type. The state of
+the game is sent as snapshots, which only hold the fields that changed since
+a snapshot the client has acknowledged receiving
+"""
+import socket
+import struct
+import time
+from collections import deque
+from .constants import *
+from .model import PongModel
+
+HEADER = struct.Struct('<2sB')  # magic, packet type
+MAGIC = b'CP'
+JOIN, WELCOME, REJECT, INPUT, SNAPSHOT = range(5)
+
+WELCOME_BODY = struct.Struct('<BB')  # player, number of players
+# last snapshot tick received, input sequence number, paddle y coordinate
+INPUT_BODY = struct.Struct('<IIh')
+# tick, tick of the snapshot the delta is from, server time in milliseconds,
+# last input sequence number applied, bit mask of the fields sent
+SNAPSHOT_BODY = struct.Struct('<IIIIH')
+NO_BASE = 0xFFFFFFFF  # base tick of a snapshot holding every field
+
+MAX_PACKET_SIZE = 512  # bytes, far more than any packet needs
+
+# A snapshot is a tuple of fields: the ball's x and y position, the ball's x
+# and y velocity, each paddle's location, then each player's score
+Snapshot = tuple[float, ...]
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def snapshot_format(num_players: int) -> str:
+    """
+    :param num_players: an int, the number of players in the game
+    :return: a str, the struct format character of each field of a snapshot
+    """
+    return 'hhff' + 'h' * num_players + 'h' * num_players
+
+
+def take_snapshot(model: PongModel) -> Snapshot:
+    """
+    Find the fields of a game that are sent to clients
+
+    :param model: the PongModel of the game
+    :return: a tuple, the snapshot of the game
+    """
+    return (*model.ball_pos, *model.ball_vel, *model.paddle_locations,
+            *model.scores)
+
+
+def encode_snapshot(tick: int, snapshot: Snapshot, base_tick: int = NO_BASE,
+                    base: Snapshot | None = None, server_time: float = 0.0,
+                    input_ack: int = 0) -> bytes:
+    """
+    Pack a snapshot into a packet, only sending the fields that changed
+
+    :param tick: an int, the number of the snapshot
+    :param snapshot: the Snapshot to send
+    :param base_tick: an int, the number of the snapshot the client already
+        has to send the changes from, or NO_BASE to send every field
+    :param base: the Snapshot numbered base_tick, or None to send every field
+    :param server_time: a float, the seconds since the server started
+    :param input_ack: an int, the number of the newest input from the client
+        that the snapshot includes
+    :return: a bytes, the packet
+    """
+    if base is None:
+        base_tick = NO_BASE
+    formats = snapshot_format(len(snapshot) // 2 - 2)
+    mask = 0
+    changed_formats = []
+    changed = []
+    for index, value in enumerate(snapshot):
+        if base is None or base[index] != value:
+            mask |= 1 << index
+            changed_formats.append(formats[index])
+            changed.append(value)
+    return HEADER.pack(MAGIC, SNAPSHOT) \
+        + SNAPSHOT_BODY.pack(tick, base_tick, int(server_time * 1000),
+                             input_ack, mask) \
+        + struct.pack('<' + ''.join(changed_formats), *changed)
+
+
+def decode_snapshot(body: bytes, num_players: int,
+                    received: dict[int, Snapshot]) \
+        -> tuple[int, float, int, Snapshot]:
+    """
+    Unpack the body of a snapshot packet
+
+    :param body: a bytes, the packet after its HEADER
+    :param num_players: an int, the number of players in the game
+    :param received: a dict mapping the tick of each snapshot received so far
+        to the Snapshot, to fill in the fields that were not sent
+    :return: a tuple containing the tick of the snapshot, the server time in
+        seconds, the number of the newest input the snapshot includes, and
+        the Snapshot
+    :raises ProtocolError: if the packet is malformed, or is based on a
+        snapshot that was not received
+    """
+    if len(body) < SNAPSHOT_BODY.size:
+        raise ProtocolError(f'Snapshot of {len(body)} bytes is too short')
+    tick, base_tick, server_ms, input_ack, mask = \
+        SNAPSHOT_BODY.unpack_from(body)
+    formats = snapshot_format(num_players)
+    if base_tick == NO_BASE:
+        base = (0,) * len(formats)
+    elif base_tick in received:
+        base = received[base_tick]
+    else:
+        raise ProtocolError(f'Snapshot {tick} is based on snapshot '
+                            f'{base_tick}, which was not received')
+    changed_formats = ''.join(format_char
+                              for index, format_char in enumerate(formats)
+                              if mask >> index & 1)
+    try:
+        changed = iter(struct.unpack_from('<' + changed_formats, body,
+                                          SNAPSHOT_BODY.size))
+    except struct.error as error:
+        raise ProtocolError(f'Snapshot {tick} is malformed') from error
+    snapshot = tuple(next(changed) if mask >> index & 1 else base[index]
+                     for index in range(len(formats)))
+    return tick, server_ms / 1000, input_ack, snapshot
+
+
+def _open_socket(address: tuple[str, int]) -> socket.socket:
+    """
+    Open a non-blocking UDP socket
+
+    :param address: a tuple of a str and an int, the host and port to bind
+        to
+    :return: the socket
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(address)
+    sock.setblocking(False)
+    return sock
+
+
+def _receive(sock: socket.socket) \
+        -> tuple[int, bytes, tuple[str, int]] | None:
+    """
+    Take the next packet from a socket, skipping packets that are not ours
+
+    :param sock: the non-blocking socket to read
+    :return: a tuple containing the type of the packet, its body and the
+        address it came from, or None if there are no more packets
+    """
+    while True:
+        try:
+            data, address = sock.recvfrom(MAX_PACKET_SIZE)
+        except (BlockingIOError, ConnectionResetError):
+            return None
+        if len(data) >= HEADER.size:
+            magic, packet_type = HEADER.unpack_from(data)
+            if magic == MAGIC:
+                return packet_type, data[HEADER.size:], address
+
+
+class PongServer:
+    """
+    Runs a game for clients on other machines
+
+    The server owns the only real PongModel. The first player plays on the
+    server itself, and each client that joins takes the next player. Clients
+    send the position of their paddle, and the server sends every client
+    snapshots of the game at NETWORK_SNAPSHOT_RATE. A client not heard from
+    for client_timeout seconds is dropped, freeing its player for another
+    client to join as
+    """
+    def __init__(self, model: PongModel,
+                 address: tuple[str, int] = ('0.0.0.0', NETWORK_PORT),
+                 client_timeout: float = NETWORK_CLIENT_TIMEOUT):
+        """
+        Start a new PongServer
+
+        :param model: the PongModel of the game to run
+        :param address: a tuple of a str and an int, the host and port to
+            listen on. Port 0 picks a free port
+        :param client_timeout: a float, the seconds without a packet from a
+            client before it is dropped
+        """
+        self._model = model
+        self._socket = _open_socket(address)
+        self._start_time = time.perf_counter()
+        self._last_snapshot_time = None
+        self._tick = 0
+        self._history: deque[tuple[int, Snapshot]] = \
+            deque(maxlen=NETWORK_HISTORY)
+        self._client_timeout = client_timeout
+        # Per client: the player, the newest snapshot tick it has received,
+        # the newest input sequence number applied and the time.perf_counter
+        # value it was last heard from
+        self._clients: dict[tuple[str, int], list[int | float]] = {}
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    @property
+    def address(self) -> tuple[str, int]:
+        """
+        :return: a tuple of a str and an int, the host and port listened on
+        """
+        return self._socket.getsockname()
+
+    @property
+    def model(self) -> PongModel:
+        """
+        :return: the PongModel of the game
+        """
+        return self._model
+
+    @property
+    def clients(self) -> dict[tuple[str, int], int]:
+        """
+        :return: a dict mapping the address of each client to its player
+        """
+        return {address: client[0]
+                for address, client in self._clients.items()}
+
+    def close(self):
+        """
+        Stop listening for clients
+        """
+        self._socket.close()
+
+    def _send(self, data: bytes, address: tuple[str, int]):
+        """
+        :param data: a bytes, the packet to send
+        :param address: the address of the client to send it to
+        """
+        self._socket.sendto(data, address)
+        self.bytes_sent += len(data)
+
+    def poll(self):
+        """
+        Handle every packet the clients have sent since the last poll, and
+        drop the clients that have gone quiet
+        """
+        now = time.perf_counter()
+        while (packet := _receive(self._socket)) is not None:
+            packet_type, body, address = packet
+            self.bytes_received += HEADER.size + len(body)
+            client = self._clients.get(address)
+            if client is not None:
+                client[3] = now
+            if packet_type == JOIN:
+                if client is None:
+                    taken = {client[0] for client in self._clients.values()}
+                    free = [player
+                            for player in range(1, self._model.num_players)
+                            if player not in taken]
+                    if not free:
+                        self._send(HEADER.pack(MAGIC, REJECT), address)
+                        continue
+                    client = self._clients[address] = \
+                        [free[0], NO_BASE, 0, now]
+                self._send(HEADER.pack(MAGIC, WELCOME)
+                           + WELCOME_BODY.pack(client[0],
+                                               self._model.num_players),
+                           address)
+            elif packet_type == INPUT and client is not None \
+                    and len(body) >= INPUT_BODY.size:
+                ack, sequence, paddle = INPUT_BODY.unpack_from(body)
+                # Packets can arrive out of order, so only take newer ones
+                if sequence > client[2]:
+                    client[2] = sequence
+                    self._model.move_paddle(paddle, client[0])
+                if ack != NO_BASE and (client[1] == NO_BASE
+                                       or ack > client[1]):
+                    client[1] = ack
+        for address, client in list(self._clients.items()):
+            if now - client[3] > self._client_timeout:
+                del self._clients[address]
+
+    def broadcast(self):
+        """
+        Send every client a snapshot of the game
+
+        Each client is sent the changes since the newest snapshot it has
+        acknowledged, or every field if that snapshot is too old
+        """
+        snapshot = take_snapshot(self._model)
+        self._tick += 1
+        self._history.append((self._tick, snapshot))
+        history = dict(self._history)
+        server_time = time.perf_counter() - self._start_time
+        for address, (_, ack, sequence, _) in self._clients.items():
+            base = history.get(ack)
+            self._send(encode_snapshot(self._tick, snapshot, ack, base,
+                                       server_time, sequence),
+                       address)
+
+    def update(self, dt: float):
+        """
+        Handle the clients' inputs, advance the game, and send snapshots when
+        they are due
+
+        :param dt: a float, the time in seconds since the last update
+        """
+        self.poll()
+        self._model.update(dt)
+        now = time.perf_counter()
+        if self._last_snapshot_time is None \
+                or now - self._last_snapshot_time \
+                >= 1 / NETWORK_SNAPSHOT_RATE:
+            self._last_snapshot_time = now
+            self.broadcast()
+
+
+class PongClient:
+    """
+    Plays in a game run by a PongServer
+
+    Snapshots from the server are shown NETWORK_INTERPOLATION_DELAY seconds
+    late, interpolating between the snapshots on either side, so that the
+    game moves smoothly however unevenly they arrive. If the snapshots run
+    out, the ball is predicted to carry on at its last velocity. The client's
+    own paddle is shown where it is locally, without waiting for the server
+    """
+    def __init__(self, server_address: tuple[str, int],
+                 address: tuple[str, int] = ('0.0.0.0', 0)):
+        """
+        Set up a new PongClient. Call connect to join the server's game
+
+        :param server_address: a tuple of a str and an int, the host and port
+            of the server
+        :param address: a tuple of a str and an int, the host and port to
+            send from
+        """
+        self._server_address = server_address
+        self._socket = _open_socket(address)
+        self._player = None
+        self._num_players = None
+        self._rejected = False
+        self._received: dict[int, Snapshot] = {}
+        # Snapshots to interpolate between, as (server time, Snapshot)
+        self._buffer: deque[tuple[float, Snapshot]] = \
+            deque(maxlen=NETWORK_HISTORY)
+        self._newest_tick = NO_BASE
+        self._clock_offset = None
+        self._sequence = 0
+        self._input_times: dict[int, float] = {}
+        self._round_trip_time = None
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.snapshots_dropped = 0
+
+    @property
+    def player(self) -> int | None:
+        """
+        :return: an int, the player this client plays as, or None if the
+            server has not let it join yet
+        """
+        return self._player
+
+    @property
+    def num_players(self) -> int | None:
+        """
+        :return: an int, the number of players in the game, or None if the
+            server has not let this client join yet
+        """
+        return self._num_players
+
+    @property
+    def rejected(self) -> bool:
+        """
+        :return: a bool, whether the server turned this client away because
+            the game is full
+        """
+        return self._rejected
+
+    @property
+    def round_trip_time(self) -> float | None:
+        """
+        :return: a float, the seconds from sending the newest input the
+            server has applied until a snapshot including it came back, or
+            None if no snapshot has included an input yet
+        """
+        return self._round_trip_time
+
+    def close(self):
+        """
+        Stop listening to the server
+        """
+        self._socket.close()
+
+    def _send(self, data: bytes):
+        """
+        :param data: a bytes, the packet to send to the server
+        """
+        self._socket.sendto(data, self._server_address)
+        self.bytes_sent += len(data)
+
+    def join(self):
+        """
+        Ask to join the server's game. Call again if no answer comes
+        """
+        self._send(HEADER.pack(MAGIC, JOIN))
+
+    def connect(self, timeout: float = NETWORK_CONNECT_TIMEOUT):
+        """
+        Join the server's game, asking again until it answers
+
+        :param timeout: a float, the most seconds to wait for an answer
+        :raises ConnectionError: if the game is full or the server does not
+            answer in time
+        """
+        deadline = time.perf_counter() + timeout
+        while self._player is None:
+            if time.perf_counter() > deadline:
+                raise ConnectionError(f'No answer from the server at '
+                                      f'{self._server_address[0]}:'
+                                      f'{self._server_address[1]}')
+            self.join()
+            wait_until = min(time.perf_counter() + NETWORK_JOIN_INTERVAL,
+                             deadline)
+            while self._player is None and not self._rejected \
+                    and time.perf_counter() < wait_until:
+                time.sleep(0.005)
+                self.poll()
+            if self._rejected:
+                raise ConnectionError('The game is full')
+
+    def send_paddle(self, paddle_location: int):
+        """
+        Tell the server where this client's paddle is
+
+        :param paddle_location: an int, the y-pixel coordinate of the center
+            of the paddle
+        """
+        if self._player is None:
+            return
+        self._sequence += 1
+        now = time.perf_counter()
+        self._input_times[self._sequence] = now
+        if len(self._input_times) > NETWORK_HISTORY:
+            del self._input_times[min(self._input_times)]
+        self._send(HEADER.pack(MAGIC, INPUT)
+                   + INPUT_BODY.pack(self._newest_tick, self._sequence,
+                                     paddle_location))
+
+    def poll(self):
+        """
+        Handle every packet the server has sent since the last poll
+        """
+        while (packet := _receive(self._socket)) is not None:
+            packet_type, body, _ = packet
+            self.bytes_received += HEADER.size + len(body)
+            if packet_type == WELCOME and len(body) >= WELCOME_BODY.size:
+                self._player, self._num_players = \
+                    WELCOME_BODY.unpack_from(body)
+            elif packet_type == REJECT:
+                self._rejected = True
+            elif packet_type == SNAPSHOT and self._num_players is not None:
+                self._receive_snapshot(body)
+
+    def _receive_snapshot(self, body: bytes):
+        """
+        Decode a snapshot and add it to the interpolation buffer
+
+        :param body: a bytes, the snapshot packet after its HEADER
+        """
+        now = time.perf_counter()
+        try:
+            tick, server_time, input_ack, snapshot = \
+                decode_snapshot(body, self._num_players, self._received)
+        except ProtocolError:
+            # The base snapshot was lost, so the next snapshot will be based
+            # on an older one that did arrive, or the packet was cut short
+            self.snapshots_dropped += 1
+            return
+        self._received[tick] = snapshot
+        if len(self._received) > NETWORK_HISTORY:
+            del self._received[min(self._received)]
+        if input_ack in self._input_times:
+            self._round_trip_time = now - self._input_times[input_ack]
+        # The smallest offset is from the snapshot that arrived fastest
+        offset = now - server_time
+        if self._clock_offset is None or offset < self._clock_offset:
+            self._clock_offset = offset
+        if self._newest_tick == NO_BASE or tick > self._newest_tick:
+            self._newest_tick = tick
+            self._buffer.append((server_time, snapshot))
+
+    def snapshot_at(self, now: float) -> Snapshot | None:
+        """
+        Find the state of the game to show at a time
+
+        :param now: a float, the time.perf_counter value to show the game at
+        :return: the Snapshot interpolated between the snapshots on either
+            side of now minus NETWORK_INTERPOLATION_DELAY, or extrapolated
+            from the newest one if there is none after it, or None if no
+            snapshot has arrived
+        """
+        if not self._buffer:
+            return None
+        server_time = now - self._clock_offset - NETWORK_INTERPOLATION_DELAY
+        newest_time, newest = self._buffer[-1]
+        if server_time >= newest_time:
+            ahead = min(server_time - newest_time, NETWORK_MAX_EXTRAPOLATION)
+            return (newest[0] + newest[2] * ahead,
+                    newest[1] + newest[3] * ahead, *newest[2:])
+        older_time, older = self._buffer[0]
+        if server_time <= older_time:
+            return older
+        for newer_time, newer in self._buffer:
+            if newer_time >= server_time:
+                break
+            older_time, older = newer_time, newer
+        num_players = self._num_players
+        if older[4 + num_players:] != newer[4 + num_players:]:
+            # Someone scored and the ball was served, so there is nothing to
+            # interpolate between
+            return newer
+        fraction = (server_time - older_time) / (newer_time - older_time)
+        ball = tuple(old + fraction * (new - old)
+                     for old, new in zip(older[:2], newer[:2]))
+        paddles = tuple(old + fraction * (new - old)
+                        for old, new in zip(older[4:4 + num_players],
+                                            newer[4:4 + num_players]))
+        return (*ball, *newer[2:4], *paddles, *newer[4 + num_players:])
+
+    def update(self, model: PongModel, paddle_location: int | None = None):
+        """
+        Handle packets from the server, and show the game in a local model
+
+        :param model: a PongModel with the same number of players as the
+            server's game, which is set to the state of the game
+        :param paddle_location: an int, the y-pixel coordinate this client's
+            paddle is at locally, which is shown in place of the server's
+            and sent to it, or None to show where the server has it
+        """
+        self.poll()
+        if paddle_location is not None:
+            self.send_paddle(paddle_location)
+        snapshot = self.snapshot_at(time.perf_counter())
+        if snapshot is None:
+            return
+        num_players = self._num_players
+        paddles = [int(paddle) for paddle in snapshot[4:4 + num_players]]
+        model.set_state(
+            (snapshot[0], snapshot[1]), (snapshot[2], snapshot[3]), paddles,
+            [int(points) for points in snapshot[4 + num_players:]]
+        )
+        if paddle_location is not None:
+            # Predict the server will take this client's paddle as sent
+            model.move_paddle(paddle_location, self._player)
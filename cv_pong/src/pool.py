@@ -0,0 +1,263 @@
+"""
+A module for finding hands in worker processes, so that hand tracking can
+use more than one core
+"""
+import multiprocessing
+import queue
+import time
+from collections import deque
+from multiprocessing import shared_memory
+from typing import NamedTuple
+import numpy as np
+from .constants import *
+
+
+class SharedFrameRing:
+    """
+    A fixed number of frame-sized slots in shared memory
+
+    Frames are written straight into a slot by one process and read from it
+    by another, so they are never pickled or sent through a pipe
+    """
+    def __init__(self, slots: int, frame_shape: tuple[int, ...],
+                 name: str | None = None):
+        """
+        Create a new ring, or attach to one made by another process
+
+        :param slots: an int, the number of frames the ring holds
+        :param frame_shape: a tuple of ints, the shape of each frame, which
+            is made of uint8
+        :param name: a str, the name of the shared memory of an existing
+            ring to attach to, or None to create a new one
+        """
+        size = slots * int(np.prod(frame_shape))
+        if name is None:
+            self._memory = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self._memory = shared_memory.SharedMemory(name=name)
+        self._owner = name is None
+        self._frames = np.ndarray((slots, *frame_shape), dtype=np.uint8,
+                                  buffer=self._memory.buf)
+
+    @property
+    def name(self) -> str:
+        """
+        :return: a str, the name other processes attach to this ring with
+        """
+        return self._memory.name
+
+    def __len__(self) -> int:
+        """
+        :return: an int, the number of slots in this ring
+        """
+        return len(self._frames)
+
+    def __getitem__(self, slot: int) -> np.ndarray:
+        """
+        :param slot: an int, the index of a slot
+        :return: an array of the frame shape, the slot, which can be written
+            into
+        """
+        return self._frames[slot]
+
+    def close(self):
+        """
+        Detach from the shared memory, freeing it if this process made it
+
+        No slot may be used afterward
+        """
+        # The array must be gone before the memory it views can be closed
+        del self._frames
+        self._memory.close()
+        if self._owner:
+            self._memory.unlink()
+
+
+class PoolResult(NamedTuple):
+    """
+    The hands found in one frame by a HandDetectorPool
+    """
+    frame_index: int
+    timestamp: float
+    hands: list[np.ndarray]  # the landmarks of each hand, most confident last
+    seconds: float  # how long looking for hands took
+
+
+def _detect_hands(ring_name: str, slots: int, frame_shape: tuple[int, ...],
+                  tracking: bool, max_hands: int,
+                  tasks: multiprocessing.Queue,
+                  results: multiprocessing.Queue):
+    """
+    Look for hands in frames from a shared ring until told to stop
+
+    Runs in each worker process. Each task is a (slot, frame index,
+    timestamp) tuple naming a frame in the ring, and None means to stop.
+    If anything goes wrong, the error is sent back in place of a result
+
+    :param ring_name: a str, the name of the SharedFrameRing
+    :param slots: an int, the number of slots in the ring
+    :param frame_shape: a tuple of ints, the shape of each frame
+    :param tracking: a bool, whether to track a single hand in a region of
+        interest
+    :param max_hands: an int, the most hands to find in each frame when not
+        tracking
+    :param tasks: the queue to take tasks from
+    :param results: the queue to put (slot, PoolResult) tuples on
+    """
+    ring = None
+    detector = None
+    try:
+        from .hands import HandDetector
+        ring = SharedFrameRing(slots, frame_shape, ring_name)
+        detector = HandDetector(tracking, max_hands=max_hands)
+        for task in iter(tasks.get, None):
+            slot, frame_index, timestamp = task
+            start = time.perf_counter()
+            hands = detector.detect(ring[slot])
+            results.put((slot, PoolResult(frame_index, timestamp, hands,
+                                          time.perf_counter() - start)))
+    except Exception as error:
+        results.put((None, error))
+    finally:
+        if detector is not None:
+            detector.close()
+        if ring is not None:
+            ring.close()
+
+
+class HandDetectorPool:
+    """
+    Finds hands in frames using a pool of worker processes
+
+    Frames are copied into a SharedFrameRing with one slot per frame that can
+    be in flight, and workers are only sent the slot to read. If every slot is
+    still being worked on when a new frame comes in, that frame is dropped
+    rather than queued, so the workers never fall behind on stale frames.
+    Results can come back out of order when there is more than one worker
+    """
+    def __init__(self, processes: int, frame_shape: tuple[int, ...],
+                 tracking: bool = HAND_TRACKING, slots: int | None = None,
+                 max_hands: int = HAND_MAX_HANDS):
+        """
+        Start a new HandDetectorPool
+
+        The workers load MediaPipe in the background, so the first results
+        take a while
+
+        :param processes: an int, the number of worker processes
+        :param frame_shape: a tuple of ints, the (H, W, 3) shape of the BGR
+            frames to look for hands in
+        :param tracking: a bool, whether the worker tracks a single hand in
+            a region of interest (see HandDetector). Only used with one
+            process
+        :param slots: an int, the most frames that can be in flight at once,
+            or None for one per worker
+        :param max_hands: an int, the most hands to find in each frame when
+            not tracking
+        """
+        if slots is None:
+            slots = processes
+        # Each of several workers only sees every few frames, so would track
+        # the hand from where it was frames ago
+        tracking = tracking and processes == 1
+        self._ring = SharedFrameRing(slots, frame_shape)
+        self._free_slots = deque(range(slots))
+        self._dropped = 0
+        # Spawn, rather than fork, as the parent has threads of its own
+        context = multiprocessing.get_context('spawn')
+        self._tasks = context.Queue()
+        self._results = context.Queue()
+        self._workers = [
+            context.Process(
+                target=_detect_hands, name=f'cv-hands-{index}', daemon=True,
+                args=(self._ring.name, slots, frame_shape, tracking,
+                      max_hands, self._tasks, self._results)
+            )
+            for index in range(processes)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    @property
+    def processes(self) -> int:
+        """
+        :return: an int, the number of worker processes
+        """
+        return len(self._workers)
+
+    @property
+    def in_flight(self) -> int:
+        """
+        :return: an int, the number of frames sent to the workers whose
+            results have not been collected
+        """
+        return len(self._ring) - len(self._free_slots)
+
+    @property
+    def dropped(self) -> int:
+        """
+        :return: an int, the number of frames dropped because every slot was
+            in use
+        """
+        return self._dropped
+
+    def acquire(self) -> tuple[int, np.ndarray] | None:
+        """
+        Take a free slot to write a frame into, then pass it to submit
+
+        :return: a tuple containing an int, the slot, and the array to write
+            the frame into, or None if every slot is in use, in which case
+            the frame is counted as dropped
+        """
+        if not self._free_slots:
+            self._dropped += 1
+            return None
+        slot = self._free_slots.popleft()
+        return slot, self._ring[slot]
+
+    def submit(self, slot: int, frame_index: int, timestamp: float):
+        """
+        Send a frame written into a slot to the workers
+
+        :param slot: an int, the slot taken with acquire
+        :param frame_index: an int, the number of the frame
+        :param timestamp: a float, when the frame was captured
+        """
+        self._tasks.put((slot, frame_index, timestamp))
+
+    def results(self, timeout: float = 0.0) -> list[PoolResult]:
+        """
+        Collect the results the workers have finished, freeing their slots
+
+        :param timeout: a float, the most seconds to wait for a result if none
+            is ready
+        :return: a list of PoolResults, in the order they finished
+        """
+        finished = []
+        try:
+            item = self._results.get(timeout=timeout) if timeout > 0 \
+                else self._results.get_nowait()
+            while True:
+                slot, result = item
+                if slot is None:
+                    raise result
+                self._free_slots.append(slot)
+                finished.append(result)
+                item = self._results.get_nowait()
+        except queue.Empty:
+            pass
+        return finished
+
+    def close(self):
+        """
+        Stop the workers and free the shared memory
+        """
+        for _ in self._workers:
+            self._tasks.put(None)
+        for worker in self._workers:
+            worker.join(POOL_SHUTDOWN_TIMEOUT)
+            if worker.is_alive():
+                worker.terminate()
+        self._tasks.close()
+        self._results.close()
+        self._ring.close()
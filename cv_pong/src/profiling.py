@@ -0,0 +1,153 @@
+"""
+A module for timing the stages of each frame of Pong
+"""
+import csv
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Iterator
+from .constants import *
+
+
+class FrameTimer:
+    """
+    Keeps track of how long each stage of a frame takes
+
+    For every stage, the most recent durations are kept so that rolling
+    percentiles can be reported. Stages can be timed from any thread
+    """
+    def __init__(self, window: int = TIMING_WINDOW, keep_log: bool = False,
+                 log_size: int = TIMING_LOG_SIZE):
+        """
+        Set up a new FrameTimer
+
+        :param window: an int, the number of most recent samples of each stage
+            to compute percentiles from
+        :param keep_log: a bool, whether to also keep samples of every stage
+            so that they can be exported with write_log
+        :param log_size: an int, the number of most recent samples, across
+            all stages, to keep when keep_log is set. Older samples are
+            dropped, so a long session does not keep growing
+        """
+        self._window = window
+        self._samples: dict[str, deque[float]] = {}
+        self._log: deque[tuple[float, str, float]] | None = \
+            deque(maxlen=log_size) if keep_log else None
+        self._lock = threading.Lock()
+        self._start_time = time.perf_counter()
+
+    @property
+    def stages(self) -> list[str]:
+        """
+        :return: a list of strs, the names of every stage timed so far, in the
+            order they were first timed
+        """
+        with self._lock:
+            return list(self._samples)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Time the code run inside this context manager as one stage
+
+        :param name: a str, the name of the stage
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start, start)
+
+    def record(self, name: str, seconds: float, start: float | None = None):
+        """
+        Record how long one stage took
+
+        :param name: a str, the name of the stage
+        :param seconds: a float, how long the stage took in seconds
+        :param start: a float, the time.perf_counter value when the stage
+            started, or None for now minus seconds
+        """
+        if start is None:
+            start = time.perf_counter() - seconds
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self._window)
+            samples.append(seconds)
+            if self._log is not None:
+                self._log.append((start - self._start_time, name, seconds))
+
+    def percentiles(self, name: str,
+                    percents: tuple[float, ...] = (50, 95, 99)) \
+            -> tuple[float, ...]:
+        """
+        Find rolling percentiles of how long a stage took
+
+        :param name: a str, the name of the stage
+        :param percents: a tuple of floats between 0 and 100, the percentiles
+            to find
+        :return: a tuple of floats, the duration in seconds at each of the
+            given percentiles (using the nearest rank), or all zeros if the
+            stage has not been timed
+        """
+        with self._lock:
+            samples = sorted(self._samples.get(name, ()))
+        if len(samples) == 0:
+            return tuple(0.0 for _ in percents)
+        last = len(samples) - 1
+        return tuple(samples[min(last, int(round(p / 100 * last)))]
+                     for p in percents)
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """
+        Summarize the recent durations of every stage
+
+        :return: a dict mapping the name of each stage to a dict giving the
+            p50, p95 and p99 durations and the mean duration in milliseconds,
+            along with the number of samples these were computed from
+        """
+        summary = {}
+        for name in self.stages:
+            with self._lock:
+                samples = list(self._samples[name])
+            p50, p95, p99 = self.percentiles(name)
+            summary[name] = {
+                'p50_ms': p50 * 1000,
+                'p95_ms': p95 * 1000,
+                'p99_ms': p99 * 1000,
+                'mean_ms': sum(samples) / len(samples) * 1000,
+                'samples': len(samples),
+            }
+        return summary
+
+    def write_log(self, path: str):
+        """
+        Export the timings to a file
+
+        A path ending in .csv gets one row per kept sample (time since the
+        timer was made, stage and duration in seconds), which requires
+        keep_log. Any other path gets a JSON file with the summary, plus every
+        kept sample if keep_log was set
+
+        :param path: a str, the path of the file to write
+        """
+        with self._lock:
+            log = list(self._log) if self._log is not None else None
+        if path.endswith('.csv'):
+            if log is None:
+                raise ValueError('Exporting to CSV needs keep_log=True')
+            with open(path, 'w', newline='') as file:
+                writer = csv.writer(file)
+                writer.writerow(('time', 'stage', 'seconds'))
+                writer.writerows(log)
+        else:
+            data = {'summary': self.summary()}
+            if log is not None:
+                data['samples'] = [
+                    {'time': start, 'stage': name, 'seconds': seconds}
+                    for start, name, seconds in log
+                ]
+            with open(path, 'w') as file:
+                json.dump(data, file, indent=2)
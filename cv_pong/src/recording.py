@@ -0,0 +1,369 @@
+"""
+A module for recording camera sessions and replaying them later
+
+A recording is a directory holding:
+- frames.npy, an (N, H, W, 3) array of the raw BGR frames, which is memory
+  mapped so that any frame can be read without loading the rest
+- timestamps.npy, an (N,) array of the time each frame was captured, in
+  seconds
+- meta.json, giving the number of frames recorded (frames.npy may have extra
+  room at the end)
+"""
+import json
+import os
+import time
+import numpy as np
+from .constants import *
+from .sources import FrameSource
+
+FRAMES_FILE = 'frames.npy'
+TIMESTAMPS_FILE = 'timestamps.npy'
+META_FILE = 'meta.json'
+
+
+class FrameRecorder:
+    """
+    Writes frames and their capture times to a recording
+    """
+    def __init__(self, path: str, capacity: int = RECORDING_INITIAL_CAPACITY):
+        """
+        Start a new recording
+
+        :param path: a str, the directory to write the recording to. It is
+            created if it does not exist
+        :param capacity: an int, the number of frames to make room for at
+            first. Room is doubled whenever it runs out
+        """
+        os.makedirs(path, exist_ok=True)
+        self._path = path
+        self._capacity = capacity
+        self._count = 0
+        self._frames = None
+        self._timestamps = None
+
+    @property
+    def count(self) -> int:
+        """
+        :return: an int, the number of frames recorded so far
+        """
+        return self._count
+
+    def _allocate(self, frame_shape: tuple[int, ...], capacity: int):
+        """
+        Make room for a number of frames, keeping the frames already written
+
+        :param frame_shape: a tuple of ints, the shape of one frame
+        :param capacity: an int, the number of frames to make room for
+        """
+        frames_path = os.path.join(self._path, FRAMES_FILE)
+        frames = np.lib.format.open_memmap(
+            frames_path + '.tmp', mode='w+', dtype=np.uint8,
+            shape=(capacity, *frame_shape)
+        )
+        timestamps = np.zeros(capacity, dtype=np.float64)
+        if self._frames is not None:
+            frames[:self._count] = self._frames[:self._count]
+            timestamps[:self._count] = self._timestamps[:self._count]
+            del self._frames
+        frames.flush()
+        os.replace(frames_path + '.tmp', frames_path)
+        self._frames = frames
+        self._timestamps = timestamps
+        self._capacity = capacity
+
+    def write(self, frame: np.ndarray, timestamp: float):
+        """
+        Add a frame to the end of the recording
+
+        :param frame: an (H, W, 3) array of uint8, the frame to record. Every
+            frame must have the same shape
+        :param timestamp: a float, the time in seconds the frame was captured
+        """
+        if self._frames is None:
+            self._allocate(frame.shape, self._capacity)
+        elif frame.shape != self._frames.shape[1:]:
+            raise ValueError(f'Frame of shape {frame.shape} does not match '
+                             f'recording of shape {self._frames.shape[1:]}')
+        elif self._count == self._capacity:
+            self._allocate(frame.shape, 2 * self._capacity)
+        self._frames[self._count] = frame
+        self._timestamps[self._count] = timestamp
+        self._count += 1
+
+    def close(self):
+        """
+        Finish the recording, writing everything to disk
+        """
+        if self._frames is not None:
+            self._frames.flush()
+            timestamps = self._timestamps[:self._count]
+        else:
+            timestamps = np.zeros(0, dtype=np.float64)
+        np.save(os.path.join(self._path, TIMESTAMPS_FILE), timestamps)
+        with open(os.path.join(self._path, META_FILE), 'w') as file:
+            json.dump({'count': self._count}, file)
+
+
+class RecordingSource(FrameSource):
+    """
+    A source that records every frame read from another source
+    """
+    def __init__(self, source: FrameSource, recorder: FrameRecorder):
+        """
+        Set up a new RecordingSource
+
+        :param source: the FrameSource to read frames from
+        :param recorder: the FrameRecorder to record the frames with. It is
+            closed when this source is released
+        """
+        super().__init__()
+        self._source = source
+        self._recorder = recorder
+
+    def is_opened(self) -> bool:
+        return self._source.is_opened()
+
+    def read(self) -> tuple[bool, np.ndarray | None]:
+        ret, frame = self._source.read()
+        self._timestamp = self._source.timestamp
+        if ret:
+            self._recorder.write(frame, self._timestamp)
+        return ret, frame
+
+    def release(self):
+        self._source.release()
+        self._recorder.close()
+
+
+class ReplaySource(FrameSource):
+    """
+    A source playing back a recording
+    """
+    def __init__(self, path: str, realtime: bool = True, loop: bool = False):
+        """
+        Open a recording to play back
+
+        :param path: a str, the directory the recording was written to
+        :param realtime: a bool, whether to wait between frames so they are
+            read as far apart as they were recorded (True), or to give each
+            frame as soon as it is asked for (False)
+        :param loop: a bool, whether to start over after the last frame
+            instead of stopping
+        """
+        super().__init__()
+        with open(os.path.join(path, META_FILE)) as file:
+            count = json.load(file)['count']
+        if count > 0:
+            self._frames = np.load(os.path.join(path, FRAMES_FILE),
+                                   mmap_mode='r')[:count]
+        else:
+            self._frames = np.zeros((0, 0, 0, 3), dtype=np.uint8)
+        self._timestamps = np.load(os.path.join(path, TIMESTAMPS_FILE))
+        self._realtime = realtime
+        self._loop = loop
+        self._index = 0
+        self._start_time = None
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    @property
+    def position(self) -> int:
+        """
+        :return: an int, the index of the next frame to be read
+        """
+        return self._index
+
+    @property
+    def recorded_timestamp(self) -> float:
+        """
+        :return: a float, the time the last frame read was captured at when
+            it was recorded
+        """
+        return float(self._timestamps[max(self._index - 1, 0)])
+
+    def seek(self, index: int):
+        """
+        Choose the next frame to read
+
+        :param index: an int, the index of the frame to read next
+        """
+        if not 0 <= index <= len(self):
+            raise IndexError(f'Frame {index} is not in a recording of '
+                             f'{len(self)} frames')
+        self._index = index
+        self._start_time = None
+
+    def is_opened(self) -> bool:
+        return self._loop or self._index < len(self)
+
+    def read(self) -> tuple[bool, np.ndarray | None]:
+        if self._index == len(self):
+            if not self._loop or len(self) == 0:
+                return False, None
+            self.seek(0)
+        offset = self._timestamps[self._index] - self._timestamps[0]
+        if self._start_time is None:
+            # Line up the frame being read now with the time it was recorded
+            self._start_time = time.perf_counter() - offset
+        if self._realtime:
+            delay = self._start_time + offset - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            self._timestamp = self._start_time + offset
+        else:
+            self._timestamp = time.perf_counter()
+        frame = self._frames[self._index]
+        self._index += 1
+        return True, frame
+
+
+class LandmarkTrace:
+    """
+    The hand landmarks found in each frame of one session
+
+    Each frame is either not recorded yet, recorded as having no hand, or
+    recorded with the landmarks of the hand that was used to move the paddle
+    """
+    _UNKNOWN, _NO_HAND, _HAND = 0, 1, 2
+
+    def __init__(self, landmarks: np.ndarray | None = None,
+                 states: np.ndarray | None = None):
+        """
+        Set up a new LandmarkTrace
+
+        :param landmarks: an (N, 21, 3) array of float32, the landmarks of the
+            hand in each frame, or None to start an empty trace
+        :param states: an (N,) array of int8, whether each frame is unknown,
+            has no hand or has a hand, or None to start an empty trace
+        """
+        if landmarks is None or states is None:
+            landmarks = np.zeros((RECORDING_INITIAL_CAPACITY, 21, 3),
+                                 dtype=np.float32)
+            states = np.zeros(RECORDING_INITIAL_CAPACITY, dtype=np.int8)
+            self._length = 0
+        else:
+            recorded = np.flatnonzero(states != self._UNKNOWN)
+            self._length = int(recorded[-1]) + 1 if len(recorded) else 0
+        self._landmarks = landmarks
+        self._states = states
+
+    def __len__(self) -> int:
+        """
+        :return: an int, one more than the last frame number recorded
+        """
+        return self._length
+
+    def is_recorded(self, frame: int) -> bool:
+        """
+        :param frame: an int, the frame number to check
+        :return: a bool, whether the frame has been recorded
+        """
+        return 0 <= frame < self._length \
+            and self._states[frame] != self._UNKNOWN
+
+    def get(self, frame: int) -> np.ndarray | None:
+        """
+        Find the landmarks recorded for a frame
+
+        :param frame: an int, the frame number to look up
+        :return: a (21, 3) array, the landmarks of the hand in the frame, or
+            None if there was no hand or the frame is not recorded
+        """
+        if not 0 <= frame < self._length \
+                or self._states[frame] != self._HAND:
+            return None
+        return self._landmarks[frame]
+
+    def put(self, frame: int, landmarks: np.ndarray | None):
+        """
+        Record the landmarks found in a frame
+
+        :param frame: an int, the frame number
+        :param landmarks: a (21, 3) array, the landmarks of the hand in the
+            frame, or None if there was no hand
+        """
+        if frame >= len(self._states):
+            capacity = max(2 * len(self._states), frame + 1)
+            grown_landmarks = np.zeros((capacity, 21, 3), dtype=np.float32)
+            grown_states = np.zeros(capacity, dtype=np.int8)
+            grown_landmarks[:self._length] = self._landmarks[:self._length]
+            grown_states[:self._length] = self._states[:self._length]
+            self._landmarks = grown_landmarks
+            self._states = grown_states
+        if landmarks is None:
+            self._states[frame] = self._NO_HAND
+        else:
+            self._states[frame] = self._HAND
+            self._landmarks[frame] = landmarks
+        self._length = max(self._length, frame + 1)
+
+    def save(self, path: str):
+        """
+        Write this trace to a file
+
+        :param path: a str, the path of the .npz file to write
+        """
+        np.savez(path, landmarks=self._landmarks[:self._length],
+                 states=self._states[:self._length])
+
+    @classmethod
+    def load(cls, path: str) -> 'LandmarkTrace':
+        """
+        Read a trace written by save
+
+        :param path: a str, the path of the .npz file to read
+        :return: the LandmarkTrace that was saved
+        """
+        with np.load(path) as data:
+            return cls(data['landmarks'], data['states'])
+
+
+class LandmarkCache:
+    """
+    A directory of LandmarkTraces, one per session
+    """
+    def __init__(self, path: str):
+        """
+        Open a landmark cache
+
+        :param path: a str, the directory holding the cache. It is created if
+            it does not exist
+        """
+        os.makedirs(path, exist_ok=True)
+        self._path = path
+        self._traces: dict[str, LandmarkTrace] = {}
+
+    def _trace_path(self, session: str) -> str:
+        """
+        :param session: a str, the name of a session
+        :return: a str, the path of the file holding that session's trace
+        """
+        return os.path.join(self._path, f'{session}.npz')
+
+    def __contains__(self, session: str) -> bool:
+        return session in self._traces \
+            or os.path.exists(self._trace_path(session))
+
+    def trace(self, session: str) -> LandmarkTrace:
+        """
+        Get the trace of a session, starting an empty one if there is none
+
+        :param session: a str, the name of the session, such as the name of
+            its recording
+        :return: the LandmarkTrace of the session
+        """
+        if session not in self._traces:
+            if os.path.exists(self._trace_path(session)):
+                self._traces[session] = \
+                    LandmarkTrace.load(self._trace_path(session))
+            else:
+                self._traces[session] = LandmarkTrace()
+        return self._traces[session]
+
+    def save(self):
+        """
+        Write every trace that has been used to the cache directory
+        """
+        for session, trace in self._traces.items():
+            trace.save(self._trace_path(session))
@@ -0,0 +1,133 @@
+"""
+A module for keeping the recent states of a game, to go back to them
+"""
+from .constants import *
+from .model import PongModel
+
+
+class RewindBuffer:
+    """
+    Keeps the state of a game at each of its most recent ticks
+
+    The states are packed one after another into a ring of bytes made up
+    front, so recording a tick costs the same however long the game runs and
+    makes no new objects. Once the ring is full, each tick overwrites the
+    oldest one. Going back to a tick forgets the ticks after it, so the game
+    can be played on from there (e.g. to roll back and replay late inputs)
+    """
+    def __init__(self, model: PongModel, capacity: int = REWIND_TICKS,
+                 record_steps: bool = True):
+        """
+        Set up a new RewindBuffer holding the game's current state
+
+        :param model: the PongModel of the game
+        :param capacity: an int, the most ticks to keep
+        :param record_steps: a bool, whether to record the state after every
+            physics step of the model. If False, call record to keep a state
+        """
+        self._model = model
+        self._state_size = model.state_size
+        self._capacity = capacity
+        self._states = bytearray(capacity * self._state_size)
+        self._view = memoryview(self._states)
+        self._ticks = [0] * capacity
+        self._newest = -1  # slot of the newest state
+        self._length = 0
+        self._recording = record_steps
+        if record_steps:
+            model.add_step_listener(self.record)
+        self.record()
+
+    @property
+    def capacity(self) -> int:
+        """
+        :return: an int, the most ticks this buffer keeps
+        """
+        return self._capacity
+
+    def __len__(self) -> int:
+        """
+        :return: an int, the number of ticks kept
+        """
+        return self._length
+
+    @property
+    def oldest_tick(self) -> int:
+        """
+        :return: an int, the earliest tick that can be gone back to
+        """
+        return self._ticks[(self._newest - self._length + 1) % self._capacity]
+
+    @property
+    def newest_tick(self) -> int:
+        """
+        :return: an int, the latest tick kept
+        """
+        return self._ticks[self._newest]
+
+    def close(self):
+        """
+        Stop recording the model's steps
+        """
+        if self._recording:
+            self._model.remove_step_listener(self.record)
+            self._recording = False
+
+    def record(self):
+        """
+        Keep the game's current state, overwriting the oldest if full
+        """
+        self._newest = (self._newest + 1) % self._capacity
+        self._model.pack_state_into(self._states,
+                                    self._newest * self._state_size)
+        self._ticks[self._newest] = self._model.tick
+        if self._length < self._capacity:
+            self._length += 1
+
+    def _slot(self, tick: int) -> int:
+        """
+        :param tick: an int, a tick that is kept
+        :return: an int, the slot holding the tick's state
+        """
+        if not self._length \
+                or not self.oldest_tick <= tick <= self.newest_tick:
+            raise IndexError(f'Tick {tick} is not kept; can go back to ticks '
+                             f'{self.oldest_tick} to {self.newest_tick}')
+        # Ticks are recorded in order, but may skip some if the model was
+        # stepped while not recording, so search back from the newest
+        slot = self._newest
+        for _ in range(self._length):
+            if self._ticks[slot] == tick:
+                return slot
+            if self._ticks[slot] < tick:
+                break
+            slot = (slot - 1) % self._capacity
+        raise IndexError(f'Tick {tick} was not recorded')
+
+    def state_at(self, tick: int) -> bytes:
+        """
+        :param tick: an int, a tick that is kept
+        :return: a bytes, the state of the game at the tick, as given by
+            PongModel.state_bytes
+        """
+        start = self._slot(tick) * self._state_size
+        return bytes(self._view[start:start + self._state_size])
+
+    def restore(self, tick: int):
+        """
+        Put the game back to how it was at a tick, forgetting the ticks after
+
+        :param tick: an int, a tick that is kept
+        """
+        slot = self._slot(tick)
+        self._model.load_state(self._states, slot * self._state_size)
+        self._length -= (self._newest - slot) % self._capacity
+        self._newest = slot
+
+    def rewind(self, ticks: int = 1):
+        """
+        Put the game back a number of ticks, forgetting the ticks after
+
+        :param ticks: an int, the number of ticks to go back
+        """
+        self.restore(self.newest_tick - ticks)
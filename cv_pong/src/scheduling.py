@@ -0,0 +1,126 @@
+"""
+A module for deciding which camera frames to run hand inference on
+"""
+import math
+import cv2
+import numpy as np
+from .constants import *
+
+
+class InferenceScheduler:
+    """
+    Decides which camera frames are worth looking for a hand in
+
+    A hand moves far more slowly than the camera runs, so hand inference only
+    has to run on every few frames. Inference runs every skip-th frame, or
+    sooner when a cheap comparison of small grayscale copies of the frames
+    shows that the image has changed since the last inference, though never
+    on fewer than every min_skip-th frame, so motion alone cannot make it run
+    on every frame. The skip adapts to how long inference takes, so that on a
+    slow CPU inference stays within its share of each frame's time budget
+    """
+    def __init__(self, frame_time: float = 1.0 / FRAME_RATE,
+                 budget_fraction: float = INFERENCE_BUDGET_FRACTION,
+                 min_skip: int = INFERENCE_MIN_SKIP,
+                 max_skip: int = INFERENCE_MAX_SKIP,
+                 motion_size: tuple[int, int] = INFERENCE_MOTION_SIZE,
+                 motion_threshold: float = INFERENCE_MOTION_THRESHOLD):
+        """
+        Set up a new InferenceScheduler
+
+        :param frame_time: a float, the seconds each frame of the game loop
+            has
+        :param budget_fraction: a float, the fraction of frame_time that
+            inference may take on average
+        :param min_skip: an int, the fewest frames per inference, even
+            while the image changes
+        :param max_skip: an int, the most frames per inference, however slow
+            inference is or however still the image is
+        :param motion_size: a tuple of two ints, the width and height of the
+            grayscale copies of frames compared to detect motion
+        :param motion_threshold: a float, the mean change in gray level (out
+            of 255) between those copies that counts as motion
+        """
+        self._budget = frame_time * budget_fraction
+        self._min_skip = min_skip
+        self._max_skip = max_skip
+        self._motion_size = motion_size
+        self.motion_threshold = motion_threshold
+        self._skip = min_skip
+        self._frames_since_inference = 0
+        self._inference_time = None
+        self._small_frame = None
+        self._gray = np.zeros(motion_size[::-1], dtype=np.uint8)
+        self._reference = np.zeros(motion_size[::-1], dtype=np.uint8)
+        self._has_reference = False
+        self._difference = np.zeros(motion_size[::-1], dtype=np.uint8)
+
+    @property
+    def skip(self) -> int:
+        """
+        :return: an int, the number of frames per inference while the image
+            is still
+        """
+        return self._skip
+
+    @property
+    def inference_time(self) -> float | None:
+        """
+        :return: a float, the average seconds one inference takes, or None
+            if inference has not run yet
+        """
+        return self._inference_time
+
+    def motion(self, frame: np.ndarray) -> float:
+        """
+        Measure how much a frame differs from the last one inference ran on
+
+        :param frame: an (H, W, 3) array, a BGR camera frame
+        :return: a float, the mean change in gray level, out of 255, or
+            infinity if inference has not run yet
+        """
+        self._small_frame = cv2.resize(frame, self._motion_size,
+                                       dst=self._small_frame,
+                                       interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self._small_frame, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        if not self._has_reference:
+            return math.inf
+        cv2.absdiff(self._gray, self._reference, dst=self._difference)
+        return cv2.mean(self._difference)[0]
+
+    def should_infer(self, frame: np.ndarray) -> bool:
+        """
+        Decide whether to look for a hand in a frame
+
+        Call once for every frame, and then call inferred if this returns True
+
+        :param frame: an (H, W, 3) array, the BGR camera frame
+        :return: a bool, whether to run hand inference on the frame
+        """
+        self._frames_since_inference += 1
+        if self._has_reference \
+                and self._frames_since_inference < self._min_skip:
+            return False
+        motion = self.motion(frame)
+        if self._frames_since_inference < self._skip \
+                and motion <= self.motion_threshold:
+            return False
+        # Later frames are compared against this one
+        self._gray, self._reference = self._reference, self._gray
+        self._has_reference = True
+        self._frames_since_inference = 0
+        return True
+
+    def inferred(self, seconds: float):
+        """
+        Record how long inference took, and adapt the skip to it
+
+        :param seconds: a float, the seconds the inference took
+        """
+        if self._inference_time is None:
+            self._inference_time = seconds
+        else:
+            self._inference_time += INFERENCE_TIME_SMOOTHING \
+                * (seconds - self._inference_time)
+        needed = math.ceil(self._inference_time / self._budget)
+        self._skip = min(max(needed, self._min_skip), self._max_skip)
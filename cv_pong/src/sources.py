@@ -0,0 +1,602 @@
+"""
+A module defining the sources CVController can read frames from
+
+Besides a camera, frames can come from a video file, a directory of images
+or a generator of synthetic frames, which stand in for a camera in tests and
+benchmarks. A LatestFrameSource wraps any of them to always give the newest
+frame instead of the next one queued
+"""
+import glob
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, NamedTuple
+import numpy as np
+from .constants import *
+
+IMAGE_EXTENSIONS = ('.bmp', '.jpeg', '.jpg', '.png', '.tif', '.tiff')
+
+
+class FrameSource(ABC):
+    """
+    An abstract class representing somewhere to read camera frames from
+    """
+    def __init__(self):
+        """
+        Set up a new FrameSource
+        """
+        self._timestamp = 0.0
+
+    @property
+    def timestamp(self) -> float:
+        """
+        :return: a float, the time.perf_counter time at which the last frame
+            read was captured
+        """
+        return self._timestamp
+
+    @abstractmethod
+    def is_opened(self) -> bool:
+        """
+        :return: a bool, whether frames can be read from this source
+        """
+        pass
+
+    @abstractmethod
+    def read(self) -> tuple[bool, np.ndarray | None]:
+        """
+        Read the next frame
+
+        :return: a tuple containing a bool, whether a frame could be read, and
+            the frame as an (H, W, 3) array in BGR order (or None if no frame
+            could be read)
+        """
+        pass
+
+    def release(self):
+        """
+        Close this source
+        """
+        pass
+
+
+class CaptureSettings(NamedTuple):
+    """
+    What to ask a camera for, each left at the driver's default if None
+    """
+    width: int | None = CAMERA_SIZE[0]
+    height: int | None = CAMERA_SIZE[1]
+    fps: float | None = CAMERA_FPS
+    fourcc: str | None = CAMERA_FOURCC  # pixel format, such as MJPG or YUYV
+    buffer_size: int | None = CAMERA_BUFFER_SIZE  # frames the driver queues
+
+
+def _decode_fourcc(code: float) -> str | None:
+    """
+    :param code: a number, a four letter code packed into an int, as OpenCV
+        gives it
+    :return: a str, the four letters, or None if no code is set
+    """
+    code = int(code)
+    if code <= 0:
+        return None
+    return ''.join(chr((code >> (8 * index)) & 0xFF) for index in range(4))
+
+
+def negotiate_capture(capture, settings: CaptureSettings) -> CaptureSettings:
+    """
+    Ask an open cv2.VideoCapture for the given settings, and find out which
+    it went with
+
+    Drivers pick the nearest mode they support, or ignore settings they do
+    not know, so the settings are read back after being set. The pixel
+    format is set first, as it decides which sizes and frame rates are
+    available, and the size before the frame rate for the same reason
+
+    :param capture: the open cv2.VideoCapture to set up
+    :param settings: the CaptureSettings to ask for
+    :return: the CaptureSettings in effect, with None for any the driver
+        does not report
+    """
+    import cv2
+    if settings.fourcc is not None:
+        capture.set(cv2.CAP_PROP_FOURCC,
+                    cv2.VideoWriter_fourcc(*settings.fourcc))
+    if settings.width is not None:
+        capture.set(cv2.CAP_PROP_FRAME_WIDTH, settings.width)
+    if settings.height is not None:
+        capture.set(cv2.CAP_PROP_FRAME_HEIGHT, settings.height)
+    if settings.fps is not None:
+        capture.set(cv2.CAP_PROP_FPS, settings.fps)
+    if settings.buffer_size is not None:
+        capture.set(cv2.CAP_PROP_BUFFERSIZE, settings.buffer_size)
+    width = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    fps = capture.get(cv2.CAP_PROP_FPS)
+    buffer_size = int(capture.get(cv2.CAP_PROP_BUFFERSIZE))
+    return CaptureSettings(
+        width=width if width > 0 else None,
+        height=height if height > 0 else None,
+        fps=fps if fps > 0 else None,
+        fourcc=_decode_fourcc(capture.get(cv2.CAP_PROP_FOURCC)),
+        buffer_size=buffer_size if buffer_size > 0 else None
+    )
+
+
+class CameraSource(FrameSource):
+    """
+    A source reading frames from a camera (or anything else OpenCV can open)
+
+    The camera is opened the first time it is used rather than when this is
+    made, so that opening it (and importing OpenCV) can happen on the thread
+    that reads from it. Once open, it is asked for the capture settings
+    """
+    def __init__(self, *cam_args,
+                 settings: CaptureSettings | None = CaptureSettings(),
+                 **cam_kwargs):
+        """
+        Set up a new CameraSource
+
+        :param cam_args: the arguments to open the cv2.VideoCapture with, or
+            none to open the default camera
+        :param settings: the CaptureSettings to ask the camera for, or None
+            to leave every setting at the driver's default
+        :param cam_kwargs: the keyword arguments to open the cv2.VideoCapture
+            with
+        """
+        super().__init__()
+        if len(cam_args) == 0 and len(cam_kwargs) == 0:
+            cam_args = (0,)
+        self._cam_args = cam_args
+        self._cam_kwargs = cam_kwargs
+        self._settings = settings
+        self._negotiated = None
+        self._video_capture = None
+
+    @property
+    def negotiated(self) -> CaptureSettings | None:
+        """
+        :return: the CaptureSettings the camera went with, or None if it is
+            not open yet or no settings were asked for
+        """
+        return self._negotiated
+
+    def _capture(self):
+        """
+        :return: the cv2.VideoCapture to read from, opening it if needed
+        """
+        if self._video_capture is None:
+            import cv2
+            capture = cv2.VideoCapture(*self._cam_args, **self._cam_kwargs)
+            if capture.isOpened() and self._settings is not None:
+                self._negotiated = negotiate_capture(capture, self._settings)
+            self._video_capture = capture
+        return self._video_capture
+
+    def is_opened(self) -> bool:
+        return self._capture().isOpened()
+
+    def read(self) -> tuple[bool, np.ndarray | None]:
+        ret, frame = self._capture().read()
+        self._timestamp = time.perf_counter()
+        return ret, frame
+
+    def release(self):
+        if self._video_capture is not None:
+            self._video_capture.release()
+
+
+class _PacedSource(FrameSource):
+    """
+    A source whose frames are meant to come at a steady frame rate
+    """
+    def __init__(self, realtime: bool):
+        """
+        :param realtime: a bool, whether to wait between frames so they are
+            read at the frame rate (True), or to give each frame as soon as
+            it is asked for (False)
+        """
+        super().__init__()
+        self._realtime = realtime
+        self._start_time = None
+        self._frames_read = 0
+
+    def _stamp(self, fps: float):
+        """
+        Wait for the next frame to be due if in realtime, and set its
+        timestamp
+
+        Like a camera that has fallen behind, frames that are already late are
+        given right away, with the time they were due
+
+        :param fps: a float, the frame rate to play at
+        """
+        offset = self._frames_read / fps
+        self._frames_read += 1
+        if self._start_time is None:
+            self._start_time = time.perf_counter() - offset
+        if self._realtime:
+            delay = self._start_time + offset - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            self._timestamp = self._start_time + offset
+        else:
+            self._timestamp = time.perf_counter()
+
+
+class VideoFileSource(_PacedSource):
+    """
+    A source playing a video file, opened lazily like a CameraSource
+    """
+    def __init__(self, path: str, realtime: bool = True, loop: bool = False):
+        """
+        Set up a new VideoFileSource
+
+        :param path: a str, the video file to play
+        :param realtime: a bool, whether to wait between frames so they are
+            read at the frame rate of the video (True), or to give each frame
+            as soon as it is asked for (False)
+        :param loop: a bool, whether to start over after the last frame
+            instead of stopping
+        """
+        super().__init__(realtime)
+        self._path = path
+        self._loop = loop
+        self._video_capture = None
+        self._fps = float(FRAME_RATE)
+        self._position = 0
+        self._ended = False
+
+    @property
+    def fps(self) -> float:
+        """
+        :return: a float, the frame rate of the video, or FRAME_RATE if the
+            video does not say (or is not open yet)
+        """
+        return self._fps
+
+    def _capture(self):
+        """
+        :return: the cv2.VideoCapture to read from, opening it if needed
+        """
+        if self._video_capture is None:
+            import cv2
+            self._video_capture = cv2.VideoCapture(self._path)
+            fps = self._video_capture.get(cv2.CAP_PROP_FPS)
+            if fps > 0:
+                self._fps = fps
+        return self._video_capture
+
+    def is_opened(self) -> bool:
+        return not self._ended and self._capture().isOpened()
+
+    def read(self) -> tuple[bool, np.ndarray | None]:
+        capture = self._capture()
+        ret, frame = capture.read()
+        if not ret and self._loop and self._position > 0:
+            import cv2
+            capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            self._position = 0
+            ret, frame = capture.read()
+        if not ret:
+            self._ended = True
+            return False, None
+        self._position += 1
+        self._stamp(self._fps)
+        return True, frame
+
+    def release(self):
+        if self._video_capture is not None:
+            self._video_capture.release()
+
+
+class ImageSequenceSource(_PacedSource):
+    """
+    A source playing a sequence of image files, one per frame
+    """
+    def __init__(self, path: str, fps: float = FRAME_RATE,
+                 realtime: bool = True, loop: bool = False):
+        """
+        Find the images to play
+
+        :param path: a str, either a directory, whose images are played in
+            name order, or a glob pattern matching the images, such as
+            frames/*.png, also played in name order
+        :param fps: a float, the frame rate to play the images at
+        :param realtime: a bool, whether to wait between frames so they are
+            read at fps (True), or to give each frame as soon as it is asked
+            for (False)
+        :param loop: a bool, whether to start over after the last frame
+            instead of stopping
+        :raises FileNotFoundError: if there are no images at path
+        """
+        super().__init__(realtime)
+        if os.path.isdir(path):
+            files = [os.path.join(path, name) for name in os.listdir(path)
+                     if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS]
+        else:
+            files = glob.glob(path)
+        if len(files) == 0:
+            raise FileNotFoundError(f'No images found at {path}')
+        self._files = sorted(files)
+        self._fps = fps
+        self._loop = loop
+        self._index = 0
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    @property
+    def position(self) -> int:
+        """
+        :return: an int, the index of the next image to be read
+        """
+        return self._index
+
+    def is_opened(self) -> bool:
+        return self._loop or self._index < len(self)
+
+    def read(self) -> tuple[bool, np.ndarray | None]:
+        import cv2
+        if self._index == len(self):
+            if not self._loop:
+                return False, None
+            self._index = 0
+        path = self._files[self._index]
+        frame = cv2.imread(path, cv2.IMREAD_COLOR)
+        if frame is None:
+            raise IOError(f'Could not read image {path}')
+        self._index += 1
+        self._stamp(self._fps)
+        return True, frame
+
+
+class SyntheticSource(_PacedSource):
+    """
+    A source making up frames, standing in for a camera without needing one
+
+    By default, each frame shows a white square going round in a circle on a
+    dark background, once every two seconds. Each frame is a new array, so
+    frames can be held on to after later ones are read
+    """
+    def __init__(self, size: tuple[int, int] = CAMERA_SIZE,
+                 fps: float = CAMERA_FPS, count: int | None = None,
+                 realtime: bool = True,
+                 draw: Callable[[int, np.ndarray], None] | None = None):
+        """
+        Set up a new SyntheticSource
+
+        :param size: a tuple of two ints, the width and height of the frames
+        :param fps: a float, the frame rate to make frames at
+        :param count: an int, the number of frames to make before stopping,
+            or None to never stop
+        :param realtime: a bool, whether to wait between frames so they are
+            read at fps (True), or to give each frame as soon as it is asked
+            for (False)
+        :param draw: a function taking the index of a frame and an (H, W, 3)
+            array of uint8 to draw that BGR frame into, or None to draw the
+            moving square
+        """
+        super().__init__(realtime)
+        self._size = tuple(size)
+        self._fps = fps
+        self._count = count
+        self._draw = draw if draw is not None else self._draw_square
+        self._index = 0
+
+    @property
+    def position(self) -> int:
+        """
+        :return: an int, the index of the next frame to be made
+        """
+        return self._index
+
+    def _draw_square(self, index: int, frame: np.ndarray):
+        """
+        Draw the default frame: a square going round in a circle
+
+        :param index: an int, the index of the frame
+        :param frame: an (H, W, 3) array of uint8 to draw the frame into
+        """
+        height, width = frame.shape[:2]
+        frame[:] = 32
+        angle = np.pi * index / self._fps
+        half = max(int(min(width, height) * SYNTHETIC_SQUARE_SIZE) // 2, 1)
+        center_x = int(width / 2 + (width / 2 - half) / 2 * np.cos(angle))
+        center_y = int(height / 2 + (height / 2 - half) / 2 * np.sin(angle))
+        frame[max(center_y - half, 0):center_y + half,
+              max(center_x - half, 0):center_x + half] = 255
+
+    def is_opened(self) -> bool:
+        return self._count is None or self._index < self._count
+
+    def read(self) -> tuple[bool, np.ndarray | None]:
+        if not self.is_opened():
+            return False, None
+        width, height = self._size
+        frame = np.empty((height, width, 3), dtype=np.uint8)
+        self._draw(self._index, frame)
+        self._index += 1
+        self._stamp(self._fps)
+        return True, frame
+
+
+class LatestFrameSource(FrameSource):
+    """
+    A source that reads another on a thread of its own, and only ever gives
+    the newest frame
+
+    Cameras queue frames up, so a reader that falls behind gets frames that
+    are tens of milliseconds old. Here frames are read as soon as they come,
+    and any not asked for before a newer one comes are dropped, so each
+    frame read is as fresh as it can be. Reading waits for a frame newer
+    than the last one read
+
+    Frames are held on to while newer ones are read, so the wrapped source
+    must not reuse its arrays. None of the sources in this module do
+    """
+    def __init__(self, source: FrameSource):
+        """
+        Set up a new LatestFrameSource. The thread is started the first time
+        this is used, so that the wrapped source is opened on it
+
+        :param source: the FrameSource to read from. It is released when this
+            source is released
+        """
+        super().__init__()
+        self._source = source
+        self._condition = threading.Condition()
+        self._frame = None
+        self._frame_timestamp = 0.0
+        self._sequence = 0  # the number of frames grabbed
+        self._read_sequence = 0  # the sequence of the frame read last
+        self._dropped = 0
+        self._ended = False
+        self._error = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def source(self) -> FrameSource:
+        """
+        :return: the FrameSource being read from
+        """
+        return self._source
+
+    @property
+    def dropped(self) -> int:
+        """
+        :return: an int, the number of frames read from the wrapped source
+            that were never given out, as a newer one came first
+        """
+        return self._dropped
+
+    def _start(self):
+        """
+        Start reading from the wrapped source, if not started already
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run,
+                                            name='cv-latest-frame',
+                                            daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        """
+        Read frames until the wrapped source runs out or this is released
+
+        If the wrapped source fails, the error is kept to be raised by read
+        """
+        source = self._source
+        try:
+            while not self._stop_event.is_set() and source.is_opened():
+                ret, frame = source.read()
+                if not ret:
+                    break
+                with self._condition:
+                    self._frame = frame
+                    self._frame_timestamp = source.timestamp
+                    self._sequence += 1
+                    self._condition.notify()
+        except Exception as error:
+            self._error = error
+        with self._condition:
+            self._ended = True
+            self._condition.notify()
+
+    def is_opened(self) -> bool:
+        self._start()
+        with self._condition:
+            return not self._ended or self._sequence > self._read_sequence
+
+    def read(self) -> tuple[bool, np.ndarray | None]:
+        self._start()
+        with self._condition:
+            while self._sequence == self._read_sequence and not self._ended:
+                self._condition.wait()
+            if self._sequence == self._read_sequence:
+                if self._error is not None:
+                    raise self._error
+                return False, None
+            self._dropped += self._sequence - self._read_sequence - 1
+            self._read_sequence = self._sequence
+            self._timestamp = self._frame_timestamp
+            return True, self._frame
+
+    def release(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._source.release()
+
+
+class ArraySource(FrameSource):
+    """
+    A source playing frames held in an array, as fast as they are read
+    """
+    def __init__(self, frames: np.ndarray, loop: bool = False):
+        """
+        Set up a new ArraySource
+
+        :param frames: an (N, H, W, 3) array, the BGR frames to play
+        :param loop: a bool, whether to start over after the last frame
+            instead of stopping
+        """
+        super().__init__()
+        self._frames = frames
+        self._loop = loop
+        self._index = 0
+
+    def is_opened(self) -> bool:
+        return self._loop or self._index < len(self._frames)
+
+    def read(self) -> tuple[bool, np.ndarray | None]:
+        if self._index == len(self._frames):
+            if not self._loop or len(self._frames) == 0:
+                return False, None
+            self._index = 0
+        frame = self._frames[self._index]
+        self._index += 1
+        self._timestamp = time.perf_counter()
+        return True, frame
+
+
+def make_source(name: str, settings: CaptureSettings | None =
+                CaptureSettings(), latest_only: bool = CAMERA_LATEST_ONLY,
+                realtime: bool = True) -> FrameSource:
+    """
+    Make the source named on the command line
+
+    :param name: a str, either the index of a camera, synthetic for made up
+        frames, synthetic-hand for frames of a hand moving up and down (see
+        SyntheticHandSource), a directory of images or a glob pattern
+        matching images, a video file, or anything else OpenCV can open as a
+        camera (such as a device path or stream URL)
+    :param settings: the CaptureSettings to ask a camera for, or None to
+        leave it at the driver's defaults. For synthetic frames, only the size
+        and frame rate are used
+    :param latest_only: a bool, whether to only ever read the newest frame
+        from a camera (see LatestFrameSource). Files and synthetic frames
+        are always read in order
+    :param realtime: a bool, whether files and synthetic frames are read at
+        their frame rate (True) or as soon as they are asked for (False)
+    :return: the FrameSource
+    """
+    if name in ('synthetic', 'synthetic-hand'):
+        settings = settings if settings is not None else CaptureSettings()
+        size = (settings.width or CAMERA_SIZE[0],
+                settings.height or CAMERA_SIZE[1])
+        fps = settings.fps or CAMERA_FPS
+        if name == 'synthetic':
+            return SyntheticSource(size, fps, realtime=realtime)
+        # Drawing hands needs OpenCV, so only import it when asked
+        from .synthetic import SyntheticHandSource
+        return SyntheticHandSource(size=size, fps=fps, realtime=realtime)
+    if os.path.isdir(name) or any(char in name for char in '*?['):
+        return ImageSequenceSource(name, realtime=realtime)
+    if os.path.isfile(name):
+        return VideoFileSource(name, realtime=realtime)
+    camera = int(name) if name.isdigit() else name
+    source = CameraSource(camera, settings=settings)
+    return LatestFrameSource(source) if latest_only else source
@@ -0,0 +1,262 @@
+"""
+A module for making camera frames of a hand moving along a scripted path,
+where the landmarks of the hand in every frame are known exactly
+
+This stands in for a camera and a player when testing and benchmarking
+CVController: comparing where the paddle goes with where the hand was shows
+how closely and how far behind each controller mode follows the hand, and
+the frames come as fast as they are asked for. The hand is drawn rather
+than photographed, as an open right hand with its palm to the camera, which
+MediaPipe finds reliably when tracking a single hand
+
+Positions are normalized to the frame, as landmarks are, and are in the
+camera's view, before the feed is mirrored for the player
+"""
+from typing import Callable
+import cv2
+import numpy as np
+from .constants import *
+from .sources import SyntheticSource
+
+# The x and y of each landmark of an open right hand, palm to the camera and
+# fingers up, in hand lengths (wrist to middle fingertip) from the wrist
+HAND_TEMPLATE = np.array([
+    (0.0, 0.0),
+    (-0.176, -0.094), (-0.318, -0.212), (-0.424, -0.329), (-0.506, -0.435),
+    (-0.118, -0.494), (-0.141, -0.682), (-0.153, -0.812), (-0.165, -0.929),
+    (0.0, -0.518), (0.0, -0.729), (0.0, -0.871), (0.0, -1.0),
+    (0.106, -0.482), (0.129, -0.671), (0.141, -0.800), (0.153, -0.906),
+    (0.200, -0.424), (0.247, -0.565), (0.271, -0.659), (0.294, -0.753),
+], dtype=np.float32)
+# The middle of the hand, as assign_hands finds it
+_MID_HAND = (HAND_TEMPLATE[0] + HAND_TEMPLATE[9]) / 2
+# The landmarks along each finger, from the thumb, and their widths in hand
+# lengths
+_FINGERS = ((1, 2, 3, 4), (5, 6, 7, 8), (9, 10, 11, 12), (13, 14, 15, 16),
+            (17, 18, 19, 20))
+_FINGER_WIDTHS = (0.15, 0.12, 0.12, 0.11, 0.10)
+_PALM = (1, 2, 5, 9, 13, 17)
+_SHIFT = 4  # bits of sub-pixel precision to draw with
+
+# A trajectory gives the x and y of the middle of the hand at a time in
+# seconds
+Trajectory = Callable[[float], tuple[float, float]]
+
+
+def still(x: float = 0.5, y: float = 0.5) -> Trajectory:
+    """
+    :param x: a float, the x position of the hand
+    :param y: a float, the y position of the hand
+    :return: the Trajectory of a hand that does not move
+    """
+    return lambda seconds: (x, y)
+
+
+def oscillate(x: float = 0.5, y: float = 0.5, amplitude: float = 0.3,
+              period: float = 2.0) -> Trajectory:
+    """
+    :param x: a float, the x position of the hand
+    :param y: a float, the y position the hand moves about
+    :param amplitude: a float, the furthest the hand goes above and below y
+    :param period: a float, the seconds to go up and down once
+    :return: the Trajectory of a hand moving smoothly up and down, like a
+        player following the ball
+    """
+    return lambda seconds: (x, y + amplitude * np.sin(2 * np.pi * seconds
+                                                      / period))
+
+
+def waypoints(points: list[tuple[float, float, float]]) -> Trajectory:
+    """
+    :param points: a list of tuples of three floats, the time in seconds and
+        the x and y position the hand is at then, in order of time
+    :return: the Trajectory of a hand moving in a straight line from each
+        point to the next, which stays at the first point before it and the
+        last point after it
+    """
+    times, xs, ys = (np.array(values, dtype=np.float64)
+                     for values in zip(*points))
+    return lambda seconds: (float(np.interp(seconds, times, xs)),
+                            float(np.interp(seconds, times, ys)))
+
+
+def hand_landmarks(x: float, y: float, frame_size: tuple[int, int],
+                   hand_size: float = SYNTHETIC_HAND_SIZE) -> np.ndarray:
+    """
+    Find where the landmarks of the drawn hand are
+
+    :param x: a float, the x position of the middle of the hand
+    :param y: a float, the y position of the middle of the hand
+    :param frame_size: a tuple of two ints, the width and height of the frame
+    :param hand_size: a float, the length of the hand from the wrist to the
+        middle fingertip, as a fraction of the frame height
+    :return: a (21, 3) array of float32, the landmarks of the hand
+        normalized to the frame, as HandDetector gives them, with z as 0
+    """
+    width, height = frame_size
+    landmarks = np.zeros((21, 3), dtype=np.float32)
+    offsets = (HAND_TEMPLATE - _MID_HAND) * hand_size * height
+    landmarks[:, 0] = x + offsets[:, 0] / width
+    landmarks[:, 1] = y + offsets[:, 1] / height
+    return landmarks
+
+
+def draw_synthetic_hand(frame: np.ndarray, landmarks: np.ndarray,
+                        color: tuple[int, int, int] = SYNTHETIC_HAND_COLOR):
+    """
+    Draw a hand, with its forearm, around its landmarks
+
+    Each part is outlined in a darker shade and the finger joints are
+    creased, as MediaPipe finds flat shapes much less reliably
+
+    :param frame: an (H, W, 3) array of uint8, the BGR frame to draw on, in
+        place
+    :param landmarks: the landmarks of the hand, normalized to the frame,
+        such as from hand_landmarks
+    :param color: a tuple of three ints, the BGR color of the skin
+    """
+    height, width = frame.shape[:2]
+    points = landmarks[:, :2] * (width, height)
+    length = float(np.hypot(*(points[12] - points[0])))
+    scale = 1 << _SHIFT
+
+    def fixed(point: np.ndarray) -> tuple[int, int]:
+        return int(round(point[0] * scale)), int(round(point[1] * scale))
+
+    def thickness(hand_lengths: float) -> int:
+        return max(int(hand_lengths * length), 1)
+
+    light = tuple(float(value) for value in color)
+    middle = tuple(0.85 * value for value in light)
+    dark = tuple(0.7 * value for value in light)
+    down = (points[0] - points[9]) / np.hypot(*(points[0] - points[9]))
+    across = np.array((-down[1], down[0]))  # toward the thumb
+
+    elbow = points[0] + 0.7 * length * down
+    cv2.line(frame, fixed(points[0]), fixed(elbow), dark, thickness(0.3),
+             cv2.LINE_AA, _SHIFT)
+    cv2.line(frame, fixed(points[0]), fixed(elbow), middle, thickness(0.24),
+             cv2.LINE_AA, _SHIFT)
+
+    wrist = points[0] + 0.02 * length * down
+    palm = np.array([wrist + 0.15 * length * across,
+                     *points[list(_PALM)],
+                     wrist - 0.15 * length * across])
+    outline = [np.round(palm * scale).astype(np.int32)]
+    cv2.fillPoly(frame, outline, middle, cv2.LINE_AA, _SHIFT)
+    cv2.polylines(frame, outline, True, dark, thickness(0.024), cv2.LINE_AA,
+                  _SHIFT)
+    center = palm.mean(axis=0)
+    inner = [np.round(((palm - center) * 0.7 + center) * scale)
+             .astype(np.int32)]
+    cv2.fillPoly(frame, inner, light, cv2.LINE_AA, _SHIFT)
+
+    for finger, finger_width in zip(_FINGERS, _FINGER_WIDTHS):
+        bones = list(zip(finger, finger[1:]))
+        for shade, fraction in ((dark, 1.0), (light, 0.6)):
+            for start, end in bones:
+                cv2.line(frame, fixed(points[start]), fixed(points[end]),
+                         shade, thickness(finger_width * fraction),
+                         cv2.LINE_AA, _SHIFT)
+        for joint in finger[1:-1]:
+            along = points[joint + 1] - points[joint - 1]
+            crease = np.array((-along[1], along[0])) / np.hypot(*along) \
+                * 0.4 * finger_width * length
+            cv2.line(frame, fixed(points[joint] - crease),
+                     fixed(points[joint] + crease), dark,
+                     thickness(0.08 * finger_width), cv2.LINE_AA, _SHIFT)
+
+
+class SyntheticHandSource(SyntheticSource):
+    """
+    A source of frames showing a hand moving along a trajectory
+
+    Frame i shows the hand where the trajectory has it i / fps seconds in,
+    however fast frames are read, so the same frames come out every run and
+    landmarks_at gives the truth for any of them
+    """
+    def __init__(self, trajectory: Trajectory | None = None,
+                 size: tuple[int, int] = CAMERA_SIZE,
+                 fps: float = CAMERA_FPS, count: int | None = None,
+                 realtime: bool = True,
+                 hand_size: float = SYNTHETIC_HAND_SIZE,
+                 background: np.ndarray | tuple[int, int, int] =
+                 SYNTHETIC_BACKGROUND_COLOR,
+                 noise: int = SYNTHETIC_NOISE, seed: int = 0):
+        """
+        Set up a new SyntheticHandSource
+
+        :param trajectory: the Trajectory of the middle of the hand, or None
+            to move it up and down (see oscillate)
+        :param size: a tuple of two ints, the width and height of the frames
+        :param fps: a float, the frame rate to make frames at
+        :param count: an int, the number of frames to make before stopping,
+            or None to never stop
+        :param realtime: a bool, whether to wait between frames so they are
+            read at fps (True), or to give each frame as soon as it is asked
+            for (False)
+        :param hand_size: a float, the length of the hand from the wrist to
+            the middle fingertip, as a fraction of the frame height
+        :param background: a tuple of three ints, the BGR color behind the
+            hand, or an (H, W, 3) array of uint8, a BGR image to draw the
+            hand onto, which is resized to the frames
+        :param noise: an int, the most to add to each pixel value as sensor
+            noise, or 0 for none
+        :param seed: an int, the seed for the noise
+        """
+        super().__init__(size, fps, count, realtime, draw=self._draw_hand)
+        self._trajectory = trajectory if trajectory is not None \
+            else oscillate()
+        self._hand_size = hand_size
+        width, height = self._size
+        if isinstance(background, np.ndarray):
+            self._background = cv2.resize(background, (width, height))
+        else:
+            self._background = np.empty((height, width, 3), dtype=np.uint8)
+            self._background[:] = background
+        self._noise = None
+        if noise > 0:
+            rng = np.random.default_rng(seed)
+            self._noise = rng.integers(
+                0, noise + 1, (SYNTHETIC_NOISE_LAYERS, height, width, 3),
+                dtype=np.uint8
+            )
+
+    def position_at(self, index: int) -> tuple[float, float]:
+        """
+        :param index: an int, the index of a frame
+        :return: a tuple of two floats, the x and y of the middle of the hand
+            in that frame
+        """
+        x, y = self._trajectory(index / self._fps)
+        return float(x), float(y)
+
+    def landmarks_at(self, index: int) -> np.ndarray:
+        """
+        :param index: an int, the index of a frame
+        :return: a (21, 3) array of float32, the landmarks of the hand in
+            that frame (see hand_landmarks)
+        """
+        return hand_landmarks(*self.position_at(index), self._size,
+                              self._hand_size)
+
+    def paddle_location_at(self, index: int) -> int:
+        """
+        :param index: an int, the index of a frame
+        :return: an int, the y-pixel coordinate a one-player game moves the
+            paddle to for the hand in that frame (see assign_hands), before
+            the paddle is kept inside the court
+        """
+        return int(self.position_at(index)[1] * WINDOW_HEIGHT)
+
+    def _draw_hand(self, index: int, frame: np.ndarray):
+        """
+        Draw the background, the hand where it is in a frame, and the noise
+
+        :param index: an int, the index of the frame
+        :param frame: an (H, W, 3) array of uint8 to draw the frame into
+        """
+        np.copyto(frame, self._background)
+        draw_synthetic_hand(frame, self.landmarks_at(index))
+        if self._noise is not None:
+            cv2.add(frame, self._noise[index % len(self._noise)], frame)
@@ -77,9 +77,184 @@ def do_rects_intersect(rect1: RectTuple, rect2: RectTuple) -> bool:
     :param rect2: the second rectangle to check for intersection with
     :return: True if the rectangles intersect, False otherwise
     """
-    rect1x = range(rect1[0], rect1[0] + rect1[2])
-    rect1y = range(rect1[1], rect1[1] + rect1[3])
-    rect2x = range(rect2[0], rect2[0] + rect2[2])
-    rect2y = range(rect2[1], rect2[1] + rect2[3])
-    return do_ranges_overlap(rect1x, rect2x) \
-        and do_ranges_overlap(rect1y, rect2y)
+    return do_intervals_overlap(rect1[0], rect1[0] + rect1[2],
+                                rect2[0], rect2[0] + rect2[2]) \
+        and do_intervals_overlap(rect1[1], rect1[1] + rect1[3],
+                                 rect2[1], rect2[1] + rect2[3])
+
+
+def do_intervals_overlap(start1: int, stop1: int, start2: int,
+                         stop2: int) -> bool:
+    """
+    Calculate if two intervals overlap, without making range objects
+
+    Both bounds are inclusive, as in do_ranges_overlap, and each interval is
+    assumed to be increasing (i.e. start <= stop)
+
+    :param start1: an int, the start of the first interval
+    :param stop1: an int, the stop of the first interval
+    :param start2: an int, the start of the second interval
+    :param stop2: an int, the stop of the second interval
+    :return: True if the intervals overlap, False otherwise
+    """
+    return start1 <= stop2 and start2 <= stop1
+
+
+class Vec2:
+    """
+    A 2D vector that can be changed in place
+
+    Using one Vec2 for a position that moves every frame, rather than making
+    a new tuple each time, saves making an object per frame
+    """
+    __slots__ = ('x', 'y')
+
+    def __init__(self, x: float | int = 0, y: float | int = 0):
+        """
+        Make a new Vec2
+
+        :param x: the x component
+        :param y: the y component
+        """
+        self.x = x
+        self.y = y
+
+    def set(self, x: float | int, y: float | int) -> 'Vec2':
+        """
+        Change both components
+
+        :param x: the new x component
+        :param y: the new y component
+        :return: this Vec2
+        """
+        self.x = x
+        self.y = y
+        return self
+
+    def __iadd__(self, other: 'Vec2') -> 'Vec2':
+        """
+        :param other: the Vec2 to add to this one, in place
+        :return: this Vec2
+        """
+        self.x += other.x
+        self.y += other.y
+        return self
+
+    def __isub__(self, other: 'Vec2') -> 'Vec2':
+        """
+        :param other: the Vec2 to subtract from this one, in place
+        :return: this Vec2
+        """
+        self.x -= other.x
+        self.y -= other.y
+        return self
+
+    def __iter__(self):
+        """
+        :return: an iterator over x then y, so a Vec2 unpacks like a tuple
+        """
+        yield self.x
+        yield self.y
+
+    def __eq__(self, other: object) -> bool:
+        """
+        :param other: a Vec2 or a tuple of two numbers
+        :return: True if other has the same components, False otherwise
+        """
+        if isinstance(other, Vec2):
+            return self.x == other.x and self.y == other.y
+        if isinstance(other, tuple):
+            return other == (self.x, self.y)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f'Vec2({self.x!r}, {self.y!r})'
+
+
+class Rect:
+    """
+    A rectangle that can be changed in place, laid out like a RectTuple
+
+    Borders are inclusive, as in do_rects_intersect
+    """
+    __slots__ = ('left', 'top', 'width', 'height')
+
+    def __init__(self, left: int = 0, top: int = 0, width: int = 0,
+                 height: int = 0):
+        """
+        Make a new Rect
+
+        :param left: an int, the left position coordinate (positive to right)
+        :param top: an int, the top position (positive down)
+        :param width: an int, the width
+        :param height: an int, the height
+        """
+        self.left = left
+        self.top = top
+        self.width = width
+        self.height = height
+
+    @property
+    def right(self) -> int:
+        """
+        :return: an int, the right border
+        """
+        return self.left + self.width
+
+    @property
+    def bottom(self) -> int:
+        """
+        :return: an int, the bottom border
+        """
+        return self.top + self.height
+
+    def update(self, left: int, top: int, width: int, height: int) -> 'Rect':
+        """
+        Change the whole rectangle
+
+        :param left: an int, the new left position coordinate
+        :param top: an int, the new top position
+        :param width: an int, the new width
+        :param height: an int, the new height
+        :return: this Rect
+        """
+        self.left = left
+        self.top = top
+        self.width = width
+        self.height = height
+        return self
+
+    def intersects(self, other: 'Rect') -> bool:
+        """
+        Determine whether this rectangle intersects another, the same as
+        do_rects_intersect
+
+        :param other: the Rect to check for intersection with
+        :return: True if the rectangles intersect, False otherwise
+        """
+        return self.left <= other.left + other.width \
+            and other.left <= self.left + self.width \
+            and self.top <= other.top + other.height \
+            and other.top <= self.top + self.height
+
+    def __iter__(self):
+        """
+        :return: an iterator over left, top, width and height, so a Rect
+            unpacks like a RectTuple
+        """
+        yield self.left
+        yield self.top
+        yield self.width
+        yield self.height
+
+    def __eq__(self, other: object) -> bool:
+        """
+        :param other: a Rect or a RectTuple
+        :return: True if other is the same rectangle, False otherwise
+        """
+        if isinstance(other, (Rect, tuple)):
+            return tuple(self) == tuple(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f'Rect{tuple(self)!r}'
@@ -2,13 +2,79 @@
 A module defining different views for the Pong game
 """
 from abc import ABC, abstractmethod
+from functools import cache, lru_cache
+import numpy as np
 import pygame
 from .constants import *
 from .controller import CVController
-from .model import PongModel
+from .model import LEFT, PongModel
+from .profiling import FrameTimer
 from .utils import *
 
 
+@cache
+def get_score_font() -> pygame.font.Font:
+    """
+    Get the font to draw the score in, creating it the first time
+
+    :return: a pygame Font, the font to draw the score in
+    """
+    pygame.font.init()
+    return pygame.font.SysFont(SCORE_FONT_NAME, SCORE_FONT_SIZE, True)
+
+
+@cache
+def get_timing_font() -> pygame.font.Font:
+    """
+    Get the font to draw the timing overlay in, creating it the first time
+
+    :return: a pygame Font, the font to draw frame timings in
+    """
+    pygame.font.init()
+    return pygame.font.SysFont(SCORE_FONT_NAME, TIMING_FONT_SIZE)
+
+
+@lru_cache(maxsize=SCORE_CACHE_SIZE)
+def render_score(text: str) -> tuple[pygame.Surface, pygame.Rect]:
+    """
+    Render a score, reusing the result for recently rendered scores
+
+    The returned Surface and Rect are shared, so must not be changed
+
+    :param text: a str, the score to render (see score_text)
+    :return: a tuple containing the pygame Surface with the score drawn on it
+        and the pygame Rect giving where to draw it on the screen
+    """
+    score = get_score_font().render(text, True, SCORE_COLOR)
+    return score, score.get_rect(midtop=SCORE_TOP_CENTER)
+
+
+def score_text(model: PongModel) -> str:
+    """
+    Write out the scores of a game
+
+    :param model: the PongModel of the game
+    :return: a str, the score of the only player, or the scores of the
+        players on the left and then on the right, each side's top to bottom
+    """
+    if model.num_players == 1:
+        return str(model.points)
+    sides = ([], [])
+    for player, points in enumerate(model.scores):
+        sides[model.paddle_side(player) != LEFT].append(str(points))
+    return f'{" / ".join(sides[0])}  :  {" / ".join(sides[1])}'
+
+
+WALL_RECTS = (
+    pygame.Rect(0, 0, WINDOW_WIDTH, WALL_THICKNESS),  # top
+    pygame.Rect(0, 0, WALL_THICKNESS, WINDOW_HEIGHT),  # left
+    pygame.Rect(0, WINDOW_HEIGHT - WALL_THICKNESS,
+                WINDOW_WIDTH, WALL_THICKNESS),  # bottom
+)
+# With more than one player, the left side is open for a paddle
+MULTIPLAYER_WALL_RECTS = (WALL_RECTS[0], WALL_RECTS[2])
+
+
 class PongView(ABC):
     """
     An abstract class representing a viewer for Pong
@@ -36,7 +102,11 @@ class PygameView(PongView):
     def __init__(self,
                  model: PongModel,
                  screen: pygame.Surface,
-                 controller: CVController | None = None):
+                 controller: CVController | None = None,
+                 timer: FrameTimer | None = None,
+                 show_timings: bool = False,
+                 dirty_rects: bool = False,
+                 offscreen: bool = False):
         """
         Sets up a new PygameView
 
@@ -44,57 +114,192 @@ class PygameView(PongView):
         :param screen: the pygame Surface to draw the game on
         :param controller: the CVController which holds the live camera feed
             to display as a background, or None to not display camera feed
+        :param timer: the FrameTimer to record how long drawing takes in, or
+            None to not time drawing
+        :param show_timings: a bool, whether to draw the rolling percentiles
+            of every stage in timer over the game
+        :param dirty_rects: a bool, whether to only redraw and update the
+            parts of the screen that changed since the last frame, instead of
+            the whole screen. Needs a static background, so cannot be used
+            with the camera feed
+        :param offscreen: a bool, whether screen is a Surface of its own
+            rather than the display, in which case drawing does not update
+            the display, so no window is needed
         """
         super().__init__(model)
+        if dirty_rects and controller is not None:
+            raise ValueError('Dirty rectangle rendering cannot be used with '
+                             'the camera feed as the background')
         self._screen = screen
         self._cv_controller = controller
+        self._timer = timer if timer is not None else FrameTimer()
+        self._show_timings = show_timings
+        self._timing_overlay = None
+        self._frames_since_overlay = 0
+        # Surfaces sharing memory with each of the controller's preview
+        # buffers, keyed by the id of the buffer. The buffer is kept with its
+        # Surface, so its id cannot be reused by another array
+        self._preview_surfaces: dict[int, tuple[np.ndarray,
+                                                pygame.Surface]] = {}
+        self._dirty_rects = dirty_rects
+        self._offscreen = offscreen
+        self._background = None
+        if model.num_players == 1:
+            self._walls = WALL_RECTS
+            self._court_left = WALL_THICKNESS
+        else:
+            self._walls = MULTIPLAYER_WALL_RECTS
+            self._court_left = 0
+        self._court_overlay = None
+        if controller is not None:
+            self._court_overlay = pygame.Surface(
+                (WINDOW_WIDTH - self._court_left,
+                 WINDOW_HEIGHT - 2 * WALL_THICKNESS),
+                pygame.SRCALPHA
+            )
+            self._court_overlay.fill(BACKGROUND_COLOR_TRANSPARENT)
+        # Where the ball, paddles, score and timing overlay are drawn. There
+        # are two sets, used on alternate frames, so that in dirty rectangle
+        # mode last frame's set says what needs covering up
+        num_pieces = model.num_players + (3 if show_timings else 2)
+        self._piece_rects = [[pygame.Rect(0, 0, 0, 0)
+                              for _ in range(num_pieces)] for _ in range(2)]
+        self._current_rects = 0
+        self._first_frame = True
 
     def draw(self):
-        # Draw camera feed
-        draw_cam_feed = self._cv_controller is not None
-        if draw_cam_feed:
-            frame = self._cv_controller.camera_frame
-            image = pygame.pixelcopy.make_surface(frame)
-            self._screen.blit(image, (0, 0))
+        with self._timer.stage('draw'):
+            if self._dirty_rects:
+                changed = self._draw_changes()
+            else:
+                self._draw_background()
+                self._draw_pieces(self._piece_rects[0])
+        if self._offscreen:
+            return
+        with self._timer.stage('flip'):
+            if self._dirty_rects:
+                pygame.display.update(changed)
+            else:
+                pygame.display.flip()
 
-        # Draw court
-        if draw_cam_feed:
-            court = pygame.Surface(
-                (WINDOW_WIDTH - WALL_THICKNESS,
-                 WINDOW_HEIGHT - 2 * WALL_THICKNESS),
+    def _draw_changes(self) -> list[pygame.Rect]:
+        """
+        Redraw only the moving parts of the game over a cached court
+
+        Everything drawn last frame is covered back up with the court, then
+        everything is drawn in its new place
+
+        :return: a list of pygame Rects, the areas of the screen that changed
+        """
+        last_rects = self._piece_rects[self._current_rects]
+        self._current_rects = 1 - self._current_rects
+        rects = self._piece_rects[self._current_rects]
+        if self._first_frame:
+            self._first_frame = False
+            self._background = pygame.Surface(self._screen.get_size())
+            self._draw_court(self._background)
+            self._screen.blit(self._background, (0, 0))
+            self._draw_pieces(rects)
+            return [self._screen.get_rect()]
+        for rect in last_rects:
+            self._screen.blit(self._background, rect, rect)
+        self._draw_pieces(rects)
+        return last_rects + rects
+
+    def _draw_timings(self, rect: pygame.Rect):
+        """
+        Draw the p50/p95/p99 time of every timed stage in the corner
+
+        The text is only re-rendered every TIMING_OVERLAY_REFRESH frames, so
+        that the overlay itself does not take much of the frame
+
+        :param rect: a pygame Rect, set to the area drawn over
+        """
+        self._frames_since_overlay += 1
+        if self._timing_overlay is None \
+                or self._frames_since_overlay >= TIMING_OVERLAY_REFRESH:
+            self._frames_since_overlay = 0
+            font = get_timing_font()
+            lines = [f'{"stage":<10}{"p50":>7}{"p95":>7}{"p99":>7} ms']
+            for name, stats in self._timer.summary().items():
+                lines.append(f'{name:<10}{stats["p50_ms"]:7.2f}'
+                             f'{stats["p95_ms"]:7.2f}{stats["p99_ms"]:7.2f}')
+            rendered = [font.render(line, True, TIMING_COLOR)
+                        for line in lines]
+            self._timing_overlay = pygame.Surface(
+                (max(line.get_width() for line in rendered),
+                 sum(line.get_height() for line in rendered)),
                 pygame.SRCALPHA
             )
-            court.fill(BACKGROUND_COLOR_TRANSPARENT)
-            self._screen.blit(court, (WALL_THICKNESS, WALL_THICKNESS))
+            self._timing_overlay.fill(BACKGROUND_COLOR_TRANSPARENT)
+            top = 0
+            for line in rendered:
+                self._timing_overlay.blit(line, (0, top))
+                top += line.get_height()
+        self._screen.blit(self._timing_overlay, TIMING_OVERLAY_TOP_LEFT)
+        rect.update(TIMING_OVERLAY_TOP_LEFT, self._timing_overlay.get_size())
+
+    def _draw_background(self):
+        """
+        Draw the camera feed, if shown, and the court
+        """
+        if self._cv_controller is None:
+            self._draw_court(self._screen)
+            return
+
+        with self._cv_controller.preview() as frame:
+            wrapped, image = self._preview_surfaces.get(id(frame),
+                                                        (None, None))
+            if wrapped is not frame:
+                image = pygame.image.frombuffer(frame, WINDOW_SIZE, 'BGR')
+                self._preview_surfaces[id(frame)] = frame, image
+            self._screen.blit(image, (0, 0))
+        self._draw_court(self._screen)
+
+    def _draw_court(self, surface: pygame.Surface):
+        """
+        Draw the court and the walls around it
+
+        If the camera feed is shown, the court is translucent so that the
+        feed shows through it
+
+        :param surface: the pygame Surface to draw the court on
+        """
+        if self._court_overlay is not None:
+            surface.blit(self._court_overlay,
+                         (self._court_left, WALL_THICKNESS))
         else:
-            self._screen.fill(BACKGROUND_COLOR)
-        top_wall = pygame.Rect(0, 0, WINDOW_WIDTH, WALL_THICKNESS)
-        left_wall = pygame.Rect(0, 0, WALL_THICKNESS, WINDOW_HEIGHT)
-        bottom_wall = pygame.Rect(0, WINDOW_HEIGHT - WALL_THICKNESS,
-                                  WINDOW_WIDTH, WALL_THICKNESS)
-        self._screen.fill(WALL_COLOR, top_wall)
-        self._screen.fill(WALL_COLOR, left_wall)
-        self._screen.fill(WALL_COLOR, bottom_wall)
+            surface.fill(BACKGROUND_COLOR)
+        for wall in self._walls:
+            surface.fill(WALL_COLOR, wall)
+
+    def _draw_pieces(self, rects: list[pygame.Rect]):
+        """
+        Draw the ball, paddles, score and timing overlay on the screen
+
+        :param rects: a list of pygame Rects, set to the areas drawn over by
+            the ball, each paddle, the score and (if shown) timing overlay
+        """
+        num_players = self._model.num_players
+        ball_rect = rects[0]
+        score_rect = rects[num_players + 1]
 
         # Draw ball
-        top_left_ball = add_tuples(
-            self._model.ball_pos,
-            scale_tuple((BALL_SIZE, BALL_SIZE), -0.5)
-        )
-        ball_rect = pygame.Rect(int(top_left_ball[0]), int(top_left_ball[1]),
-                                BALL_SIZE, BALL_SIZE)
+        ball_x, ball_y = self._model.ball_pos
+        ball_rect.update(ball_x - BALL_SIZE // 2, ball_y - BALL_SIZE // 2,
+                         BALL_SIZE, BALL_SIZE)
         self._screen.fill(BALL_COLOR, ball_rect)
 
-        # Draw paddle
-        paddle_rect = pygame.Rect(
-            WINDOW_WIDTH - PADDLE_DIST_FROM_EDGE - PADDLE_WIDTH,
-            int(self._model.paddle_location) - PADDLE_HEIGHT // 2,
-            PADDLE_WIDTH, PADDLE_HEIGHT
-        )
-        self._screen.fill(PADDLE_COLOR, paddle_rect)
+        # Draw paddles
+        for player in range(num_players):
+            paddle_rect = rects[player + 1]
+            paddle_rect.update(self._model.paddle_rect(player))
+            self._screen.fill(PADDLE_COLOR, paddle_rect)
 
         # Draw score
-        score = SCORE_FONT.render(str(self._model.points), True, SCORE_COLOR)
-        self._screen.blit(score, score.get_rect(midtop=SCORE_TOP_CENTER))
+        score, where = render_score(score_text(self._model))
+        score_rect.update(where)
+        self._screen.blit(score, score_rect)
 
-        pygame.display.flip()
+        if self._show_timings:
+            self._draw_timings(rects[num_players + 2])
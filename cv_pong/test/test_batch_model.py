@@ -0,0 +1,83 @@
+"""
+Tests for BatchPongModel
+"""
+import numpy as np
+import pytest
+from ..src.batch_model import BatchPongModel
+from ..src.model import PongModel
+from ..src.constants import *
+
+
+NUM_GAMES = 64
+NUM_STEPS = 600
+
+
+def random_games(seed: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Make random starting states for a batch of games
+
+    :param seed: an int, the seed for the random number generator
+    :return: a tuple of three arrays, the ball positions, ball velocities and
+        paddle locations for NUM_GAMES games
+    """
+    rng = np.random.default_rng(seed)
+    ball_pos = np.column_stack((
+        rng.integers(WALL_THICKNESS + BALL_SIZE, WINDOW_WIDTH - 100,
+                     NUM_GAMES),
+        rng.integers(WALL_THICKNESS + BALL_SIZE,
+                     WINDOW_HEIGHT - WALL_THICKNESS - BALL_SIZE, NUM_GAMES)
+    ))
+    ball_vel = rng.uniform(-BALL_MAX_SPEED / 4, BALL_MAX_SPEED / 4,
+                           (NUM_GAMES, 2)).round(1)
+    paddle_location = rng.integers(0, WINDOW_HEIGHT, NUM_GAMES)
+    return ball_pos, ball_vel, paddle_location
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_batch_matches_scalar_model(seed: int):
+    """
+    Test that every game in a batch plays out exactly like a PongModel
+
+    :param seed: an int, the seed for the random starting states and paddle
+        motion
+    """
+    ball_pos, ball_vel, paddle_location = random_games(seed)
+    batch = BatchPongModel(NUM_GAMES, ball_pos, ball_vel, paddle_location)
+    models = [PongModel(tuple(ball_pos[i]), tuple(ball_vel[i]),
+                        int(paddle_location[i])) for i in range(NUM_GAMES)]
+    rng = np.random.default_rng(seed + 100)
+    for _ in range(NUM_STEPS):
+        paddles = rng.integers(0, WINDOW_HEIGHT, NUM_GAMES)
+        batch.move_paddles(paddles)
+        batch.update()
+        for model, paddle in zip(models, paddles):
+            model.move_paddle(int(paddle))
+            model.update()
+
+    assert batch.ball_pos.tolist() == [list(m.ball_pos) for m in models]
+    assert batch.ball_vel.tolist() == [list(m.ball_vel) for m in models]
+    assert batch.paddle_location.tolist() \
+        == [m.paddle_location for m in models]
+    assert batch.points.tolist() == [m.points for m in models]
+
+
+def test_batch_paddle_constrained():
+    """
+    Test that paddles in a batch are kept on the screen
+    """
+    batch = BatchPongModel(3)
+    batch.move_paddles(np.array([-10, WINDOW_HEIGHT // 2, WINDOW_HEIGHT + 10]))
+    min_pos = WALL_THICKNESS + PADDLE_HEIGHT // 2
+    assert batch.paddle_location.tolist() \
+        == [min_pos, WINDOW_HEIGHT // 2, WINDOW_HEIGHT - min_pos]
+
+
+def test_batch_does_not_import_pygame():
+    """
+    Test that the batch model can be used without pygame
+    """
+    import subprocess
+    import sys
+    code = ('import sys; import cv_pong.src.batch_model; '
+            'sys.exit("pygame" in sys.modules)')
+    assert subprocess.run([sys.executable, '-c', code]).returncode == 0
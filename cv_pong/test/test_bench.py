@@ -0,0 +1,79 @@
+"""
+Tests for the benchmark harness and its regression gate
+"""
+import json
+import sys
+import pytest
+from ..bench import __main__ as bench_main
+from ..bench.harness import find_regressions, measure
+
+
+def run_of(seconds: dict[str, float | None]) -> dict:
+    """
+    :param seconds: a dict mapping the name of each benchmark to its seconds
+        per call, or None for a benchmark that does not report one
+    :return: a dict laid out like the output of run_benchmarks
+    """
+    return {'results': {
+        name: {'frames': 10} if value is None
+        else {'seconds_per_call': value}
+        for name, value in seconds.items()
+    }}
+
+
+def test_measure():
+    """
+    Test that every call made is counted, and that the times are in order
+    """
+    calls = []
+    result = measure(lambda: calls.append(None), repeats=3, min_time=0.001)
+    assert result['calls'] % 3 == 0
+    # Calls made to pick how many to time are not counted
+    assert len(calls) > result['calls']
+    assert result['min_seconds_per_call'] <= result['seconds_per_call'] \
+        <= result['max_seconds_per_call']
+    assert result['calls_per_second'] \
+        == pytest.approx(1 / result['seconds_per_call'])
+
+
+def test_find_regressions():
+    """
+    Test that only benchmarks slowed by more than the threshold, and in both
+    runs, are regressions
+    """
+    baseline = run_of({'slower': 1.0, 'a bit slower': 1.0, 'faster': 1.0,
+                       'removed': 1.0, 'untimed': None})
+    current = run_of({'slower': 1.5, 'a bit slower': 1.05, 'faster': 0.5,
+                      'added': 9.0, 'untimed': None})
+    regressions = find_regressions(baseline, current, 0.1)
+    assert len(regressions) == 1
+    assert regressions[0].startswith('slower: +50.0%')
+    assert find_regressions(baseline, current, 0.6) == []
+    assert len(find_regressions(baseline, current, 0.01)) == 2
+
+
+@pytest.mark.parametrize("seconds, status", [(1.5, 1), (1.05, 0), (0.5, 0)])
+def test_compare_sets_exit_status(tmp_path, monkeypatch, seconds: float,
+                                  status: int):
+    """
+    Test that comparing to an earlier run exits with status 1 only when a
+    benchmark regressed
+
+    :param tmp_path: a temporary directory to write the results to
+    :param monkeypatch: the pytest fixture to stand in for the benchmarks
+    :param seconds: a float, the seconds per call of the new run
+    :param status: an int, the exit status expected
+    """
+    baseline = tmp_path / 'old.json'
+    baseline.write_text(json.dumps(run_of({'model.update': 1.0})))
+
+    def run_benchmarks(options, names):
+        return run_of({'model.update': seconds})
+    monkeypatch.setattr(bench_main, 'run_benchmarks', run_benchmarks)
+    monkeypatch.setattr(sys, 'argv', [
+        'bench', '--output', str(tmp_path / 'new.json'),
+        '--compare', str(baseline), '--threshold', '0.1'
+    ])
+    assert bench_main.main() == status
+    with open(tmp_path / 'new.json') as file:
+        assert json.load(file) == run_of({'model.update': seconds})
@@ -0,0 +1,213 @@
+"""
+Tests for turning the hands found in a frame into paddle positions
+"""
+import threading
+import time
+import numpy as np
+import pytest
+from ..src.constants import *
+from ..src.controller import CameraClosedException, CVController, \
+    assign_hands
+from ..src.model import PongModel
+from ..src.recording import LandmarkTrace
+from ..src.sources import SyntheticSource
+from ..src.synthetic import SyntheticHandSource, oscillate, still
+
+
+def hand_at(x: float, y: float) -> np.ndarray:
+    """
+    :param x: a float, the x coordinate of the hand, normalized to the frame
+    :param y: a float, the y coordinate of the hand, normalized to the frame
+    :return: a (21, 3) array, the landmarks of a hand with every landmark at
+        the given point
+    """
+    hand = np.zeros((21, 3), dtype=np.float32)
+    hand[:, 0] = x
+    hand[:, 1] = y
+    return hand
+
+
+def test_single_player_uses_most_confident_hand():
+    """
+    Test that with one player, the last (most confident) hand is used
+    wherever it is
+    """
+    model = PongModel()
+    assert assign_hands(model, []) == [None]
+    assert assign_hands(model, [hand_at(0.9, 0.25), hand_at(0.1, 0.5)]) \
+        == [int(np.float32(0.5) * WINDOW_HEIGHT)]
+
+
+def test_hands_go_to_the_players_they_are_over():
+    """
+    Test that each hand moves the paddle of the player whose part of the
+    mirrored camera feed it is in
+    """
+    model = PongModel(num_players=4)
+    hands = [
+        hand_at(0.75, 0.25),  # shown on the left, top: player 1
+        hand_at(0.25, 0.75),  # shown on the right, bottom: player 2
+        hand_at(0.7, 0.3),  # also player 1, and more confident
+    ]
+    assert assign_hands(model, hands) == [
+        None, int(np.float32(0.3) * WINDOW_HEIGHT),
+        int(np.float32(0.75) * WINDOW_HEIGHT), None
+    ]
+
+
+def trace_of(positions: list[float | None]) -> LandmarkTrace:
+    """
+    :param positions: a list holding the y coordinate of the hand in each
+        frame, normalized to the frame, or None for no hand
+    :return: a LandmarkTrace of a hand at those positions
+    """
+    trace = LandmarkTrace()
+    for frame, y in enumerate(positions):
+        trace.put(frame, None if y is None else hand_at(0.5, y))
+    return trace
+
+
+def test_replayed_trace_moves_paddle():
+    """
+    Test that replaying a trace without a background thread moves the paddle
+    to the hand of one frame per move, and stops when the trace is over
+    """
+    model = PongModel()
+    controller = CVController(model, threaded=False,
+                              landmark_trace=trace_of([0.25, None, 0.5]),
+                              replay_landmarks=True, smoothing=False)
+    controller.initialize()
+    locations = []
+    for _ in range(3):
+        controller.move()
+        locations.append(model.paddle_location)
+    assert locations == [int(np.float32(0.25) * WINDOW_HEIGHT)] * 2 \
+        + [int(np.float32(0.5) * WINDOW_HEIGHT)]
+    with pytest.raises(CameraClosedException):
+        controller.move()
+    controller.close()
+
+
+@pytest.mark.parametrize("smoothing", [False, True])
+def test_paddle_moves_between_inferences(smoothing: bool):
+    """
+    Test that with or without smoothing, frames no hand is looked for in
+    still move the paddle after a moving hand, and that a hand moving all the
+    time is still only looked for every min_skip-th frame
+
+    :param smoothing: a bool, whether to smooth the hand position
+    """
+    model = PongModel()
+    trace = LandmarkTrace()
+    source = SyntheticHandSource(oscillate(period=2.0), realtime=False)
+    controller = CVController(model, threaded=False, landmark_trace=trace,
+                              smoothing=smoothing)
+    controller.initialize(source=source)
+    # Every change counts as motion
+    controller.scheduler.motion_threshold = 0.0
+    locations = [model.paddle_location]
+    for _ in range(30):
+        controller.move()
+        locations.append(model.paddle_location)
+    controller.close()
+    inferred = [frame for frame in range(30) if trace.is_recorded(frame)]
+    assert inferred == list(range(0, 30, INFERENCE_MIN_SKIP))
+    # The paddle has two hands to follow from the second inference on
+    skipped = [frame for frame in range(inferred[1], 30)
+               if frame not in inferred]
+    moved = [frame for frame in skipped
+             if locations[frame + 1] != locations[frame]]
+    assert len(moved) > 0.8 * len(skipped)
+
+
+def test_pool_moves_paddle():
+    """
+    Test that hands found by a worker process move the paddle, once the
+    worker has started
+    """
+    model = PongModel()
+    source = SyntheticHandSource(still(0.5, 0.25), realtime=False)
+    controller = CVController(model, threaded=False, smoothing=False,
+                              inference_processes=1)
+    controller.initialize(source=source)
+    start = model.paddle_location
+    deadline = time.perf_counter() + 60.0
+    try:
+        while model.paddle_location == start:
+            assert time.perf_counter() < deadline, 'timed out'
+            controller.move()
+            time.sleep(0.01)
+    finally:
+        controller.close()
+    assert model.paddle_location \
+        == pytest.approx(source.paddle_location_at(0), abs=10)
+
+
+def test_threaded_trace_replay_is_paced():
+    """
+    Test that a trace replayed on the background thread with no frames plays
+    at the frame rate, instead of running out right away
+    """
+    frames = FRAME_RATE // 4
+    controller = CVController(PongModel(), landmark_trace=trace_of(
+        [0.5] * frames), replay_landmarks=True, smoothing=False)
+    start = time.perf_counter()
+    controller.initialize()
+    time.sleep(0.05)
+    controller.move()
+    with pytest.raises(CameraClosedException):
+        while time.perf_counter() - start < 5.0:
+            controller.move()
+            time.sleep(0.01)
+    assert time.perf_counter() - start > 0.8 * frames / FRAME_RATE
+    controller.close()
+
+
+def capture_threads() -> list[threading.Thread]:
+    """
+    :return: a list of the live background threads of CVControllers
+    """
+    return [thread for thread in threading.enumerate()
+            if thread.name == 'cv-capture']
+
+
+def test_threaded_move_uses_worker_results():
+    """
+    Test that move picks up the hands the background thread finds, and that
+    close stops the thread
+    """
+    model = PongModel()
+    controller = CVController(
+        model, landmark_trace=trace_of([0.25] * 10 * FRAME_RATE),
+        replay_landmarks=True, smoothing=False
+    )
+    controller.initialize(source=SyntheticSource((64, 48), fps=FRAME_RATE))
+    assert len(capture_threads()) == 1
+    deadline = time.perf_counter() + 5.0
+    while controller.input_timestamp is None:
+        assert time.perf_counter() < deadline, 'no hand was published'
+        controller.move()
+        time.sleep(0.005)
+    assert model.paddle_location == int(np.float32(0.25) * WINDOW_HEIGHT)
+    with controller.preview() as frame:
+        assert frame.any()  # the synthetic frame was shown
+    controller.close()
+    assert capture_threads() == []
+
+
+def test_threaded_errors_are_raised_by_move():
+    """
+    Test that an error on the background thread is raised by the next move
+    """
+    def unplug(index: int, frame: np.ndarray):
+        raise IOError('camera unplugged')
+    controller = CVController(PongModel(), landmark_trace=trace_of([0.5]),
+                              replay_landmarks=True)
+    controller.initialize(source=SyntheticSource((64, 48), draw=unplug))
+    with pytest.raises(IOError, match='unplugged'):
+        deadline = time.perf_counter() + 5.0
+        while time.perf_counter() < deadline:
+            controller.move()
+            time.sleep(0.005)
+    controller.close()
+    assert capture_threads() == []
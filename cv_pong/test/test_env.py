@@ -0,0 +1,131 @@
+"""
+Tests for the environments agents are trained in
+"""
+import numpy as np
+import pytest
+from ..src.constants import *
+from ..src.env import OBSERVATION_SIZE, BatchPongEnv, PongEnv
+
+TOP = WALL_THICKNESS  # a paddle moved here cannot reach the middle
+
+
+def test_reset_is_seeded():
+    """
+    Test that an episode starts in the middle, in a direction set by the seed
+    """
+    first, info = PongEnv(seed=3).reset()
+    second, _ = PongEnv().reset(seed=3)
+    assert first.shape == (OBSERVATION_SIZE,)
+    assert first.dtype == np.float32
+    np.testing.assert_array_equal(first, second)
+    assert tuple(first[:2]) == (WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2)
+    assert np.abs(first[2:4]).tolist() == [BALL_INITIAL_SPEED] * 2
+    assert info == {'points': 0, 'tick': 0}
+
+
+def test_rewards_and_termination():
+    """
+    Test that following the ball with the paddle earns points, and that
+    missing it loses a point and ends the episode
+    """
+    env = PongEnv(seed=0)
+    observation, _ = env.reset()
+    total = 0.0
+    for _ in range(2000):
+        observation, reward, terminated, truncated, _ = \
+            env.step(observation[1])
+        total += reward
+        assert not terminated and not truncated
+    assert total > 0
+    for _ in range(2000):
+        observation, reward, terminated, truncated, info = env.step(TOP)
+        total += reward
+        if terminated:
+            break
+    assert terminated and reward == -1.0
+    assert info['points'] == total
+
+
+def test_truncation_and_frame_skip():
+    """
+    Test that an episode is cut off after max_steps, and that each step
+    plays frame_skip physics steps
+    """
+    env = PongEnv(max_steps=5, frame_skip=3, seed=0)
+    env.reset()
+    results = [env.step(WINDOW_HEIGHT // 2) for _ in range(5)]
+    assert [result[3] for result in results] == [False] * 4 + [True]
+    assert results[-1][4]['tick'] == 15
+
+
+def test_pixel_observations():
+    """
+    Test that pixel observations are the drawn game at the asked size
+    """
+    pytest.importorskip('pygame')
+    env = PongEnv(pixels=True, pixel_size=(80, 60), seed=0)
+    observation, _ = env.reset()
+    assert observation.shape == (60, 80, 3)
+    assert observation.dtype == np.uint8
+    # The walls are drawn along the top
+    assert observation[0].min() > 200
+    env.close()
+
+
+def test_batch_steps_every_game():
+    """
+    Test that a batch steps each game, and starts a game again right after
+    its ball is missed
+    """
+    env = BatchPongEnv(64, seed=0)
+    observations, _ = env.reset()
+    assert observations.shape == (64, OBSERVATION_SIZE)
+    follow = np.arange(64) % 2 == 0
+    ended = np.zeros(64, dtype=bool)
+    total = np.zeros(64, dtype=np.float32)
+    for _ in range(1500):
+        actions = np.where(follow, observations[:, 1], TOP)
+        observations, rewards, terminated, truncated, info = \
+            env.step(actions)
+        total += rewards
+        np.testing.assert_array_equal(info['final_points'][terminated],
+                                      total[terminated])
+        total[terminated] = 0
+        ended |= terminated
+        assert not truncated.any()
+        assert (observations[terminated, 0] == WINDOW_WIDTH // 2).all()
+    assert not ended[follow].any()
+    assert ended[~follow].all()
+    assert (total[follow] > 0).all()
+    np.testing.assert_array_equal(info['points'], total)
+
+
+def test_batch_truncation():
+    """
+    Test that every game in a batch is cut off at max_steps and restarted
+    """
+    env = BatchPongEnv(8, max_steps=3, seed=0)
+    env.reset()
+    truncations = [env.step(np.full(8, WINDOW_HEIGHT // 2))[3]
+                   for _ in range(6)]
+    assert [bool(truncated.all()) for truncated in truncations] \
+        == [False, False, True, False, False, True]
+
+
+def test_batch_points_start_over_each_episode():
+    """
+    Test that a game's points and paddle start over with each episode, as in
+    PongEnv
+    """
+    env = BatchPongEnv(4, max_steps=1500, seed=0)
+    observations, _ = env.reset()
+    for _ in range(1500):
+        observations, _, terminated, truncated, info = \
+            env.step(observations[:, 1])
+        assert not terminated.any()
+    assert truncated.all()
+    assert (info['final_points'] > 0).all()
+    assert (info['points'] == 0).all()
+    assert (observations[:, 4] == WINDOW_HEIGHT // 2).all()
+    _, rewards, _, _, info = env.step(np.full(4, TOP))
+    np.testing.assert_array_equal(info['points'], rewards)
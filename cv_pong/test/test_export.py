@@ -0,0 +1,99 @@
+"""
+Tests for drawing games off screen and saving the frames
+"""
+import numpy as np
+import pytest
+from ..src.constants import *
+from ..src.export import FrameWriter, HeadlessRenderer, VideoSink
+from ..src.model import PongModel
+from ..src.recording import FrameRecorder, ReplaySource
+
+
+class ListSink:
+    """
+    A FrameSink keeping copies of the frames in a list
+    """
+    def __init__(self, fail_after: int | None = None):
+        """
+        :param fail_after: an int, the number of frames to take before
+            raising an error, or None to never fail
+        """
+        self.frames = []
+        self.timestamps = []
+        self.closed = False
+        self._fail_after = fail_after
+
+    def write(self, frame: np.ndarray, timestamp: float):
+        if len(self.frames) == self._fail_after:
+            raise IOError('disk full')
+        self.frames.append(frame.copy())
+        self.timestamps.append(timestamp)
+
+    def close(self):
+        self.closed = True
+
+
+def test_renderer_draws_game():
+    """
+    Test that each frame shows the game as it was when drawn, in BGR
+    """
+    model = PongModel(ball_vel=(600.0, 0.0))
+    sink = ListSink()
+    renderer = HeadlessRenderer(model, sink, queue_size=2)
+    for _ in range(20):
+        model.update()
+        renderer.render()
+    renderer.close()
+    assert sink.closed
+    assert renderer.frames == renderer.written == 20
+    assert sink.timestamps == [index / FRAME_RATE for index in range(20)]
+    for frame, step in zip(sink.frames, range(1, 21)):
+        assert frame.shape == (WINDOW_HEIGHT, WINDOW_WIDTH, 3)
+        ball_x = WINDOW_WIDTH // 2 + 10 * step
+        assert (frame[WINDOW_HEIGHT // 2, ball_x] == BALL_COLOR[::-1]).all()
+        assert (frame[WINDOW_HEIGHT // 2, ball_x - BALL_SIZE]
+                == BACKGROUND_COLOR[::-1]).all()
+
+
+def test_renderer_writes_recording(tmp_path):
+    """
+    Test that frames saved to a recording, scaled down, can be replayed
+    """
+    model = PongModel()
+    renderer = HeadlessRenderer(model, FrameRecorder(str(tmp_path)),
+                                frame_size=(160, 120))
+    for _ in range(5):
+        renderer.render()
+    renderer.close()
+    replay = ReplaySource(str(tmp_path), realtime=False)
+    assert len(replay) == 5
+    _, frame = replay.read()
+    assert frame.shape == (120, 160, 3)
+
+
+def test_writer_reports_sink_errors():
+    """
+    Test that an error in the writer thread is raised in the drawing thread,
+    without leaving it waiting for a buffer
+    """
+    writer = FrameWriter(ListSink(fail_after=1), (4, 4, 3), queue_size=1)
+    with pytest.raises(IOError):
+        for index in range(10):
+            writer.submit(writer.acquire(), index)
+    with pytest.raises(IOError):
+        writer.close()
+
+
+def test_video_sink(tmp_path):
+    """
+    Test that a video sink writes every frame
+    """
+    cv2 = pytest.importorskip('cv2')
+    path = str(tmp_path / 'game.avi')
+    sink = VideoSink(path, (160, 120), fourcc='MJPG')
+    for _ in range(3):
+        sink.write(np.zeros((120, 160, 3), dtype=np.uint8), 0.0)
+    sink.close()
+    video = cv2.VideoCapture(path)
+    assert video.get(cv2.CAP_PROP_FRAME_COUNT) == 3
+    video.release()
@@ -0,0 +1,72 @@
+"""
+Tests for smoothing and predicting the paddle position
+"""
+import numpy as np
+import pytest
+from ..src.filters import OneEuroFilter
+
+
+def test_first_value_passes_through():
+    """
+    Test that the filter starts at the first value it is given
+    """
+    paddle_filter = OneEuroFilter()
+    assert paddle_filter.predict(0.0) is None
+    assert paddle_filter.update(300, 1.0) == 300
+    assert paddle_filter.predict(1.05) == 300
+
+
+def test_still_hand_jitter_is_reduced():
+    """
+    Test that noise around a still hand is smoothed out
+    """
+    rng = np.random.default_rng(0)
+    noisy = 300 + rng.normal(0, 5, 300)
+    paddle_filter = OneEuroFilter()
+    filtered = [paddle_filter.update(value, index / 30)
+                for index, value in enumerate(noisy)]
+    assert np.std(filtered[30:]) < np.std(noisy[30:]) / 2
+    assert np.mean(filtered[30:]) == pytest.approx(300, abs=2)
+
+
+@pytest.mark.parametrize("speed", [200.0, 1000.0])
+def test_moving_hand_is_predicted(speed: float):
+    """
+    Test that prediction catches up with a hand moving at a steady speed,
+    where the filtered value alone lags behind
+
+    :param speed: a float, the speed of the hand in pixels per second
+    """
+    paddle_filter = OneEuroFilter(max_prediction=1.0)
+    for index in range(60):
+        paddle_filter.update(speed * index / 30, index / 30)
+    latest = speed * 59 / 30
+    ahead = 0.05
+    predicted = paddle_filter.predict(59 / 30 + ahead)
+    assert latest - paddle_filter.value > 0.01 * speed
+    assert abs(predicted - (latest + speed * ahead)) \
+        < (latest - paddle_filter.value) / 2
+
+
+def test_prediction_is_capped():
+    """
+    Test that prediction stops at max_prediction past the latest value
+    """
+    paddle_filter = OneEuroFilter(max_prediction=0.1)
+    for index in range(30):
+        paddle_filter.update(100.0 * index / 30, index / 30)
+    last = 29 / 30
+    assert paddle_filter.predict(last + 0.1) == paddle_filter.predict(last + 5)
+    assert paddle_filter.predict(last - 1) == paddle_filter.value
+
+
+def test_reset_after_gap():
+    """
+    Test that a hand seen again after a long gap is not smoothed toward
+    where it was before
+    """
+    paddle_filter = OneEuroFilter(reset_after=0.5)
+    for index in range(30):
+        paddle_filter.update(100.0, index / 30)
+    assert paddle_filter.update(500.0, 2.0) == 500.0
+    assert paddle_filter.speed == 0.0
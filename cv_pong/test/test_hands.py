@@ -0,0 +1,84 @@
+"""
+Tests for the region of interest helpers used in hand tracking
+"""
+import numpy as np
+import pytest
+from ..src.hands import hand_bounds, region_around, region_fits
+from ..src.constants import *
+
+
+FRAME_SIZE = (640, 480)
+MIN_REGION = int(HAND_ROI_MIN_SIZE * 480)
+
+
+def test_hand_bounds():
+    """
+    Test that the bounds of a hand contain every landmark
+    """
+    landmarks = np.array([(0.25, 0.5, 0), (0.5, 0.25, 0), (0.3, 0.75, 0)],
+                         dtype=np.float32)
+    assert hand_bounds(landmarks, FRAME_SIZE) == (160, 120, 320, 360)
+
+
+# Each element is a tuple containing:
+# - the left, top, right, bottom of a hand
+# - the region that should be made around it
+REGION_AROUND_CASES = [
+    # Hand in the middle, padded by half its size on each side
+    ((270, 190, 370, 290), (220, 140, 200, 200)),
+    # Small hand gets the smallest region
+    ((315, 235, 325, 245), (320 - MIN_REGION // 2, 240 - MIN_REGION // 2,
+                            MIN_REGION, MIN_REGION)),
+    # Hand near the top left is kept inside the frame
+    ((0, 0, 100, 100), (0, 0, 200, 200)),
+    # Hand near the bottom right is kept inside the frame
+    ((600, 440, 640, 480), (640 - MIN_REGION, 480 - MIN_REGION,
+                            MIN_REGION, MIN_REGION)),
+    # Huge hand is limited to the frame
+    ((0, 0, 640, 480), (80, 0, 480, 480)),
+]
+
+
+@pytest.mark.parametrize("bounds, region", REGION_AROUND_CASES)
+def test_region_around(bounds: tuple[int, int, int, int],
+                       region: tuple[int, int, int, int]):
+    """
+    Test making a region of interest around a hand
+
+    :param bounds: the left, top, right and bottom of the hand in pixels
+    :param region: the left, top, width and height of the expected region
+    """
+    assert region_around(bounds, FRAME_SIZE) == region
+
+
+# Each element is a tuple containing:
+# - a region of interest
+# - the left, top, right, bottom of a hand
+# - a bool, whether the region still suits the hand
+REGION_FITS_CASES = [
+    # Region made around the hand
+    ((220, 140, 200, 200), (270, 190, 370, 290), True),
+    # Hand moved a little
+    ((220, 140, 200, 200), (280, 170, 380, 270), True),
+    # Hand moved near the edge of the region
+    ((220, 140, 200, 200), (310, 190, 410, 290), False),
+    # Hand left the region
+    ((220, 140, 200, 200), (500, 190, 600, 290), False),
+    # Hand at the edge of a region at the edge of the frame
+    ((0, 0, 200, 200), (0, 0, 100, 100), True),
+    # Hand got much smaller
+    ((0, 0, 480, 480), (200, 200, 220, 220), False),
+]
+
+
+@pytest.mark.parametrize("region, bounds, fits", REGION_FITS_CASES)
+def test_region_fits(region: tuple[int, int, int, int],
+                     bounds: tuple[int, int, int, int], fits: bool):
+    """
+    Test deciding whether a region of interest can be kept for a hand
+
+    :param region: the left, top, width and height of the region
+    :param bounds: the left, top, right and bottom of the hand in pixels
+    :param fits: a bool, whether the region should be kept
+    """
+    assert region_fits(region, bounds, FRAME_SIZE) == fits
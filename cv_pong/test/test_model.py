@@ -2,7 +2,7 @@
 Tests for PongModel
 """
 import pytest
-from ..src.model import PongModel
+from ..src.model import LEFT, RIGHT, PongModel, paddle_layout
 from ..src.constants import *
 
 
@@ -159,3 +159,201 @@ def test_point_decrease():
     assert model.points == 0
     model.update()
     assert model.points == -1
+
+
+@pytest.mark.parametrize("frame_rate", [24, 30, 60, 144, 240])
+def test_update_frame_rate_independent(frame_rate: int):
+    """
+    Test that the game plays out the same no matter how often update is called
+
+    :param frame_rate: an int, the number of times per second to call update
+    """
+    reference = PongModel()
+    for _ in range(2 * FRAME_RATE):
+        reference.update()
+    model = PongModel()
+    for _ in range(2 * frame_rate):
+        model.update(1.0 / frame_rate)
+    assert model.ball_pos == reference.ball_pos
+    assert model.ball_vel == reference.ball_vel
+    assert model.points == reference.points
+
+
+def test_update_partial_step():
+    """
+    Test that the ball does not move until a full physics step has passed
+    """
+    model = PongModel((CENTER_X, CENTER_Y), pix_per_sec(1, 1))
+    model.update(PHYSICS_TIMESTEP / 2)
+    assert model.ball_pos == (CENTER_X, CENTER_Y)
+    model.update(PHYSICS_TIMESTEP / 2)
+    assert model.ball_pos == (CENTER_X + 1, CENTER_Y + 1)
+
+
+def test_fast_ball_does_not_pass_through_paddle():
+    """
+    Test that a ball moving far enough in one step to jump over the paddle
+    still bounces off of it
+    """
+    model = PongModel(
+        ball_pos=(WINDOW_WIDTH - PADDLE_DIST_FROM_EDGE - 80, CENTER_Y),
+        ball_vel=(8000.0, 0.0),
+        paddle_location=CENTER_Y
+    )
+    model.update()
+    assert model.ball_vel[0] < 0
+    assert model.ball_pos[0] + HALF_BALL \
+        <= WINDOW_WIDTH - PADDLE_DIST_FROM_EDGE - PADDLE_WIDTH
+    assert model.points == 0
+
+
+@pytest.mark.parametrize("num_players", [1, 2, 3, 4])
+def test_paddle_layout(num_players: int):
+    """
+    Test that players alternate sides and split each side into lanes which
+    cover the court without overlapping
+
+    :param num_players: an int, the number of players
+    """
+    layout = paddle_layout(num_players)
+    assert [side for side, _, _ in layout] \
+        == [RIGHT if player % 2 == 0 else LEFT
+            for player in range(num_players)]
+    for side in (RIGHT, LEFT):
+        lanes = [(top, bottom) for lane_side, top, bottom in layout
+                 if lane_side == side]
+        if lanes:
+            assert lanes[0][0] == WALL_THICKNESS
+            assert lanes[-1][1] == WINDOW_HEIGHT - WALL_THICKNESS
+            assert all(above[1] == below[0]
+                       for above, below in zip(lanes, lanes[1:]))
+
+
+@pytest.mark.parametrize("num_players", [0, 5])
+def test_paddle_layout_player_limits(num_players: int):
+    """
+    Test that games need between 1 and MAX_PLAYERS players
+
+    :param num_players: an int, a number of players that is not allowed
+    """
+    with pytest.raises(ValueError):
+        PongModel(num_players=num_players)
+
+
+def test_paddles_stay_in_their_lanes():
+    """
+    Test that each paddle is kept inside its own lane
+    """
+    model = PongModel(num_players=4)
+    for player in range(4):
+        model.move_paddle(0, player)
+    top_lane_bottom = paddle_layout(4)[0][2]
+    assert model.paddle_locations \
+        == (WALL_THICKNESS + PADDLE_HEIGHT // 2,) * 2 \
+        + (top_lane_bottom + PADDLE_HEIGHT // 2,) * 2
+    model.move_paddle(WINDOW_HEIGHT, 0)
+    assert model.paddle_location == top_lane_bottom - PADDLE_HEIGHT // 2
+
+
+def test_left_paddle_bounce():
+    """
+    Test that the ball bounces off a paddle on the left, speeding up
+    """
+    model = PongModel(
+        ball_pos=(PADDLE_DIST_FROM_EDGE + PADDLE_WIDTH + HALF_BALL + 1,
+                  CENTER_Y),
+        ball_vel=pix_per_sec(-4, 0),
+        num_players=2
+    )
+    model.update()
+    assert model.ball_vel == (float(int(4 * FRAME_RATE * BALL_SPEED_FACTOR)),
+                              0.0)
+    assert model.scores == (0, 0)
+
+
+def test_fast_ball_does_not_pass_through_left_paddle():
+    """
+    Test that a ball moving far enough in one step to jump over a paddle on
+    the left still bounces off of it
+    """
+    model = PongModel(
+        ball_pos=(PADDLE_DIST_FROM_EDGE + 80, CENTER_Y),
+        ball_vel=(-8000.0, 0.0),
+        num_players=2
+    )
+    model.update()
+    assert model.ball_vel[0] > 0
+    assert model.ball_pos[0] - HALF_BALL \
+        >= PADDLE_DIST_FROM_EDGE + PADDLE_WIDTH
+    assert model.scores == (0, 0)
+
+
+@pytest.mark.parametrize("ball_x, scores, serve_x", [
+    (-HALF_BALL - 10, (1, 0, 1, 0), -BALL_INITIAL_SPEED),
+    (WINDOW_WIDTH + HALF_BALL + 10, (0, 1, 0, 1), BALL_INITIAL_SPEED),
+])
+def test_multiplayer_scoring(ball_x: int, scores: tuple[int, ...],
+                             serve_x: int):
+    """
+    Test that when the ball gets past one side, everyone on the other side
+    scores, and the ball is served toward the side that missed
+
+    :param ball_x: an int, the x position of the ball past one side
+    :param scores: a tuple of ints, the scores of each player afterward
+    :param serve_x: an int, the x velocity of the ball when it is served
+    """
+    model = PongModel(ball_pos=(ball_x, CENTER_Y),
+                      ball_vel=(3.0 * serve_x, -500.0), num_players=4)
+    model.update()
+    assert model.scores == scores
+    assert model.ball_pos == (CENTER_X, CENTER_Y)
+    assert model.ball_vel == (float(serve_x), -float(BALL_INITIAL_SPEED))
+
+
+def test_player_at():
+    """
+    Test finding whose part of the court a point is in
+    """
+    single = PongModel()
+    assert single.player_at(10, CENTER_Y) == 0
+    model = PongModel(num_players=4)
+    assert model.player_at(WINDOW_WIDTH - 1, WALL_THICKNESS) == 0
+    assert model.player_at(0, WALL_THICKNESS) == 1
+    assert model.player_at(WINDOW_WIDTH - 1, WINDOW_HEIGHT - 21) == 2
+    assert model.player_at(0, WINDOW_HEIGHT - 21) == 3
+    assert model.player_at(0, WINDOW_HEIGHT - 1) is None
+
+
+def test_sub_pixel_motion_is_kept():
+    """
+    Test that a ball moving less than a pixel per step still moves
+    """
+    model = PongModel(ball_vel=pix_per_sec(0.5, -0.25))
+    for _ in range(4):
+        model.update()
+    assert model.ball_pos == (CENTER_X + 2, CENTER_Y - 1)
+    assert model.ball_vel == pix_per_sec(0.5, -0.25)
+
+
+def test_state_hashes_are_reproducible():
+    """
+    Test that games given the same inputs hash the same every tick, and that
+    any difference changes the hash
+    """
+    games = [PongModel(ball_vel=(1234.5, -987.25), num_players=2,
+                       hash_history=100) for _ in range(3)]
+    for tick in range(300):
+        for index, model in enumerate(games):
+            location = 100 + tick % 400
+            if index == 2 and tick == 250:
+                location += 1
+            model.move_paddle(location, tick % 2)
+            model.update()
+    assert games[0].tick == 300
+    assert games[0].state_bytes() == games[1].state_bytes()
+    assert games[0].hashes == games[1].hashes
+    assert [tick for tick, _ in games[0].hashes] == list(range(201, 301))
+    desynced = [tick for (tick, expected), (_, actual)
+                in zip(games[0].hashes, games[2].hashes) if expected != actual]
+    assert desynced[0] == 251
+    assert PongModel().hashes == []
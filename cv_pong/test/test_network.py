@@ -0,0 +1,216 @@
+"""
+Tests for playing Pong across machines
+"""
+import socket
+import time
+import pytest
+from ..src.constants import *
+from ..src.model import PongModel
+from ..src.network import HEADER, PongClient, PongServer, \
+    ProtocolError, decode_snapshot, encode_snapshot, take_snapshot
+
+
+def wait_for(condition, poll, timeout: float = 2.0):
+    """
+    Poll until a condition holds
+
+    :param condition: a function taking nothing and returning a bool
+    :param poll: a function taking nothing, called until condition is True
+    :param timeout: a float, the most seconds to wait
+    """
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        assert time.perf_counter() < deadline, 'timed out'
+        poll()
+        time.sleep(0.001)
+
+
+@pytest.fixture
+def game():
+    """
+    :return: a PongServer for a two player game on a free local port, and a
+        PongClient connected to it
+    """
+    server = PongServer(PongModel(num_players=2), ('127.0.0.1', 0))
+    client = PongClient(server.address)
+    client.join()
+    wait_for(lambda: client.player is not None,
+             lambda: (server.poll(), client.poll()))
+    yield server, client
+    client.close()
+    server.close()
+
+
+def test_full_snapshot_round_trip():
+    """
+    Test that every field of a snapshot is sent when there is no base
+    """
+    model = PongModel(num_players=3)
+    model.update(0.5)
+    snapshot = take_snapshot(model)
+    packet = encode_snapshot(7, snapshot, server_time=1.5, input_ack=3)
+    tick, server_time, input_ack, decoded = \
+        decode_snapshot(packet[HEADER.size:], 3, {})
+    assert (tick, server_time, input_ack) == (7, 1.5, 3)
+    assert decoded == pytest.approx(snapshot)
+
+
+def test_delta_only_sends_changes():
+    """
+    Test that a snapshot based on an earlier one only holds what changed,
+    and decodes to the full snapshot
+    """
+    model = PongModel(num_players=4)
+    base = take_snapshot(model)
+    model.update(PHYSICS_TIMESTEP)
+    snapshot = take_snapshot(model)
+    full = encode_snapshot(2, snapshot)
+    delta = encode_snapshot(2, snapshot, 1, base)
+    # Only the ball's position moved
+    assert len(full) - len(delta) == 2 * 4 + 2 * 4 + 2 * 4
+    _, _, _, decoded = decode_snapshot(delta[HEADER.size:], 4, {1: base})
+    assert decoded == pytest.approx(snapshot)
+    with pytest.raises(ProtocolError):
+        decode_snapshot(delta[HEADER.size:], 4, {})
+
+
+def test_truncated_snapshot(game):
+    """
+    Test that a snapshot cut short is a ProtocolError, and is dropped by a
+    client instead of crashing it
+    """
+    server, client = game
+    packet = encode_snapshot(1, take_snapshot(server.model))
+    for length in (HEADER.size + 3, len(packet) - 1):
+        with pytest.raises(ProtocolError):
+            decode_snapshot(packet[HEADER.size:length], 2, {})
+    [client_address] = server.clients
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sender:
+        sender.sendto(packet[:HEADER.size + 3], client_address)
+    wait_for(lambda: client.snapshots_dropped == 1, client.poll)
+
+
+def test_silent_clients_are_dropped():
+    """
+    Test that a client that stops sending loses its player, which another
+    client can then join as
+    """
+    server = PongServer(PongModel(num_players=2), ('127.0.0.1', 0),
+                        client_timeout=0.1)
+    clients = [PongClient(server.address) for _ in range(2)]
+    try:
+        clients[0].join()
+        wait_for(lambda: clients[0].player == 1,
+                 lambda: (server.poll(), clients[0].poll()))
+        time.sleep(0.15)
+        server.poll()
+        assert server.clients == {}
+        clients[1].join()
+        wait_for(lambda: clients[1].player == 1,
+                 lambda: (server.poll(), clients[1].poll()))
+        assert not clients[1].rejected
+    finally:
+        for client in clients:
+            client.close()
+        server.close()
+
+
+def test_join_and_reject(game):
+    """
+    Test that clients take the free players, and are turned away once the
+    game is full
+    """
+    server, client = game
+    assert client.player == 1
+    assert client.num_players == 2
+    assert list(server.clients.values()) == [1]
+    extra = PongClient(server.address)
+    try:
+        extra.join()
+        wait_for(lambda: extra.rejected,
+                 lambda: (server.poll(), extra.poll()))
+        assert extra.player is None
+    finally:
+        extra.close()
+
+
+def test_inputs_move_paddles(game):
+    """
+    Test that the server moves a client's paddle, and that the client hears
+    back which input was applied
+    """
+    server, client = game
+    client.send_paddle(150)
+    wait_for(lambda: server.model.paddle_locations[1] == 150, server.poll)
+    server.broadcast()
+    wait_for(lambda: client.round_trip_time is not None, client.poll)
+    assert client.round_trip_time >= 0
+
+
+def test_snapshots_are_deltas_after_ack(game):
+    """
+    Test that the server only sends changes once the client acknowledges a
+    snapshot, and that the client mirrors the server's game
+    """
+    server, client = game
+    sent = server.bytes_sent
+    server.broadcast()
+    full_size = server.bytes_sent - sent
+    wait_for(lambda: client.snapshot_at(time.perf_counter()) is not None,
+             client.poll)
+    client.send_paddle(200)
+    wait_for(lambda: server.model.paddle_locations[1] == 200, server.poll)
+    sent = server.bytes_sent
+    server.broadcast()
+    # Only the paddle changed, so the ball, the other paddle and the scores
+    # are left out
+    unchanged = 2 * 2 + 2 * 4 + 2 + 2 * 2
+    assert server.bytes_sent - sent == full_size - unchanged
+    wait_for(lambda: client.snapshot_at(time.perf_counter() + 10)[5] == 200,
+             client.poll)
+    mirror = PongModel(num_players=2)
+    client.update(mirror, 220)
+    assert mirror.paddle_locations[1] == 220  # predicted locally
+    assert mirror.ball_pos == server.model.ball_pos
+
+
+def test_interpolation():
+    """
+    Test that the client shows the game between the snapshots on either
+    side of the interpolation delay, and extrapolates past the newest
+    """
+    client = PongClient(('127.0.0.1', 9))
+    try:
+        client._num_players = 2
+        client._clock_offset = 0.0
+        client._buffer.extend([
+            (1.0, (100, 200, 300.0, 0.0, 250, 300, 0, 0)),
+            (1.1, (130, 200, 300.0, 0.0, 270, 300, 0, 0)),
+            (1.2, (400, 300, 150.0, -150.0, 300, 300, 1, 0)),
+        ])
+        delay = NETWORK_INTERPOLATION_DELAY
+        snapshot = client.snapshot_at(1.05 + delay)
+        assert snapshot[:2] == pytest.approx((115, 200))
+        assert snapshot[4] == pytest.approx(260)
+        # No interpolation across a point being scored
+        assert client.snapshot_at(1.15 + delay)[:2] == (400, 300)
+        assert client.snapshot_at(0.5 + delay)[:2] == (100, 200)
+        ahead = client.snapshot_at(1.3 + delay)
+        assert ahead[:2] == pytest.approx((415, 285))
+        capped = client.snapshot_at(100 + delay)
+        assert capped[0] \
+            == pytest.approx(400 + 150 * NETWORK_MAX_EXTRAPOLATION)
+    finally:
+        client.close()
+
+
+def test_set_state_validates_players():
+    """
+    Test that a state for the wrong number of players is refused
+    """
+    model = PongModel(num_players=2)
+    model.set_state((10, 20), (1, 2), [200, 300], [3, 4])
+    assert model.ball_pos == (10, 20)
+    assert model.scores == (3, 4)
+    with pytest.raises(ValueError):
+        model.set_state((10, 20), (1, 2), [200], [3])
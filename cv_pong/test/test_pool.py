@@ -0,0 +1,44 @@
+"""
+Tests for finding hands in worker processes
+"""
+import numpy as np
+from ..src.pool import HandDetectorPool, SharedFrameRing
+
+
+def test_shared_frame_ring():
+    """
+    Test that frames written into a ring are seen by anything attached to it
+    """
+    ring = SharedFrameRing(3, (4, 5, 3))
+    attached = SharedFrameRing(3, (4, 5, 3), ring.name)
+    ring[1][:] = 7
+    assert len(attached) == 3
+    assert np.all(attached[1] == 7)
+    assert not np.any(attached[0]) and not np.any(attached[2])
+    attached.close()
+    ring.close()
+
+
+def test_pool_drops_frames_when_busy():
+    """
+    Test that frames get through the pool, and that frames coming in while
+    every slot is in use are dropped
+    """
+    pool = HandDetectorPool(1, (120, 160, 3), slots=2)
+    try:
+        for frame_index in range(2):
+            slot, frame = pool.acquire()
+            frame[:] = 0
+            pool.submit(slot, frame_index, 10.0 + frame_index)
+        assert pool.acquire() is None
+        assert pool.dropped == 1
+
+        results = []
+        while len(results) < 2:
+            results += pool.results(timeout=30.0)
+        assert [result.frame_index for result in results] == [0, 1]
+        assert [result.timestamp for result in results] == [10.0, 11.0]
+        assert all(result.hands == [] for result in results)
+        assert pool.in_flight == 0
+    finally:
+        pool.close()
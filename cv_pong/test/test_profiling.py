@@ -0,0 +1,102 @@
+"""
+Tests for FrameTimer
+"""
+import csv
+import json
+import pytest
+from ..src.profiling import FrameTimer
+
+
+def test_percentiles():
+    """
+    Test that percentiles use the nearest rank of the recorded samples
+    """
+    timer = FrameTimer()
+    for ms in range(1, 102):
+        timer.record('stage', ms / 1000)
+    p50, p95, p99 = timer.percentiles('stage')
+    assert p50 == pytest.approx(0.051)
+    assert p95 == pytest.approx(0.096)
+    assert p99 == pytest.approx(0.100)
+
+
+def test_percentiles_rolling_window():
+    """
+    Test that only the most recent samples are used for percentiles
+    """
+    timer = FrameTimer(window=10)
+    for _ in range(100):
+        timer.record('stage', 1.0)
+    for _ in range(10):
+        timer.record('stage', 0.5)
+    assert timer.percentiles('stage') == (0.5, 0.5, 0.5)
+
+
+def test_untimed_stage():
+    """
+    Test that a stage that was never timed reports zeros
+    """
+    assert FrameTimer().percentiles('missing') == (0.0, 0.0, 0.0)
+
+
+def test_stage_order():
+    """
+    Test that stages are reported in the order they were first timed
+    """
+    timer = FrameTimer()
+    for name in ('capture', 'update', 'draw', 'capture'):
+        with timer.stage(name):
+            pass
+    assert timer.stages == ['capture', 'update', 'draw']
+    assert timer.summary()['capture']['samples'] == 2
+
+
+def test_write_log(tmp_path):
+    """
+    Test exporting timings as CSV and JSON
+
+    :param tmp_path: a temporary directory to write the logs to
+    """
+    timer = FrameTimer(keep_log=True)
+    timer.record('update', 0.25)
+    timer.record('draw', 0.5)
+
+    timer.write_log(str(tmp_path / 'log.csv'))
+    with open(tmp_path / 'log.csv') as file:
+        rows = list(csv.DictReader(file))
+    assert [(row['stage'], float(row['seconds'])) for row in rows] \
+        == [('update', 0.25), ('draw', 0.5)]
+
+    timer.write_log(str(tmp_path / 'log.json'))
+    with open(tmp_path / 'log.json') as file:
+        data = json.load(file)
+    assert data['summary']['draw']['p50_ms'] == pytest.approx(500)
+    assert len(data['samples']) == 2
+
+
+def test_log_keeps_newest(tmp_path):
+    """
+    Test that only the newest log_size samples are kept for export
+
+    :param tmp_path: a temporary directory to write the log to
+    """
+    timer = FrameTimer(keep_log=True, log_size=3)
+    for seconds in range(5):
+        timer.record('update', seconds)
+    timer.write_log(str(tmp_path / 'log.csv'))
+    with open(tmp_path / 'log.csv') as file:
+        rows = list(csv.DictReader(file))
+    assert [float(row['seconds']) for row in rows] == [2, 3, 4]
+    assert timer.summary()['update']['samples'] == 5
+
+
+def test_write_csv_needs_log(tmp_path):
+    """
+    Test that exporting samples as CSV fails if they were not kept
+
+    :param tmp_path: a temporary directory to write the log to
+    """
+    timer = FrameTimer()
+    timer.record('update', 0.25)
+    with pytest.raises(ValueError):
+        timer.write_log(str(tmp_path / 'log.csv'))
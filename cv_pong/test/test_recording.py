@@ -0,0 +1,139 @@
+"""
+Tests for recording and replaying camera sessions
+"""
+import time
+import numpy as np
+import pytest
+from ..src.recording import FrameRecorder, LandmarkCache, LandmarkTrace, \
+    RecordingSource, ReplaySource
+from ..src.sources import ArraySource
+
+
+def make_frames(count: int) -> np.ndarray:
+    """
+    Make frames which are each different from the others
+
+    :param count: an int, the number of frames to make
+    :return: a (count, 24, 32, 3) array of uint8, the frames
+    """
+    rng = np.random.default_rng(count)
+    return rng.integers(0, 256, (count, 24, 32, 3), dtype=np.uint8)
+
+
+def record(path, frames: np.ndarray, capacity: int = 4) -> list[float]:
+    """
+    Record frames through a RecordingSource
+
+    :param path: the directory to record to
+    :param frames: an (N, H, W, 3) array, the frames to record
+    :param capacity: an int, the number of frames the recorder starts with
+        room for
+    :return: a list of floats, the timestamps the frames were read at
+    """
+    source = RecordingSource(ArraySource(frames),
+                             FrameRecorder(str(path), capacity))
+    timestamps = []
+    while source.is_opened():
+        ret, _ = source.read()
+        assert ret
+        timestamps.append(source.timestamp)
+    source.release()
+    return timestamps
+
+
+@pytest.mark.parametrize("count", [0, 1, 4, 5, 17])
+def test_record_and_replay(tmp_path, count: int):
+    """
+    Test that a replay gives back exactly the frames that were recorded
+
+    :param tmp_path: a temporary directory to record to
+    :param count: an int, the number of frames to record
+    """
+    frames = make_frames(count)
+    timestamps = record(tmp_path, frames)
+    replay = ReplaySource(str(tmp_path), realtime=False)
+    assert len(replay) == count
+    for frame, timestamp in zip(frames, timestamps):
+        ret, replayed = replay.read()
+        assert ret
+        assert np.array_equal(replayed, frame)
+        assert replay.recorded_timestamp == timestamp
+    assert not replay.is_opened()
+    assert replay.read() == (False, None)
+
+
+def test_replay_seek_and_loop(tmp_path):
+    """
+    Test seeking within a replay and looping back to the start
+
+    :param tmp_path: a temporary directory to record to
+    """
+    frames = make_frames(6)
+    record(tmp_path, frames)
+    replay = ReplaySource(str(tmp_path), realtime=False, loop=True)
+    replay.seek(4)
+    assert replay.position == 4
+    for index in (4, 5, 0, 1):
+        assert np.array_equal(replay.read()[1], frames[index])
+    with pytest.raises(IndexError):
+        replay.seek(7)
+
+
+def test_replay_realtime(tmp_path):
+    """
+    Test that a realtime replay keeps the spacing of the recorded frames
+
+    :param tmp_path: a temporary directory to record to
+    """
+    frames = make_frames(3)
+    recorder = FrameRecorder(str(tmp_path))
+    for index, frame in enumerate(frames):
+        recorder.write(frame, 100.0 + 0.05 * index)
+    recorder.close()
+
+    replay = ReplaySource(str(tmp_path))
+    start = time.perf_counter()
+    timestamps = [replay.timestamp for _ in frames if replay.read()[0]]
+    assert time.perf_counter() - start >= 0.1
+    assert np.diff(timestamps) == pytest.approx([0.05, 0.05])
+
+
+def test_recorder_rejects_different_shape(tmp_path):
+    """
+    Test that every frame in a recording must be the same shape
+
+    :param tmp_path: a temporary directory to record to
+    """
+    recorder = FrameRecorder(str(tmp_path))
+    recorder.write(np.zeros((24, 32, 3), dtype=np.uint8), 0.0)
+    with pytest.raises(ValueError):
+        recorder.write(np.zeros((32, 24, 3), dtype=np.uint8), 1.0)
+
+
+def test_landmark_trace(tmp_path):
+    """
+    Test recording hands in a landmark trace, including past its starting
+    capacity, and saving it through a landmark cache
+
+    :param tmp_path: a temporary directory to hold the cache
+    """
+    rng = np.random.default_rng(0)
+    hands = rng.random((400, 21, 3), dtype=np.float32)
+    cache = LandmarkCache(str(tmp_path))
+    assert 'session' not in cache
+    trace = cache.trace('session')
+    for frame in range(0, 400, 2):
+        trace.put(frame, hands[frame])
+    trace.put(401, None)
+    cache.save()
+
+    loaded = LandmarkCache(str(tmp_path)).trace('session')
+    assert len(loaded) == 402
+    for frame in range(0, 400, 2):
+        assert loaded.is_recorded(frame)
+        assert np.array_equal(loaded.get(frame), hands[frame])
+        assert not loaded.is_recorded(frame + 1)
+        assert loaded.get(frame + 1) is None
+    assert loaded.is_recorded(401)
+    assert loaded.get(401) is None
+    assert not loaded.is_recorded(402)
@@ -0,0 +1,126 @@
+"""
+Tests for saving and going back to the states of a game
+"""
+import pytest
+from ..src.constants import *
+from ..src.model import PongModel
+from ..src.rewind import RewindBuffer
+
+
+def play(model: PongModel, ticks: int):
+    """
+    Step a game, moving the paddles in a fixed pattern
+
+    :param model: the PongModel to step
+    :param ticks: an int, the number of physics steps to take
+    """
+    for _ in range(ticks):
+        for player in range(model.num_players):
+            model.move_paddle(100 + (model.tick * 7 + player * 50) % 400,
+                              player)
+        model.update()
+
+
+@pytest.mark.parametrize("num_players", [1, 2, 4])
+def test_state_round_trip(num_players: int):
+    """
+    Test that a game made from a saved state plays on exactly like the game
+    it was saved from
+
+    :param num_players: an int, the number of players in the game
+    """
+    model = PongModel(ball_vel=(700.5, -333.25), num_players=num_players)
+    play(model, 100)
+    saved = model.state_bytes()
+    assert len(saved) == model.state_size == 24 + 8 * num_players
+    copy = PongModel.from_state_bytes(saved)
+    assert copy.state_bytes() == saved
+    play(model, 100)
+    play(copy, 100)
+    assert copy.state_bytes() == model.state_bytes()
+    with pytest.raises(ValueError):
+        PongModel.from_state_bytes(saved[:-1])
+
+
+def test_rewind_and_replay():
+    """
+    Test that going back replays the same ticks, and that the ticks after
+    the one gone back to are forgotten
+    """
+    model = PongModel(ball_vel=(900.0, 400.0), num_players=2,
+                      hash_history=50)
+    buffer = RewindBuffer(model, capacity=64)
+    play(model, 40)
+    assert (buffer.oldest_tick, buffer.newest_tick, len(buffer)) == (0, 40, 41)
+    expected = model.state_bytes()
+    hashes = model.hashes
+    state_at_25 = buffer.state_at(25)
+    buffer.rewind(15)
+    assert model.tick == 25
+    assert model.state_bytes() == state_at_25
+    assert model.hashes == hashes[:25]
+    assert buffer.newest_tick == 25
+    with pytest.raises(IndexError):
+        buffer.state_at(26)
+    play(model, 15)
+    assert model.state_bytes() == expected
+    assert model.hashes == hashes
+    buffer.close()
+    play(model, 1)
+    assert buffer.newest_tick == 40
+
+
+def test_restore_drops_partial_tick():
+    """
+    Test that time toward the next tick is not carried back with a restore,
+    so an update after it steps the same ticks as it did the first time
+    """
+    model = PongModel(ball_vel=(900.0, 400.0))
+    buffer = RewindBuffer(model, capacity=16)
+    model.update(4.5 * PHYSICS_TIMESTEP)
+    assert model.tick == 4
+    expected = model.state_bytes()
+    buffer.restore(0)
+    model.update(4.5 * PHYSICS_TIMESTEP)
+    assert model.state_bytes() == expected
+    model.update(0.6 * PHYSICS_TIMESTEP)
+    model.set_state((100, 200), (300, 0), [250], [0])
+    model.update(0.6 * PHYSICS_TIMESTEP)
+    assert model.ball_pos == (100, 200)
+
+
+def test_ring_keeps_newest():
+    """
+    Test that a full buffer drops the oldest ticks
+    """
+    model = PongModel()
+    buffer = RewindBuffer(model, capacity=10)
+    play(model, 25)
+    assert len(buffer) == 10
+    assert (buffer.oldest_tick, buffer.newest_tick) == (16, 25)
+    with pytest.raises(IndexError):
+        buffer.restore(15)
+    buffer.restore(16)
+    assert model.tick == 16
+    assert len(buffer) == 1
+    buffer.rewind(0)
+    with pytest.raises(IndexError):
+        buffer.rewind(1)
+
+
+def test_manual_recording():
+    """
+    Test that a buffer not recording every step can still go back to the
+    ticks it was given
+    """
+    model = PongModel()
+    buffer = RewindBuffer(model, capacity=8, record_steps=False)
+    play(model, 10)
+    buffer.record()
+    play(model, 10)
+    buffer.record()
+    assert len(buffer) == 3
+    with pytest.raises(IndexError):
+        buffer.restore(15)
+    buffer.restore(10)
+    assert model.tick == 10
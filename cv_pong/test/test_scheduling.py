@@ -0,0 +1,78 @@
+"""
+Tests for deciding which camera frames to run hand inference on
+"""
+import numpy as np
+import pytest
+from ..src.scheduling import InferenceScheduler
+
+
+FRAME_TIME = 1 / 60
+
+
+def still_frame(level: int = 100) -> np.ndarray:
+    """
+    :param level: an int, the gray level of the frame
+    :return: a (120, 160, 3) array of uint8, a frame of one color
+    """
+    return np.full((120, 160, 3), level, dtype=np.uint8)
+
+
+@pytest.mark.parametrize("skip", [1, 2, 5])
+def test_still_frames_are_skipped(skip: int):
+    """
+    Test that inference runs every skip-th frame while nothing moves
+
+    :param skip: an int, the frames per inference to schedule
+    """
+    scheduler = InferenceScheduler(FRAME_TIME, min_skip=skip, max_skip=skip)
+    decisions = [scheduler.should_infer(still_frame()) for _ in range(11)]
+    assert decisions == [index % skip == 0 for index in range(11)]
+
+
+def test_motion_triggers_inference():
+    """
+    Test that a changed frame is looked at before the skip is up, and that
+    small changes are not counted as motion
+    """
+    scheduler = InferenceScheduler(FRAME_TIME, min_skip=2, max_skip=8,
+                                   motion_threshold=4.0)
+    scheduler.inferred(1.0)
+    assert scheduler.skip == 8
+    assert scheduler.should_infer(still_frame(100))
+    assert not scheduler.should_infer(still_frame(100))
+    assert not scheduler.should_infer(still_frame(102))
+    assert scheduler.should_infer(still_frame(110))
+    # Motion is measured against the frame last looked at
+    assert not scheduler.should_infer(still_frame(110))
+    assert not scheduler.should_infer(still_frame(112))
+    assert scheduler.motion(still_frame(100)) == pytest.approx(10)
+
+
+def test_motion_keeps_min_skip():
+    """
+    Test that a frame changing all the time is still only looked at every
+    min_skip-th frame
+    """
+    scheduler = InferenceScheduler(FRAME_TIME, min_skip=3, max_skip=8,
+                                   motion_threshold=4.0)
+    scheduler.inferred(1.0)
+    decisions = [scheduler.should_infer(still_frame(20 * index))
+                 for index in range(10)]
+    assert decisions == [index % 3 == 0 for index in range(10)]
+
+
+def test_skip_adapts_to_inference_time():
+    """
+    Test that slower inference is run on fewer frames, within the limits
+    """
+    scheduler = InferenceScheduler(FRAME_TIME, budget_fraction=0.5,
+                                   min_skip=1, max_skip=4)
+    scheduler.inferred(0.001)
+    assert scheduler.skip == 1
+    for _ in range(100):
+        scheduler.inferred(FRAME_TIME)
+    assert scheduler.inference_time == pytest.approx(FRAME_TIME, rel=1e-3)
+    assert scheduler.skip == 2
+    for _ in range(100):
+        scheduler.inferred(1.0)
+    assert scheduler.skip == 4
@@ -0,0 +1,230 @@
+"""
+Tests for the sources frames are read from
+"""
+import time
+import numpy as np
+import pytest
+from ..src.constants import *
+from ..src.sources import CameraSource, CaptureSettings, FrameSource, \
+    ImageSequenceSource, LatestFrameSource, SyntheticSource, \
+    VideoFileSource, make_source, negotiate_capture
+
+
+def draw_index(index: int, frame: np.ndarray):
+    """
+    Draw a frame that says which frame it is
+
+    :param index: an int, the index of the frame
+    :param frame: an (H, W, 3) array of uint8 to draw the frame into
+    """
+    frame[:] = index % 256
+
+
+class FakeCapture:
+    """
+    Stands in for a cv2.VideoCapture of a camera with a few fixed modes
+    """
+    def __init__(self):
+        cv2 = pytest.importorskip('cv2')
+        self.calls = []
+        self._properties = {
+            cv2.CAP_PROP_FRAME_WIDTH: 1920.0,
+            cv2.CAP_PROP_FRAME_HEIGHT: 1080.0,
+            cv2.CAP_PROP_FPS: 5.0,
+            cv2.CAP_PROP_FOURCC: float(cv2.VideoWriter_fourcc(*'YUYV')),
+            cv2.CAP_PROP_BUFFERSIZE: 0.0,  # not supported
+        }
+        self._clamp = {cv2.CAP_PROP_FPS: 30.0}
+
+    def set(self, prop: int, value: float) -> bool:
+        self.calls.append(prop)
+        if prop == pytest.importorskip('cv2').CAP_PROP_BUFFERSIZE:
+            return False
+        self._properties[prop] = min(value, self._clamp.get(prop, value))
+        return True
+
+    def get(self, prop: int) -> float:
+        return self._properties[prop]
+
+
+def test_negotiate_capture():
+    """
+    Test that settings are asked for in order, and that what the camera went
+    with is read back
+    """
+    cv2 = pytest.importorskip('cv2')
+    capture = FakeCapture()
+    negotiated = negotiate_capture(capture, CaptureSettings(
+        width=640, height=480, fps=60, fourcc='MJPG', buffer_size=1
+    ))
+    assert capture.calls == [cv2.CAP_PROP_FOURCC, cv2.CAP_PROP_FRAME_WIDTH,
+                             cv2.CAP_PROP_FRAME_HEIGHT, cv2.CAP_PROP_FPS,
+                             cv2.CAP_PROP_BUFFERSIZE]
+    assert negotiated == CaptureSettings(width=640, height=480, fps=30.0,
+                                         fourcc='MJPG', buffer_size=None)
+
+
+def test_negotiate_capture_leaves_defaults():
+    """
+    Test that settings given as None are not asked for
+    """
+    capture = FakeCapture()
+    negotiated = negotiate_capture(capture, CaptureSettings(
+        None, None, None, None, None
+    ))
+    assert capture.calls == []
+    assert negotiated == CaptureSettings(width=1920, height=1080, fps=5.0,
+                                         fourcc='YUYV', buffer_size=None)
+
+
+def test_synthetic_frames():
+    """
+    Test that synthetic frames have the asked for size, run out after count,
+    and show a moving square by default
+    """
+    source = SyntheticSource((64, 48), fps=10, count=3, realtime=False)
+    frames = []
+    while source.is_opened():
+        ret, frame = source.read()
+        assert ret
+        frames.append(frame)
+    assert source.read() == (False, None)
+    assert len(frames) == 3
+    assert frames[0].shape == (48, 64, 3)
+    assert frames[0].dtype == np.uint8
+    assert frames[0].max() == 255
+    assert not np.array_equal(frames[0], frames[1])
+
+
+def test_paced_timestamps():
+    """
+    Test that frames read in realtime are spaced out by the frame rate, and
+    that late frames are given right away with the time they were due
+    """
+    source = SyntheticSource((8, 8), fps=100, draw=draw_index)
+    start = time.perf_counter()
+    timestamps = [source.read() and source.timestamp for _ in range(5)]
+    assert time.perf_counter() - start >= 0.04
+    np.testing.assert_allclose(np.diff(timestamps), 0.01)
+    time.sleep(0.05)
+    start = time.perf_counter()
+    source.read()
+    assert time.perf_counter() - start < 0.01
+    assert source.timestamp == pytest.approx(timestamps[0] + 0.05)
+
+
+def test_image_sequence(tmp_path):
+    """
+    Test that a directory or pattern of images plays in name order
+    """
+    cv2 = pytest.importorskip('cv2')
+    for index in range(3):
+        cv2.imwrite(str(tmp_path / f'frame_{index:03}.png'),
+                    np.full((12, 16, 3), 10 * index, dtype=np.uint8))
+    (tmp_path / 'notes.txt').write_text('not a frame')
+    source = ImageSequenceSource(str(tmp_path), realtime=False, loop=True)
+    assert len(source) == 3
+    values = [source.read()[1][0, 0, 0] for _ in range(4)]
+    assert values == [0, 10, 20, 0]
+    pattern = ImageSequenceSource(str(tmp_path / 'frame_00[12].png'),
+                                  realtime=False)
+    assert [pattern.read()[1][0, 0, 0] for _ in range(2)] == [10, 20]
+    assert not pattern.is_opened()
+    assert pattern.read() == (False, None)
+    with pytest.raises(FileNotFoundError):
+        ImageSequenceSource(str(tmp_path / '*.jpg'))
+
+
+def test_video_file(tmp_path):
+    """
+    Test that a video file plays every frame at its frame rate, and loops
+    """
+    from ..src.export import VideoSink
+    pytest.importorskip('cv2')
+    path = str(tmp_path / 'camera.avi')
+    sink = VideoSink(path, (32, 24), fps=25, fourcc='MJPG')
+    for index in range(4):
+        sink.write(np.full((24, 32, 3), 60 * index, dtype=np.uint8), 0.0)
+    sink.close()
+    source = VideoFileSource(path, realtime=False)
+    frames = []
+    while source.is_opened():
+        ret, frame = source.read()
+        if not ret:
+            break
+        frames.append(frame)
+    source.release()
+    assert source.fps == 25
+    assert [int(frame.mean() + 30) // 60 for frame in frames] == [0, 1, 2, 3]
+    looped = VideoFileSource(path, realtime=False, loop=True)
+    assert sum(looped.read()[0] for _ in range(10)) == 10
+    looped.release()
+
+
+def test_latest_frame_drops_stale_frames():
+    """
+    Test that a reader slower than the source only gets fresh frames, newer
+    each time, while reading every frame in order falls further behind
+    """
+    def ages(source: FrameSource) -> tuple[list[int], list[float]]:
+        indices = []
+        frame_ages = []
+        for _ in range(5):
+            time.sleep(0.02)  # looking for hands
+            _, frame = source.read()
+            frame_ages.append(time.perf_counter() - source.timestamp)
+            indices.append(int(frame[0, 0, 0]))
+        source.release()
+        return indices, frame_ages
+
+    latest = LatestFrameSource(SyntheticSource((8, 8), fps=500,
+                                               draw=draw_index))
+    indices, latest_ages = ages(latest)
+    assert all(later > earlier + 1
+               for earlier, later in zip(indices, indices[1:]))
+    assert latest.dropped > 0
+    assert max(latest_ages) < 0.015
+    in_order, queued_ages = ages(SyntheticSource((8, 8), fps=500,
+                                                 draw=draw_index))
+    assert in_order == [0, 1, 2, 3, 4]
+    assert queued_ages[-1] > 0.05
+
+
+def test_latest_frame_ends_with_source():
+    """
+    Test that the last frame can still be read after the source runs out,
+    and that errors in the source are raised by read
+    """
+    source = LatestFrameSource(SyntheticSource((8, 8), count=1,
+                                               realtime=False))
+    assert source.read()[0]
+    assert source.read() == (False, None)
+    assert not source.is_opened()
+    source.release()
+
+    def fail(index: int, frame: np.ndarray):
+        raise IOError('camera unplugged')
+    failing = LatestFrameSource(SyntheticSource((8, 8), draw=fail))
+    with pytest.raises(IOError):
+        failing.read()
+    failing.release()
+
+
+def test_make_source(tmp_path):
+    """
+    Test that names from the command line make the right sources
+    """
+    synthetic = make_source('synthetic', CaptureSettings(320, 240, 30))
+    assert synthetic.read()[1].shape == (240, 320, 3)
+    pytest.importorskip('cv2')
+    (tmp_path / 'frame.png').write_bytes(b'')
+    assert isinstance(make_source(str(tmp_path)), ImageSequenceSource)
+    assert isinstance(make_source(str(tmp_path / '*.png')),
+                      ImageSequenceSource)
+    (tmp_path / 'game.mp4').write_bytes(b'')
+    assert isinstance(make_source(str(tmp_path / 'game.mp4')),
+                      VideoFileSource)
+    camera = make_source('1')
+    assert isinstance(camera, LatestFrameSource)
+    assert isinstance(camera.source, CameraSource)
+    assert isinstance(make_source('1', latest_only=False), CameraSource)
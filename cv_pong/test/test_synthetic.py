@@ -0,0 +1,110 @@
+"""
+Tests for the frames of a synthetic hand
+"""
+import numpy as np
+import pytest
+from ..src.constants import *
+from ..src.controller import CVController, assign_hands
+from ..src.model import PongModel
+from ..src.sources import make_source
+from ..src.synthetic import SyntheticHandSource, hand_landmarks, oscillate, \
+    still, waypoints
+
+
+def test_hand_landmarks():
+    """
+    Test that the landmarks put the middle of the hand, as the controller
+    finds it, at the asked for position, at the asked for size
+    """
+    landmarks = hand_landmarks(0.25, 0.6, (640, 480), hand_size=0.5)
+    assert landmarks.shape == (21, 3)
+    assert landmarks.dtype == np.float32
+    mid_hand = (landmarks[0] + landmarks[9]) / 2
+    np.testing.assert_allclose(mid_hand[:2], (0.25, 0.6), atol=1e-6)
+    length = np.hypot(*((landmarks[12] - landmarks[0])[:2] * (640, 480)))
+    assert length == pytest.approx(240, abs=1e-3)
+    # Fingers up
+    assert landmarks[12, 1] < landmarks[9, 1] < landmarks[0, 1]
+
+
+def test_trajectories():
+    """
+    Test that trajectories are where they are scripted to be
+    """
+    assert still(0.2, 0.3)(5.0) == (0.2, 0.3)
+    moving = oscillate(y=0.5, amplitude=0.25, period=2.0)
+    assert moving(0.5)[1] == pytest.approx(0.75)
+    assert moving(1.5)[1] == pytest.approx(0.25)
+    path = waypoints([(1.0, 0.0, 0.0), (3.0, 1.0, 0.5)])
+    assert path(0.0) == (0.0, 0.0)
+    assert path(2.0) == (0.5, 0.25)
+    assert path(10.0) == (1.0, 0.5)
+
+
+def test_frames_match_ground_truth():
+    """
+    Test that frames are the same every run, show the hand where its
+    landmarks are, and that the truth gives the paddle the controller would
+    """
+    trajectory = waypoints([(0.0, 0.5, 0.3), (1.0, 0.5, 0.7)])
+    source = SyntheticHandSource(trajectory, size=(320, 240), fps=10,
+                                 count=11, realtime=False)
+    again = SyntheticHandSource(trajectory, size=(320, 240), fps=10,
+                                count=11, realtime=False)
+    frames = [source.read()[1] for _ in range(11)]
+    assert not source.is_opened()
+    np.testing.assert_array_equal(frames[5],
+                                  [again.read()[1] for _ in range(6)][-1])
+    for index in (0, 10):
+        landmarks = source.landmarks_at(index)
+        x, y = (landmarks[9, :2] * (320, 240)).astype(int)
+        # Skin on the hand, background well away from it
+        assert frames[index][y, x, 2] > 150
+        assert frames[index][y, 10, 2] < 100
+        assert source.paddle_location_at(index) \
+            == assign_hands(PongModel(), [landmarks])[0]
+    assert source.paddle_location_at(10) == int(0.7 * WINDOW_HEIGHT)
+
+
+def test_background_image():
+    """
+    Test that the hand is drawn onto a given background, resized to fit
+    """
+    background = np.zeros((10, 20, 3), dtype=np.uint8)
+    background[:, 10:] = 200
+    source = SyntheticHandSource(still(0.5, 0.9), size=(160, 120),
+                                 background=background, noise=0,
+                                 realtime=False)
+    _, frame = source.read()
+    assert (frame[0, :70] == 0).all()
+    assert (frame[0, 90:] == 200).all()
+
+
+def test_controller_follows_synthetic_hand():
+    """
+    Test that the controller finds the drawn hand and moves the paddle with
+    it, close to the ground truth
+    """
+    model = PongModel()
+    source = SyntheticHandSource(oscillate(period=1.0), realtime=False)
+    controller = CVController(model, threaded=False, smoothing=False,
+                              scheduling=False)
+    controller.initialize(source=source)
+    errors = []
+    for index in range(60):
+        controller.move()
+        truth = PongModel()
+        truth.move_paddle(source.paddle_location_at(index))
+        errors.append(abs(model.paddle_location - truth.paddle_location))
+    controller.close()
+    assert np.median(errors) < 10
+    assert max(errors[5:]) < 25
+
+
+def test_make_synthetic_hand():
+    """
+    Test that a synthetic hand can be named on the command line
+    """
+    source = make_source('synthetic-hand', realtime=False)
+    assert isinstance(source, SyntheticHandSource)
+    assert source.read()[1].shape == (CAMERA_SIZE[1], CAMERA_SIZE[0], 3)
@@ -366,3 +366,58 @@ def test_do_rects_intersect(rect1: RectTuple, rect2: RectTuple,
     :param intersect: whether the two rectangles intersect each other
     """
     assert do_rects_intersect(rect1, rect2) == intersect
+
+
+@pytest.mark.parametrize("range1, range2, overlap", DO_RANGES_OVERLAP_CASES)
+def test_do_intervals_overlap(range1: range, range2: range, overlap: bool):
+    """
+    Test that do_intervals_overlap agrees with do_ranges_overlap
+
+    :param range1: one range to test overlap with
+    :param range2: another range to test overlap with
+    :param overlap: a bool, whether the ranges overlap
+    """
+    assert do_intervals_overlap(range1.start, range1.stop, range2.start,
+                                range2.stop) == overlap
+
+
+@pytest.mark.parametrize("rect1, rect2, intersect", DO_RECTS_INTERSECT_CASES)
+def test_rect_intersects(rect1: RectTuple, rect2: RectTuple,
+                         intersect: bool):
+    """
+    Test that Rect.intersects agrees with do_rects_intersect, both ways
+
+    :param rect1: one rect represented as (left, top, width, height)
+    :param rect2: another rect represented as (left, top, width, height)
+    :param intersect: whether the two rectangles intersect each other
+    """
+    assert Rect(*rect1).intersects(Rect(*rect2)) == intersect
+    assert Rect(*rect2).intersects(Rect(*rect1)) == intersect
+
+
+def test_rect_in_place():
+    """
+    Test that a Rect is changed in place and unpacks like a RectTuple
+    """
+    rect = Rect(1, 2, 3, 4)
+    same = rect.update(5, 6, 7, 8)
+    assert same is rect
+    assert rect == (5, 6, 7, 8)
+    assert (rect.right, rect.bottom) == (12, 14)
+    assert tuple(rect) == (5, 6, 7, 8)
+
+
+def test_vec2_in_place():
+    """
+    Test that adding to a Vec2 changes it rather than making a new one
+    """
+    pos = Vec2(1, 2)
+    original = pos
+    pos += Vec2(3, -4)
+    assert pos is original
+    assert pos == (4, -2)
+    pos -= Vec2(1, 1)
+    assert pos == Vec2(3, -3)
+    assert pos.set(7, 8) is original
+    x, y = pos
+    assert (x, y) == (7, 8)
@@ -0,0 +1,135 @@
+"""
+Tests for drawing the game with pygame
+"""
+from contextlib import contextmanager
+import numpy as np
+import pygame
+import pytest
+from ..src.constants import *
+from ..src.model import PongModel
+from ..src.view import PygameView, render_score
+
+# Somewhere on the court that nothing is drawn over at the start of a game
+EMPTY_COURT = (WINDOW_WIDTH // 4, WINDOW_HEIGHT - 2 * WALL_THICKNESS)
+
+
+@pytest.fixture
+def display(monkeypatch):
+    """
+    :return: a tuple containing the pygame display Surface of a window made
+        with the dummy video driver, and a list that gets the list of Rects
+        passed to each call of pygame.display.update
+    """
+    monkeypatch.setenv('SDL_VIDEODRIVER', 'dummy')
+    pygame.display.init()
+    screen = pygame.display.set_mode(WINDOW_SIZE)
+    updates = []
+    update = pygame.display.update
+
+    def record(rects):
+        updates.append([pygame.Rect(rect) for rect in rects])
+        update(rects)
+    monkeypatch.setattr(pygame.display, 'update', record)
+    yield screen, updates
+    pygame.display.quit()
+
+
+def piece_rects(model: PongModel) -> list[pygame.Rect]:
+    """
+    :param model: the PongModel of a game
+    :return: a list of pygame Rects, where the ball and each paddle are
+    """
+    ball_x, ball_y = model.ball_pos
+    return [pygame.Rect(ball_x - BALL_SIZE // 2, ball_y - BALL_SIZE // 2,
+                        BALL_SIZE, BALL_SIZE)] \
+        + [pygame.Rect(model.paddle_rect(player))
+           for player in range(model.num_players)]
+
+
+class FakeController:
+    """
+    Stands in for a CVController whose camera feed is given by the test
+    """
+    def __init__(self):
+        self.frame = np.zeros((WINDOW_HEIGHT, WINDOW_WIDTH, 3),
+                              dtype=np.uint8)
+
+    @contextmanager
+    def preview(self):
+        yield self.frame
+
+
+def test_camera_feed_is_shown():
+    """
+    Test that the BGR camera feed shows in the right colors behind the
+    court, and that a new frame array is shown instead of an old one
+    """
+    surface = pygame.Surface(WINDOW_SIZE)
+    controller = FakeController()
+    view = PygameView(PongModel(), surface, controller, offscreen=True)
+    controller.frame[:] = (0, 0, 255)  # red
+    view.draw()
+    red, green, blue, _ = surface.get_at(EMPTY_COURT)
+    assert red > 0 and green == blue == 0
+    # The same buffer drawn into again
+    controller.frame[:] = (255, 0, 0)
+    view.draw()
+    red, green, blue, _ = surface.get_at(EMPTY_COURT)
+    assert blue > 0 and red == green == 0
+    # A new buffer, which may be given the id of the old one once it is freed
+    controller.frame = None
+    controller.frame = np.zeros((WINDOW_HEIGHT, WINDOW_WIDTH, 3),
+                                dtype=np.uint8)
+    controller.frame[:] = (0, 255, 0)
+    view.draw()
+    red, green, blue, _ = surface.get_at(EMPTY_COURT)
+    assert green > 0 and red == blue == 0
+
+
+def test_dirty_rects_match_full_draw(display):
+    """
+    Test that redrawing only what changed leaves the same picture as drawing
+    everything, and that the display is updated wherever a piece was or is
+    """
+    screen, updates = display
+    model = PongModel(ball_vel=(600.0, 250.0))
+    view = PygameView(model, screen, dirty_rects=True)
+    full_surface = pygame.Surface(WINDOW_SIZE)
+    full = PygameView(model, full_surface, offscreen=True)
+    view.draw()
+    assert updates[-1] == [screen.get_rect()]
+    for frame in range(10):
+        before = piece_rects(model)
+        model.move_paddle(100 + 40 * frame)
+        model.update(0.05)
+        view.draw()
+        full.draw()
+        assert pygame.image.tobytes(screen, 'RGB') \
+            == pygame.image.tobytes(full_surface, 'RGB')
+        for piece in before + piece_rects(model):
+            assert any(rect.contains(piece) for rect in updates[-1])
+
+
+def test_scores_are_rendered_once():
+    """
+    Test that a score drawn again reuses its rendered Surface, and that no
+    more than SCORE_CACHE_SIZE scores are kept
+    """
+    model = PongModel()
+    view = PygameView(model, pygame.Surface(WINDOW_SIZE), offscreen=True)
+    render_score.cache_clear()
+
+    def draw_score(points: int):
+        model.set_state(model.ball_pos, model.ball_vel,
+                        model.paddle_locations, [points])
+        view.draw()
+    for points in (0, 1, 0, 1, 1):
+        draw_score(points)
+    info = render_score.cache_info()
+    assert (info.hits, info.misses) == (3, 2)
+    assert render_score('1')[0] is render_score('1')[0]
+    for points in range(2 * SCORE_CACHE_SIZE):
+        draw_score(points)
+    info = render_score.cache_info()
+    assert info.maxsize == SCORE_CACHE_SIZE
+    assert info.currsize == SCORE_CACHE_SIZE